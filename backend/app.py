@@ -3,11 +3,15 @@ import asyncio
 import json
 import os
 from datetime import datetime
+from http import HTTPStatus
 from pathlib import Path
 
 from database import Database
+from async_database import AsyncDatabase
+from credentials import CredentialService
 from websocket_manager import WebSocketManager, WebSocketHandler
 from matchmaking import Matchmaker
+from matchmaking_shards import ShardedMatchmakingQueue
 from debate_logic import DebateManager
 
 try:
@@ -34,14 +38,24 @@ class DebatePlatformServer:
             
         self.debug = debug if debug is not None else os.getenv('DEBUG', 'False').lower() == 'true'
         
-        self.database = Database()
+        self.database = AsyncDatabase(Database())
+        self.credentials = CredentialService()
         self.websocket_manager = WebSocketManager()
         self.debate_manager = DebateManager(self.websocket_manager, self.database)
-        self.matchmaker = Matchmaker(self.websocket_manager, self.database)
+        # e.g. MATCHMAKING_SHARDS=1000,1400,1800 runs one matching process per MMR band
+        shard_edges = os.getenv('MATCHMAKING_SHARDS', '')
+        matchmaking_queue = None
+        if shard_edges:
+            matchmaking_queue = ShardedMatchmakingQueue([int(edge) for edge in shard_edges.split(',')])
+        self.matchmaker = Matchmaker(self.websocket_manager, self.database, matchmaking_queue)
         self.websocket_handler = WebSocketHandler(
-            self.websocket_manager, self.matchmaker, self.debate_manager, self.database
+            self.websocket_manager, self.matchmaker, self.debate_manager, self.database,
+            self.credentials
         )
         
+        # Plain HTTP GET on this path returns Prometheus metrics; unset to disable
+        self.metrics_path = os.getenv('METRICS_PATH')
+        
         self.running = False
         self.server = None
         
@@ -51,6 +65,13 @@ class DebatePlatformServer:
         try:
             print("Starting Debate Platform Server...")
             
+            # The test account's password is hashed on the credential pool like any other
+            if await self.database.get_user_credentials('test') is None:
+                await self.database.create_test_account(await self.credentials.hash_password('passpass'))
+            
+            # Resume debates that were in progress when the previous process stopped
+            await self.debate_manager.restore_sessions()
+            
             matchmaking_task = asyncio.create_task(
                 self.matchmaker.start_matchmaking_service()
             )
@@ -59,7 +80,8 @@ class DebatePlatformServer:
             self.server = await websockets.serve(
                 self.websocket_handler.handle_connection,
                 self.host,
-                self.port
+                self.port,
+                process_request=self.process_http_request
             )
             
             self.running = True
@@ -78,14 +100,25 @@ class DebatePlatformServer:
         
         self.running = False
         
-        self.matchmaker.stop_matchmaking_service()
+        await self.matchmaker.stop_matchmaking_service()
+        await self.debate_manager.stop()
         
         if self.server:
             self.server.close()
             await self.server.wait_closed()
         
+        await self.database.close()
+        self.credentials.shutdown(wait=False)
+        
         print("Server stopped")
     
+    async def process_http_request(self, path, request_headers):
+        """Answer metrics scrapes over plain HTTP; anything else continues as a WebSocket handshake"""
+        if self.metrics_path and path == self.metrics_path:
+            body = self.matchmaker.metrics.to_prometheus().encode()
+            return HTTPStatus.OK, [('Content-Type', 'text/plain; version=0.0.4')], body
+        return None
+    
     def get_status(self):
         return {
             'running': self.running,
@@ -0,0 +1,49 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncDatabase:
+    """Awaitable facade over Database that runs every query on a bounded thread pool"""
+
+    def __init__(self, database, max_workers=None):
+        self.database = database
+
+        # One worker per pooled connection so workers never queue on the pool itself
+        if max_workers is None:
+            max_workers = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db')
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable on the database executor and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def get_user_by_id(self, user_id):
+        # Cache hits are answered on the loop without a hop to the executor
+        cached = self.database.user_cache.get(user_id)
+        if cached is not None:
+            return cached
+        return await self.run(self.database.fetch_user_by_id, user_id)
+
+    def __getattr__(self, name):
+        attr = getattr(self.database, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        return wrapper
+
+    def shutdown(self):
+        """Wait for queued queries to finish, then close pooled connections"""
+        self.executor.shutdown(wait=True)
+        self.database.close()
+
+    async def close(self):
+        """shutdown() from the event loop without blocking it while queries drain"""
+        await asyncio.to_thread(self.shutdown)
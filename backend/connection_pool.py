@@ -0,0 +1,374 @@
+import sqlite3
+import threading
+import queue
+import time
+import os
+from concurrent.futures import Future
+
+try:
+    import psycopg2
+    from psycopg2.extras import RealDictCursor
+    HAS_PSYCOPG2 = True
+except ImportError:
+    HAS_PSYCOPG2 = False
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection became free within the checkout timeout"""
+    pass
+
+
+class PostgresConnectionPool:
+    """Bounded pool of psycopg2 connections shared by every thread"""
+
+    def __init__(self, database_url, min_size=1, max_size=10, timeout=10.0):
+        self.database_url = database_url
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+
+        self._lock = threading.Condition()
+        self._idle = []
+        self._size = 0  # open connections, idle or checked out
+
+        # Statistics
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+        for _ in range(min(self.min_size, self.max_size)):
+            self._idle.append(self._connect())
+            self._size += 1
+
+    def _connect(self):
+        return psycopg2.connect(self.database_url, cursor_factory=RealDictCursor)
+
+    def acquire(self):
+        """Check out a connection, waiting up to `timeout` seconds for a free one"""
+        start = time.monotonic()
+        waited = False
+
+        with self._lock:
+            while True:
+                while self._idle:
+                    conn = self._idle.pop()
+                    if conn.closed:
+                        # Server dropped it while idle
+                        self._size -= 1
+                        self.discarded += 1
+                        continue
+                    self._record_checkout(start, waited)
+                    return conn
+
+                if self._size < self.max_size:
+                    # Reserve the slot before connecting outside the lock
+                    self._size += 1
+                    break
+
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(f"No database connection available after {self.timeout}s")
+                waited = True
+                self._lock.wait(remaining)
+
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+
+        with self._lock:
+            self._record_checkout(start, waited)
+        return conn
+
+    def _record_checkout(self, start, waited):
+        wait_time = time.monotonic() - start
+        self.checkouts += 1
+        if waited:
+            self.waits += 1
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+
+    def release(self, conn, failed=False):
+        """Return a connection to the pool, discarding it if it is no longer usable"""
+        keep = not conn.closed
+        if keep:
+            try:
+                # Ends any transaction left open by a read; no round trip when idle
+                conn.rollback()
+            except Exception:
+                keep = False
+
+        with self._lock:
+            if keep:
+                self._idle.append(conn)
+            else:
+                self._size -= 1
+                self.discarded += 1
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._lock.notify()
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._idle:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._size -= len(self._idle)
+            self._idle = []
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'backend': 'postgres',
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'discarded': self.discarded,
+                'total_wait_time': self.total_wait_time,
+                'avg_wait_time': self.total_wait_time / self.checkouts if self.checkouts else 0.0,
+                'max_wait_time': self.max_wait_time
+            }
+
+
+class SQLiteWriter:
+    """Single thread that owns the only writing SQLite connection.
+
+    Queued writes are applied back to back inside one transaction and
+    committed together, each isolated by a savepoint so a failing write
+    only rolls back itself.
+    """
+
+    def __init__(self, connect, max_batch=64, max_delay=0.002):
+        self.connect = connect
+        self.max_batch = max_batch
+        self.max_delay = max_delay  # how long to wait for more writes to share a commit
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+
+        # Statistics
+        self.writes = 0
+        self.commits = 0
+        self.failed_writes = 0
+        self.max_batch_seen = 0
+
+        self._thread.start()
+
+    def submit(self, work):
+        """Queue work(cursor) and block until its transaction has committed"""
+        future = Future()
+        self._queue.put((work, future))
+        return future.result()
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        conn = self.connect()
+        conn.isolation_level = None  # transactions are managed explicitly below
+        cursor = conn.cursor()
+
+        while True:
+            batch = self._collect_batch()
+            if any(item is None for item in batch):
+                # Finish whatever was queued ahead of the stop marker
+                batch = [item for item in batch if item is not None]
+                stopping = True
+            else:
+                stopping = False
+
+            if batch:
+                self._apply(conn, cursor, batch)
+            if stopping:
+                conn.close()
+                return
+
+    def _apply(self, conn, cursor, batch):
+        results = []
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for work, future in batch:
+                cursor.execute('SAVEPOINT write')
+                try:
+                    results.append((future, work(cursor), None))
+                    cursor.execute('RELEASE write')
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO write')
+                    cursor.execute('RELEASE write')
+                    results.append((future, None, e))
+            cursor.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for _, future in batch:
+                future.set_exception(e)
+            self.failed_writes += len(batch)
+            return
+
+        self.commits += 1
+        self.writes += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        for future, result, error in results:
+            if error is not None:
+                self.failed_writes += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def get_stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'writes': self.writes,
+            'commits': self.commits,
+            'failed_writes': self.failed_writes,
+            'avg_batch': self.writes / self.commits if self.commits else 0.0,
+            'max_batch': self.max_batch_seen
+        }
+
+
+class SQLiteConnectionPool:
+    """One persistent sqlite3 connection per thread, opened on first use.
+
+    In performance mode the database runs in WAL journal mode with tuned
+    pragmas, these per-thread connections serve reads, and all writes go
+    through a dedicated SQLiteWriter.
+    """
+
+    PERFORMANCE_PRAGMAS = [
+        'PRAGMA synchronous = NORMAL',
+        'PRAGMA cache_size = -20000',    # ~20 MB page cache per connection
+        'PRAGMA mmap_size = 268435456',  # 256 MB memory-mapped reads
+        'PRAGMA temp_store = MEMORY',
+        'PRAGMA busy_timeout = 5000'
+    ]
+
+    def __init__(self, db_path, performance_mode=False):
+        self.db_path = db_path
+        self.writer = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+        # An in-memory database is private to its connection unless shared-cache
+        # is used, so every thread connection points at the same named memory db
+        if db_path == ':memory:':
+            self._target = f"file:debate_memdb_{id(self)}?mode=memory&cache=shared"
+            self._uri = True
+        else:
+            db_dir = os.path.dirname(db_path)
+            if db_dir:  # Only create directory if dirname is not empty
+                os.makedirs(db_dir, exist_ok=True)
+            self._target = db_path
+            self._uri = False
+
+        # WAL needs a real file; shared in-memory databases keep the defaults
+        self.performance_mode = performance_mode and not self._uri
+
+        # Statistics
+        self.checkouts = 0
+        self.discarded = 0
+
+        if self.performance_mode:
+            conn = self._connect()
+            mode = conn.execute('PRAGMA journal_mode = WAL').fetchone()[0]
+            conn.close()
+            print(f"SQLite performance mode enabled (journal_mode={mode})")
+            self.writer = SQLiteWriter(self._connect)
+
+    def _connect(self):
+        conn = sqlite3.connect(self._target, uri=self._uri, check_same_thread=False)
+        if self.performance_mode:
+            for pragma in self.PERFORMANCE_PRAGMAS:
+                conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        with self._lock:
+            self.checkouts += 1
+        return conn
+
+    def release(self, conn, failed=False):
+        """Keep the thread's connection open, rolling back anything a failed call left behind"""
+        if failed or conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                # Connection is unusable; the thread opens a fresh one next time
+                self._discard(conn)
+
+    def _discard(self, conn):
+        if getattr(self._local, 'conn', None) is conn:
+            self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+            self.discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections = []
+        self._local = threading.local()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'backend': 'sqlite',
+                'performance_mode': self.performance_mode,
+                'writer': self.writer.get_stats() if self.writer else None,
+                'max_size': None,
+                'size': len(self._connections),
+                'idle': None,
+                'in_use': None,
+                'checkouts': self.checkouts,
+                'waits': 0,
+                'timeouts': 0,
+                'discarded': self.discarded,
+                'total_wait_time': 0.0,
+                'avg_wait_time': 0.0,
+                'max_wait_time': 0.0
+            }
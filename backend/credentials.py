@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PasswordHasher:
+    """Encodes and verifies password hashes as `scheme$params$salt$hash` strings.
+
+    Bare 64-character hex digests are the legacy unsalted sha256 format; they
+    still verify but are always reported as needing a rehash.
+    """
+
+    def __init__(self, scheme='scrypt', scrypt_n=2 ** 14, scrypt_r=8, scrypt_p=1,
+                 pbkdf2_iterations=600000, salt_bytes=16):
+        if scheme not in ('scrypt', 'pbkdf2_sha256'):
+            raise ValueError(f"Unknown password scheme: {scheme}")
+        self.scheme = scheme
+        self.scrypt_n = scrypt_n
+        self.scrypt_r = scrypt_r
+        self.scrypt_p = scrypt_p
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self.salt_bytes = salt_bytes
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            scheme=os.getenv('PASSWORD_SCHEME', 'scrypt'),
+            scrypt_n=int(os.getenv('SCRYPT_N', str(2 ** 14))),
+            scrypt_r=int(os.getenv('SCRYPT_R', '8')),
+            scrypt_p=int(os.getenv('SCRYPT_P', '1')),
+            pbkdf2_iterations=int(os.getenv('PBKDF2_ITERATIONS', '600000'))
+        )
+
+    def _scrypt(self, password, salt, n, r, p):
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r + 1024 * 1024, dklen=32)
+
+    def _pbkdf2(self, password, salt, iterations):
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(self.salt_bytes)
+        if self.scheme == 'scrypt':
+            digest = self._scrypt(password, salt, self.scrypt_n, self.scrypt_r, self.scrypt_p)
+            params = f"{self.scrypt_n},{self.scrypt_r},{self.scrypt_p}"
+        else:
+            digest = self._pbkdf2(password, salt, self.pbkdf2_iterations)
+            params = str(self.pbkdf2_iterations)
+        return f"{self.scheme}${params}${salt.hex()}${digest.hex()}"
+
+    def verify(self, password: str, stored: str):
+        """Return (matches, needs_rehash) for a password against a stored hash"""
+        if not stored:
+            return False, False
+
+        parts = stored.split('$')
+        if len(parts) == 1:
+            digest = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(digest, stored), True
+
+        if len(parts) != 4:
+            return False, False
+        scheme, params, salt_hex, digest_hex = parts
+
+        try:
+            salt = bytes.fromhex(salt_hex)
+            if scheme == 'scrypt':
+                n, r, p = (int(value) for value in params.split(','))
+                digest = self._scrypt(password, salt, n, r, p)
+                current = (n, r, p) == (self.scrypt_n, self.scrypt_r, self.scrypt_p)
+            elif scheme == 'pbkdf2_sha256':
+                iterations = int(params)
+                digest = self._pbkdf2(password, salt, iterations)
+                current = iterations == self.pbkdf2_iterations
+            else:
+                return False, False
+        except ValueError:
+            return False, False
+
+        matches = hmac.compare_digest(digest.hex(), digest_hex)
+        return matches, matches and (scheme != self.scheme or not current)
+
+
+class CredentialService:
+    """Runs password hashing and verification on a bounded worker pool.
+
+    hashlib's scrypt and pbkdf2_hmac release the GIL, so worker threads hash
+    in parallel while the event loop keeps serving timers and sockets.
+    """
+
+    def __init__(self, hasher=None, max_workers=None, max_pending=None):
+        self.hasher = hasher or PasswordHasher.from_env()
+        if max_workers is None:
+            max_workers = int(os.getenv('CREDENTIAL_WORKERS', str(os.cpu_count() or 2)))
+        if max_pending is None:
+            max_pending = int(os.getenv('CREDENTIAL_MAX_PENDING', str(max_workers * 8)))
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='credentials')
+        self._pending = asyncio.Semaphore(max_pending)
+        self.max_pending = max_pending
+        # Verified against when a username is unknown, so that path costs as much as a wrong password
+        self.dummy_hash = self.hasher.hash(os.urandom(16).hex())
+
+        # Statistics
+        self.in_flight = 0
+        self.completed = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    async def _run(self, func, *args):
+        # Excess requests wait here rather than piling up in the executor queue
+        async with self._pending:
+            self.in_flight += 1
+            start = time.monotonic()
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, func, *args)
+            finally:
+                elapsed = time.monotonic() - start
+                self.in_flight -= 1
+                self.completed += 1
+                self.total_time += elapsed
+                self.max_time = max(self.max_time, elapsed)
+
+    async def hash_password(self, password: str) -> str:
+        return await self._run(self.hasher.hash, password)
+
+    async def verify_password(self, password: str, stored):
+        """Return (matches, new_hash); new_hash is set when the stored hash should be upgraded.
+
+        Pass stored=None for an unknown user: a dummy hash is verified instead
+        and the result is always a mismatch.
+        """
+        if stored is None:
+            await self._run(self.hasher.verify, password, self.dummy_hash)
+            return False, None
+        matches, needs_rehash = await self._run(self.hasher.verify, password, stored)
+        new_hash = None
+        if matches and needs_rehash:
+            new_hash = await self.hash_password(password)
+        return matches, new_hash
+
+    def get_stats(self):
+        return {
+            'scheme': self.hasher.scheme,
+            'workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'in_flight': self.in_flight,
+            'completed': self.completed,
+            'avg_time': self.total_time / self.completed if self.completed else 0.0,
+            'max_time': self.max_time
+        }
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
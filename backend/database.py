@@ -1,18 +1,29 @@
-import sqlite3
-import hashlib
+import json
+from contextlib import contextmanager
 from datetime import datetime
 import os
 
-try:
-    import psycopg2
-    from psycopg2.extras import RealDictCursor
-    HAS_PSYCOPG2 = True
-except ImportError:
-    HAS_PSYCOPG2 = False
+from connection_pool import HAS_PSYCOPG2, PostgresConnectionPool, SQLiteConnectionPool
+from user_cache import UserCache
+from topic_pool import TopicPool
+from migrations import apply_migrations
+from rating import EloRating
+from log_archive import encode_log, decode_log
 
 class Database:
     def __init__(self, db_path='database/app.db'):
         self.database_url = os.getenv('DATABASE_URL')
+        self.pool = None
+        self.user_cache = UserCache(
+            max_size=int(os.getenv('USER_CACHE_SIZE', '10000')),
+            ttl=float(os.getenv('USER_CACHE_TTL', '300'))
+        )
+        self.rating = EloRating(k_factor=float(os.getenv('RATING_K_FACTOR', '32')))
+        self.topic_pool = TopicPool(
+            self.load_topic_texts,
+            ttl=float(os.getenv('TOPIC_POOL_TTL', '600')),
+            history_size=int(os.getenv('TOPIC_HISTORY_SIZE', '5'))
+        )
         
         if self.database_url and self.database_url.startswith('postgres') and HAS_PSYCOPG2:
             self.use_postgres = True
@@ -24,110 +35,96 @@ class Database:
             
         self.init_database()
     
-    def get_connection(self):
+    def create_pool(self):
         if self.use_postgres:
-            return psycopg2.connect(self.database_url, cursor_factory=RealDictCursor)
-        else:
-            if self.db_path != ':memory:':
-                db_dir = os.path.dirname(self.db_path)
-                if db_dir:  # Only create directory if dirname is not empty
-                    os.makedirs(db_dir, exist_ok=True)
-            return sqlite3.connect(self.db_path)
+            return PostgresConnectionPool(
+                self.database_url,
+                min_size=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+                max_size=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', '10'))
+            )
+        return SQLiteConnectionPool(
+            self.db_path,
+            performance_mode=os.getenv('SQLITE_PERFORMANCE_MODE', 'true').lower() == 'true'
+        )
     
-    def init_database(self):
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection, rolling back on error and always returning it"""
+        conn = self.pool.acquire()
+        failed = False
         try:
-            conn = self.get_connection()
+            yield conn
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.pool.release(conn, failed)
+    
+    def execute_write(self, work):
+        """Run work(cursor) as one write transaction and return its result.
+        
+        In SQLite performance mode the work is queued to the single writer
+        thread, which commits it together with other pending writes.
+        """
+        writer = getattr(self.pool, 'writer', None)
+        if writer is not None:
+            return writer.submit(work)
+        
+        with self.connection() as conn:
             cursor = conn.cursor()
+            if not self.use_postgres:
+                cursor.execute('BEGIN IMMEDIATE')
+            result = work(cursor)
+            conn.commit()
+            return result
+    
+    def get_pool_stats(self):
+        """Get connection pool size, wait time and checkout counts"""
+        return self.pool.get_stats()
+    
+    def get_user_cache_stats(self):
+        """Get user cache size and hit/miss counters"""
+        return self.user_cache.get_stats()
+    
+    def get_topic_pool_stats(self):
+        """Get topic pool size, reload count and how many users' recent topics are tracked"""
+        return self.topic_pool.get_stats()
+    
+    def close(self):
+        if self.pool:
+            self.pool.close_all()
+    
+    def init_database(self):
+        try:
+            self.pool = self.create_pool()
+            conn = self.pool.acquire()
         except Exception as e:
             print(f"Database connection failed: {e}")
             self.use_postgres = False
             self.db_path = ':memory:'
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            self.pool = SQLiteConnectionPool(self.db_path)
+            conn = self.pool.acquire()
         
-        if self.use_postgres:
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id SERIAL PRIMARY KEY,
-                    username VARCHAR(255) UNIQUE NOT NULL,
-                    password_hash VARCHAR(255) NOT NULL,
-                    mmr INTEGER DEFAULT 1000,
-                    user_class INTEGER DEFAULT 0
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS debates (
-                    id SERIAL PRIMARY KEY,
-                    user1_id INTEGER NOT NULL,
-                    user2_id INTEGER NOT NULL,
-                    topic TEXT NOT NULL,
-                    log TEXT NOT NULL,
-                    winner INTEGER,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user1_id) REFERENCES users (id),
-                    FOREIGN KEY (user2_id) REFERENCES users (id),
-                    FOREIGN KEY (winner) REFERENCES users (id)
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS topics (
-                    id SERIAL PRIMARY KEY,
-                    topic_text TEXT NOT NULL
-                )
-            ''')
-        else:
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    mmr INTEGER DEFAULT 1000,
-                    user_class INTEGER DEFAULT 0
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS debates (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user1_id INTEGER NOT NULL,
-                    user2_id INTEGER NOT NULL,
-                    topic TEXT NOT NULL,
-                    log TEXT NOT NULL,
-                    winner INTEGER,
-                    timestamp DATETIME NOT NULL,
-                    FOREIGN KEY (user1_id) REFERENCES users (id),
-                    FOREIGN KEY (user2_id) REFERENCES users (id),
-                    FOREIGN KEY (winner) REFERENCES users (id)
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS topics (
-                    id INTEGER PRIMARY KEY,
-                    topic_text TEXT NOT NULL
-                )
-            ''')
-        
-        conn.commit()
+        failed = False
+        try:
+            self.create_tables(conn)
+            conn.commit()
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.pool.release(conn, failed)
+    
+    def create_tables(self, conn):
+        apply_migrations(conn, self.use_postgres)
+        cursor = conn.cursor()
         
-        if self.use_postgres:
-            cursor.execute('SELECT COUNT(*) FROM topics')
-            count = cursor.fetchone()[0]
-        else:
-            cursor.execute('SELECT COUNT(*) FROM topics')
-            count = cursor.fetchone()[0]
+        cursor.execute('SELECT COUNT(*) FROM topics')
+        count = cursor.fetchone()[0]
             
         if count == 0:
             self.insert_default_topics(cursor)
-            conn.commit()
-        
-        # Check if test account exists, create if it doesn't
-        self.create_test_account_if_not_exists(cursor)
-        conn.commit()
-        
-        conn.close()
     
     def insert_default_topics(self, cursor):
         default_topics = [
@@ -149,196 +146,592 @@ class Database:
             else:
                 cursor.execute("INSERT INTO topics (topic_text) VALUES (?)", (topic,))
     
-    def create_test_account_if_not_exists(self, cursor):
-        """Create the test account with UserClass 2 if it doesn't exist"""
-        # Check if test account already exists
-        if self.use_postgres:
-            cursor.execute("SELECT COUNT(*) FROM users WHERE username = %s", ('test',))
-        else:
-            cursor.execute("SELECT COUNT(*) FROM users WHERE username = ?", ('test',))
-        
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            # Create test account with password "passpass" and UserClass 2
-            password_hash = hashlib.sha256('passpass'.encode()).hexdigest()
+    def create_test_account(self, password_hash):
+        """Create the test account with UserClass 2 if it doesn't exist; the caller hashes its password"""
+        def work(cursor):
+            # Check if test account already exists
             if self.use_postgres:
-                cursor.execute("INSERT INTO users (username, password_hash, user_class, mmr) VALUES (%s, %s, %s, %s)", 
-                             ('test', password_hash, 2, 1500))
+                cursor.execute("SELECT COUNT(*) AS count FROM users WHERE username = %s", ('test',))
+                count = cursor.fetchone()['count']
             else:
-                cursor.execute("INSERT INTO users (username, password_hash, user_class, mmr) VALUES (?, ?, ?, ?)", 
-                             ('test', password_hash, 2, 1500))
+                cursor.execute("SELECT COUNT(*) FROM users WHERE username = ?", ('test',))
+                count = cursor.fetchone()[0]
+            
+            if count == 0:
+                if self.use_postgres:
+                    cursor.execute("INSERT INTO users (username, password_hash, user_class, mmr) VALUES (%s, %s, %s, %s)", 
+                                 ('test', password_hash, 2, 1500))
+                else:
+                    cursor.execute("INSERT INTO users (username, password_hash, user_class, mmr) VALUES (?, ?, ?, ?)", 
+                                 ('test', password_hash, 2, 1500))
+            return count == 0
+        
+        return self.execute_write(work)
     
-    def create_user(self, username, password, user_class=0):
+    def create_user(self, username, password_hash, user_class=0):
+        """Create a user from a password hash computed by the caller, off the event loop"""
         try:
-            password_hash = hashlib.sha256(password.encode()).hexdigest()
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            def work(cursor):
+                if self.use_postgres:
+                    cursor.execute("INSERT INTO users (username, password_hash, user_class) VALUES (%s, %s, %s) RETURNING id", 
+                                 (username, password_hash, user_class))
+                    user_id = cursor.fetchone()[0]
+                else:
+                    cursor.execute("INSERT INTO users (username, password_hash, user_class) VALUES (?, ?, ?)", 
+                                 (username, password_hash, user_class))
+                    user_id = cursor.lastrowid
+                return user_id
             
-            if self.use_postgres:
-                cursor.execute("INSERT INTO users (username, password_hash, user_class) VALUES (%s, %s, %s) RETURNING id", 
-                             (username, password_hash, user_class))
-                user_id = cursor.fetchone()[0]
-            else:
-                cursor.execute("INSERT INTO users (username, password_hash, user_class) VALUES (?, ?, ?)", 
-                             (username, password_hash, user_class))
-                user_id = cursor.lastrowid
-                
-            conn.commit()
-            conn.close()
-            return user_id
+            return self.execute_write(work)
         except Exception as e:
-            try:
-                conn.close()
-            except:
-                pass
             if "unique" in str(e).lower() or "duplicate" in str(e).lower():
                 return None
             return None
     
-    def authenticate_user(self, username, password):
-        try:
-            password_hash = hashlib.sha256(password.encode()).hexdigest()
-            conn = self.get_connection()
+    def get_user_credentials(self, username):
+        """Get a user's row including the stored password hash, for verification"""
+        with self.connection() as conn:
             cursor = conn.cursor()
             
             if self.use_postgres:
-                cursor.execute("SELECT id, mmr, user_class FROM users WHERE username = %s AND password_hash = %s", 
-                             (username, password_hash))
+                cursor.execute("SELECT id, mmr, user_class, password_hash FROM users WHERE username = %s", (username,))
             else:
-                cursor.execute("SELECT id, mmr, user_class FROM users WHERE username = ? AND password_hash = ?", 
-                             (username, password_hash))
+                cursor.execute("SELECT id, mmr, user_class, password_hash FROM users WHERE username = ?", (username,))
             
             result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return {'id': result[0], 'username': username, 'mmr': result[1], 'user_class': result[2]}
-            return None
-        except Exception as e:
-            try:
-                conn.close()
-            except:
-                pass
-            return None
-    
-    def get_user_by_id(self, user_id):
-        conn = self.get_connection()
-        cursor = conn.cursor()
         
+        if not result:
+            return None
         if self.use_postgres:
-            cursor.execute("SELECT id, username, mmr, user_class FROM users WHERE id = %s", (user_id,))
-        else:
-            cursor.execute("SELECT id, username, mmr, user_class FROM users WHERE id = ?", (user_id,))
+            result = (result['id'], result['mmr'], result['user_class'], result['password_hash'])
+        return {'id': result[0], 'username': username, 'mmr': result[1], 'user_class': result[2],
+                'password_hash': result[3]}
+    
+    def update_password_hash(self, user_id, password_hash):
+        """Replace a user's stored hash, e.g. when upgrading a legacy sha256 hash"""
+        def work(cursor):
+            if self.use_postgres:
+                cursor.execute("UPDATE users SET password_hash = %s WHERE id = %s", (password_hash, user_id))
+            else:
+                cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (password_hash, user_id))
         
-        result = cursor.fetchone()
-        conn.close()
+        self.execute_write(work)
+    
+    def get_user_by_id(self, user_id):
+        cached = self.user_cache.get(user_id)
+        if cached is not None:
+            return cached
+        return self.fetch_user_by_id(user_id)
+    
+    def fetch_user_by_id(self, user_id):
+        """Load a user row from the database and cache it"""
+        generation = self.user_cache.generation
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            if self.use_postgres:
+                cursor.execute("SELECT id, username, mmr, user_class FROM users WHERE id = %s", (user_id,))
+            else:
+                cursor.execute("SELECT id, username, mmr, user_class FROM users WHERE id = ?", (user_id,))
+            
+            result = cursor.fetchone()
         
         if result:
-            return {'id': result[0], 'username': result[1], 'mmr': result[2], 'user_class': result[3]}
+            user = {'id': result[0], 'username': result[1], 'mmr': result[2], 'user_class': result[3]}
+            self.user_cache.put(user_id, user, generation)
+            return user
         return None
     
     def update_user_mmr(self, user_id, new_mmr):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        def work(cursor):
+            if self.use_postgres:
+                cursor.execute("UPDATE users SET mmr = %s WHERE id = %s", (new_mmr, user_id))
+            else:
+                cursor.execute("UPDATE users SET mmr = ? WHERE id = ?", (new_mmr, user_id))
         
-        if self.use_postgres:
-            cursor.execute("UPDATE users SET mmr = %s WHERE id = %s", (new_mmr, user_id))
-        else:
-            cursor.execute("UPDATE users SET mmr = ? WHERE id = ?", (new_mmr, user_id))
+        self.execute_write(work)
         
-        conn.commit()
-        conn.close()
+        self.user_cache.update(user_id, mmr=new_mmr)
     
-    def get_random_topic(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def record_debate_result(self, debate_id, winner_id):
+        """Record a debate's winner and both players' new MMR in one transaction.
         
-        if self.use_postgres:
-            cursor.execute("SELECT topic_text FROM topics ORDER BY RANDOM() LIMIT 1")
-        else:
-            cursor.execute("SELECT topic_text FROM topics ORDER BY RANDOM() LIMIT 1")
+        Returns {user_id: new_mmr}, or None if the debate is unknown, already
+        decided, or the winner did not take part.
+        """
+        ph = '%s' if self.use_postgres else '?'
+        lock = ' FOR UPDATE' if self.use_postgres else ''
         
-        result = cursor.fetchone()
-        conn.close()
+        # SQLite write transactions hold the write lock from the start, so the reads see fresh MMR
+        def work(cursor):
+            cursor.execute(f"SELECT user1_id, user2_id, winner FROM debates WHERE id = {ph}{lock}", (debate_id,))
+            debate = cursor.fetchone()
+            if self.use_postgres and debate:
+                debate = (debate['user1_id'], debate['user2_id'], debate['winner'])
+            if not debate or debate[2] is not None or winner_id not in (debate[0], debate[1]):
+                return None
+            
+            loser_id = debate[1] if winner_id == debate[0] else debate[0]
+            cursor.execute(f"SELECT id, mmr FROM users WHERE id IN ({ph}, {ph}){lock}", (winner_id, loser_id))
+            rows = cursor.fetchall()
+            mmrs = {row['id']: row['mmr'] for row in rows} if self.use_postgres else dict(rows)
+            if winner_id not in mmrs or loser_id not in mmrs:
+                return None
+            
+            new_winner, new_loser = self.rating.rate(mmrs[winner_id], mmrs[loser_id])
+            cursor.executemany(f"UPDATE users SET mmr = {ph} WHERE id = {ph}",
+                               [(new_winner, winner_id), (new_loser, loser_id)])
+            cursor.execute(f"UPDATE debates SET winner = {ph} WHERE id = {ph}", (winner_id, debate_id))
+            return {winner_id: new_winner, loser_id: new_loser}
+        
+        new_ratings = self.execute_write(work)
+        if new_ratings:
+            for user_id, mmr in new_ratings.items():
+                self.user_cache.update(user_id, mmr=mmr)
+        return new_ratings
+    
+    def recompute_ratings(self, initial_mmr=1000):
+        """Replay every decided debate in order and rewrite MMR in a single pass and transaction"""
+        ph = '%s' if self.use_postgres else '?'
+        
+        def work(cursor):
+            cursor.execute('''
+                SELECT user1_id, user2_id, winner FROM debates
+                WHERE winner IS NOT NULL
+                ORDER BY timestamp, id
+            ''')
+            
+            def results():
+                for row in cursor:
+                    if self.use_postgres:
+                        row = (row['user1_id'], row['user2_id'], row['winner'])
+                    user1_id, user2_id, winner = row
+                    if winner == user1_id:
+                        yield user1_id, user2_id
+                    elif winner == user2_id:
+                        yield user2_id, user1_id
+            
+            ratings = self.rating.replay(results(), initial_mmr)
+            cursor.executemany(f"UPDATE users SET mmr = {ph} WHERE id = {ph}",
+                               [(mmr, user_id) for user_id, mmr in ratings.items()])
+            return ratings
         
-        return result[0] if result else "The importance of education in society"
+        ratings = self.execute_write(work)
+        self.user_cache.clear()
+        return ratings
+    
+    def load_topic_texts(self):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT topic_text FROM topics")
+            results = cursor.fetchall()
+        
+        if self.use_postgres:
+            return [row['topic_text'] for row in results]
+        return [row[0] for row in results]
+    
+    def get_random_topic(self, user_ids=()):
+        """Pick a random topic from the cached pool, avoiding ones these users saw recently"""
+        topic = self.topic_pool.choose(user_ids)
+        return topic if topic else "The importance of education in society"
+    
+    def create_topic(self, topic_text):
+        """Create a topic for admin panel and return its ID"""
+        try:
+            def work(cursor):
+                if self.use_postgres:
+                    cursor.execute("INSERT INTO topics (topic_text) VALUES (%s) RETURNING id", (topic_text,))
+                    topic_id = cursor.fetchone()['id']
+                else:
+                    cursor.execute("INSERT INTO topics (topic_text) VALUES (?)", (topic_text,))
+                    topic_id = cursor.lastrowid
+                return topic_id
+            
+            topic_id = self.execute_write(work)
+            
+            self.topic_pool.invalidate()
+            return topic_id
+        except Exception as e:
+            print(f"Error creating topic: {e}")
+            return None
     
     def create_debate(self, user1_id, user2_id, topic):
         """Create a new debate and return the debate ID"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         try:
+            def work(cursor):
+                if self.use_postgres:
+                    cursor.execute('''
+                        INSERT INTO debates (user1_id, user2_id, topic, log, timestamp)
+                        VALUES (%s, %s, %s, %s, %s) RETURNING id
+                    ''', (user1_id, user2_id, topic, '', datetime.now()))
+                    debate_id = cursor.fetchone()[0]
+                else:
+                    cursor.execute('''
+                        INSERT INTO debates (user1_id, user2_id, topic, log, timestamp)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', (user1_id, user2_id, topic, '', datetime.now().isoformat()))
+                    debate_id = cursor.lastrowid
+                return debate_id
+            
+            return self.execute_write(work)
+        except Exception as e:
+            print(f"Error creating debate: {e}")
+            return None
+    
+    def create_match(self, user1_id, user2_id):
+        """Create the debate for a matched pair in one transaction.
+        
+        Returns {'debate_id', 'topic', 'users': {id: profile}} or None if either
+        user no longer exists or the insert failed.
+        """
+        topic = self.get_random_topic((user1_id, user2_id))
+        generation = self.user_cache.generation
+        
+        def work(cursor):
             if self.use_postgres:
+                # Insert and read both profiles back in a single statement
                 cursor.execute('''
-                    INSERT INTO debates (user1_id, user2_id, topic, log, timestamp)
-                    VALUES (%s, %s, %s, %s, %s) RETURNING id
-                ''', (user1_id, user2_id, topic, '', datetime.now()))
-                debate_id = cursor.fetchone()[0]
+                    WITH debate AS (
+                        INSERT INTO debates (user1_id, user2_id, topic, log, timestamp)
+                        SELECT %s, %s, %s, %s, %s
+                        WHERE (SELECT COUNT(*) FROM users WHERE id IN (%s, %s)) = 2
+                        RETURNING id
+                    )
+                    SELECT users.id, users.username, users.mmr, users.user_class, debate.id AS debate_id
+                    FROM users, debate WHERE users.id IN (%s, %s)
+                ''', (user1_id, user2_id, topic, '', datetime.now(), user1_id, user2_id, user1_id, user2_id))
+                rows = [(row['id'], row['username'], row['mmr'], row['user_class'], row['debate_id'])
+                        for row in cursor.fetchall()]
             else:
+                cursor.execute("SELECT id, username, mmr, user_class FROM users WHERE id IN (?, ?)",
+                               (user1_id, user2_id))
+                rows = cursor.fetchall()
+                if len(rows) != 2:
+                    return None
                 cursor.execute('''
                     INSERT INTO debates (user1_id, user2_id, topic, log, timestamp)
                     VALUES (?, ?, ?, ?, ?)
                 ''', (user1_id, user2_id, topic, '', datetime.now().isoformat()))
-                debate_id = cursor.lastrowid
+                rows = [tuple(row) + (cursor.lastrowid,) for row in rows]
             
-            conn.commit()
-            conn.close()
-            return debate_id
+            if len(rows) != 2:
+                return None
+            users = {row[0]: {'id': row[0], 'username': row[1], 'mmr': row[2], 'user_class': row[3]}
+                     for row in rows}
+            return {'debate_id': rows[0][4], 'topic': topic, 'users': users}
+        
+        try:
+            match = self.execute_write(work)
         except Exception as e:
-            try:
-                conn.close()
-            except:
-                pass
-            print(f"Error creating debate: {e}")
+            print(f"Error creating match: {e}")
             return None
+        
+        if match:
+            for user_id, user in match['users'].items():
+                self.user_cache.put(user_id, user, generation)
+        return match
     
-    def save_debate(self, user1_id, user2_id, topic, log, winner=None):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def append_debate_message(self, debate_id, message):
+        """Append a single turn to a debate's message log"""
+        def work(cursor):
+            params = (debate_id, message['sender_id'], message.get('sender_username'),
+                      message['content'], message.get('turn_number'), message['timestamp'])
+            
+            if self.use_postgres:
+                cursor.execute('''
+                    INSERT INTO debate_messages (debate_id, sender_id, sender_username, content, turn_number, timestamp)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                ''', params)
+            else:
+                cursor.execute('''
+                    INSERT INTO debate_messages (debate_id, sender_id, sender_username, content, turn_number, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', params)
         
+        self.execute_write(work)
+    
+    def message_from_row(self, row):
         if self.use_postgres:
+            row = (row['sender_id'], row['sender_username'], row['content'], row['turn_number'], row['timestamp'])
+        return {
+            'type': 'message',
+            'sender_id': row[0],
+            'sender_username': row[1],
+            'content': row[2],
+            'timestamp': row[4],
+            'turn_number': row[3]
+        }
+    
+    def get_debate_messages(self, debate_id):
+        """Get the ordered list of messages for a debate"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            if self.use_postgres:
+                cursor.execute('''
+                    SELECT sender_id, sender_username, content, turn_number, timestamp
+                    FROM debate_messages WHERE debate_id = %s ORDER BY id
+                ''', (debate_id,))
+            else:
+                cursor.execute('''
+                    SELECT sender_id, sender_username, content, turn_number, timestamp
+                    FROM debate_messages WHERE debate_id = ? ORDER BY id
+                ''', (debate_id,))
+            
+            results = cursor.fetchall()
+        
+        return [self.message_from_row(row) for row in results]
+    
+    def get_debate_log(self, debate_id):
+        """Get a debate's log as JSON text, assembled from its appended messages"""
+        messages = self.get_debate_messages(debate_id)
+        if messages:
+            return json.dumps(messages)
+        
+        # Finished debates are archived compressed; older ones keep their log inline
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            if self.use_postgres:
+                cursor.execute("SELECT log, log_archive FROM debates WHERE id = %s", (debate_id,))
+                result = cursor.fetchone()
+                if result:
+                    result = (result['log'], result['log_archive'])
+            else:
+                cursor.execute("SELECT log, log_archive FROM debates WHERE id = ?", (debate_id,))
+                result = cursor.fetchone()
+        
+        if not result:
+            return None
+        return decode_log(result[1]) if result[1] is not None else result[0]
+    
+    def assemble_debate_logs(self, cursor, debate_ids=None):
+        """Build {debate_id: log JSON} for debates with appended messages or an archived log"""
+        if debate_ids is None:
             cursor.execute('''
-                INSERT INTO debates (user1_id, user2_id, topic, log, winner, timestamp)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            ''', (user1_id, user2_id, topic, log, winner, datetime.now()))
+                SELECT debate_id, sender_id, sender_username, content, turn_number, timestamp
+                FROM debate_messages ORDER BY debate_id, id
+            ''')
+            messages = cursor.fetchall()
+            cursor.execute('SELECT id, log_archive FROM debates WHERE log_archive IS NOT NULL')
+            archives = cursor.fetchall()
         else:
-            cursor.execute('''
-                INSERT INTO debates (user1_id, user2_id, topic, log, winner, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (user1_id, user2_id, topic, log, winner, datetime.now().isoformat()))
+            if not debate_ids:
+                return {}
+            placeholders = ', '.join(['%s' if self.use_postgres else '?'] * len(debate_ids))
+            cursor.execute(f'''
+                SELECT debate_id, sender_id, sender_username, content, turn_number, timestamp
+                FROM debate_messages WHERE debate_id IN ({placeholders}) ORDER BY debate_id, id
+            ''', list(debate_ids))
+            messages = cursor.fetchall()
+            cursor.execute(f'''
+                SELECT id, log_archive FROM debates
+                WHERE log_archive IS NOT NULL AND id IN ({placeholders})
+            ''', list(debate_ids))
+            archives = cursor.fetchall()
+        
+        grouped = {}
+        for row in messages:
+            if self.use_postgres:
+                debate_id = row['debate_id']
+            else:
+                debate_id, row = row[0], row[1:]
+            grouped.setdefault(debate_id, []).append(self.message_from_row(row))
         
-        conn.commit()
-        conn.close()
+        logs = {debate_id: json.dumps(messages) for debate_id, messages in grouped.items()}
+        for row in archives:
+            if self.use_postgres:
+                row = (row['id'], row['log_archive'])
+            logs.setdefault(row[0], decode_log(row[1]))
+        return logs
     
-    def get_user_debates(self, user_id, limit=10):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def archive_logs(self, cursor, debate_ids):
+        """Compress the logs of finished debates into log_archive and drop their message rows"""
+        ph = '%s' if self.use_postgres else '?'
+        placeholders = ', '.join([ph] * len(debate_ids))
+        logs = self.assemble_debate_logs(cursor, debate_ids)
         
-        if self.use_postgres:
+        # Debates recorded before per-message storage keep their log inline
+        missing = [debate_id for debate_id in debate_ids if debate_id not in logs]
+        if missing:
+            cursor.execute(f"SELECT id, log FROM debates WHERE id IN ({', '.join([ph] * len(missing))})", missing)
+            for row in cursor.fetchall():
+                if self.use_postgres:
+                    row = (row['id'], row['log'])
+                if row[1]:
+                    logs[row[0]] = row[1]
+        
+        for debate_id, log in logs.items():
+            cursor.execute(f"UPDATE debates SET log = {ph}, log_archive = {ph} WHERE id = {ph}",
+                           ('', encode_log(log), debate_id))
+        cursor.execute(f"DELETE FROM debate_messages WHERE debate_id IN ({placeholders})", list(debate_ids))
+        return len(logs)
+    
+    def archive_debate_log(self, debate_id):
+        """Compress a debate's log once it has ended"""
+        try:
+            return self.execute_write(lambda cursor: self.archive_logs(cursor, [debate_id])) > 0
+        except Exception as e:
+            print(f"Error archiving debate log: {e}")
+            return False
+    
+    def recompress_debate_logs(self, batch_size=500):
+        """Archive every finished debate still stored as plain text, one batch per transaction"""
+        ph = '%s' if self.use_postgres else '?'
+        
+        def work(cursor, after_id):
+            # Only debates that have ended; live ones are still appending messages
+            cursor.execute(f'''
+                SELECT d.id FROM debates d
+                WHERE d.id > {ph} AND d.log_archive IS NULL AND d.ended_at IS NOT NULL
+                  AND (d.log != '' OR EXISTS (SELECT 1 FROM debate_messages m WHERE m.debate_id = d.id))
+                ORDER BY d.id LIMIT {ph}
+            ''', (after_id, batch_size))
+            debate_ids = [row['id'] if self.use_postgres else row[0] for row in cursor.fetchall()]
+            if not debate_ids:
+                return None, 0
+            return debate_ids[-1], self.archive_logs(cursor, debate_ids)
+        
+        archived = 0
+        after_id = 0
+        while True:
+            after_id, count = self.execute_write(lambda cursor: work(cursor, after_id))
+            if after_id is None:
+                return archived
+            archived += count
+    
+    def get_log_storage_stats(self):
+        """Count debates by how their log is stored and the bytes each form takes"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT COUNT(*) AS debates, COUNT(log_archive) AS archived,
+                       COALESCE(SUM(LENGTH(log)), 0) AS inline_bytes,
+                       COALESCE(SUM(LENGTH(log_archive)), 0) AS archive_bytes
+                FROM debates
+            ''')
+            debates = cursor.fetchone()
             cursor.execute('''
-                SELECT d.topic, d.winner, d.timestamp, u1.username as user1, u2.username as user2
-                FROM debates d
-                JOIN users u1 ON d.user1_id = u1.id
-                JOIN users u2 ON d.user2_id = u2.id
-                WHERE d.user1_id = %s OR d.user2_id = %s
-                ORDER BY d.timestamp DESC
-                LIMIT %s
-            ''', (user_id, user_id, limit))
+                SELECT COUNT(*) AS messages, COALESCE(SUM(LENGTH(content)), 0) AS message_bytes
+                FROM debate_messages
+            ''')
+            messages = cursor.fetchone()
+        
+        if self.use_postgres:
+            stats = dict(debates)
+            stats.update(messages)
         else:
+            stats = dict(zip(['debates', 'archived', 'inline_bytes', 'archive_bytes'], debates))
+            stats.update(zip(['messages', 'message_bytes'], messages))
+            if self.db_path != ':memory:':
+                stats['file_bytes'] = os.path.getsize(self.db_path)
+        return stats
+    
+    def vacuum(self):
+        """Give pages freed by archiving back to the filesystem (SQLite only)"""
+        if self.use_postgres:
+            return
+        with self.connection() as conn:
+            conn.execute('VACUUM')
+            # In WAL mode the rewritten pages land in the log until a checkpoint
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    
+    def save_session_state(self, debate_id, state):
+        """Upsert the checkpoint of a live debate session"""
+        def work(cursor):
+            params = (debate_id, json.dumps(state, separators=(',', ':')), datetime.now().isoformat())
+            if self.use_postgres:
+                cursor.execute('''
+                    INSERT INTO debate_sessions (debate_id, state, updated_at) VALUES (%s, %s, %s)
+                    ON CONFLICT (debate_id) DO UPDATE SET state = EXCLUDED.state, updated_at = EXCLUDED.updated_at
+                ''', params)
+            else:
+                cursor.execute('''
+                    INSERT INTO debate_sessions (debate_id, state, updated_at) VALUES (?, ?, ?)
+                    ON CONFLICT (debate_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at
+                ''', params)
+        
+        self.execute_write(work)
+    
+    def mark_debate_ended(self, debate_id):
+        """Record that a debate has ended and drop its checkpoint, in one transaction"""
+        def work(cursor):
+            if self.use_postgres:
+                cursor.execute("UPDATE debates SET ended_at = %s WHERE id = %s", (datetime.now().isoformat(), debate_id))
+                cursor.execute("DELETE FROM debate_sessions WHERE debate_id = %s", (debate_id,))
+            else:
+                cursor.execute("UPDATE debates SET ended_at = ? WHERE id = ?", (datetime.now().isoformat(), debate_id))
+                cursor.execute("DELETE FROM debate_sessions WHERE debate_id = ?", (debate_id,))
+        
+        self.execute_write(work)
+    
+    def load_session_states(self):
+        """Return [(debate_id, state, messages)] for every checkpointed session, in two queries"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT debate_id, state FROM debate_sessions ORDER BY debate_id")
+            sessions = cursor.fetchall()
+            
             cursor.execute('''
-                SELECT d.topic, d.winner, d.timestamp, u1.username as user1, u2.username as user2
-                FROM debates d
-                JOIN users u1 ON d.user1_id = u1.id
-                JOIN users u2 ON d.user2_id = u2.id
-                WHERE d.user1_id = ? OR d.user2_id = ?
-                ORDER BY d.timestamp DESC
-                LIMIT ?
-            ''', (user_id, user_id, limit))
-        
-        results = cursor.fetchall()
-        conn.close()
+                SELECT m.debate_id, m.sender_id, m.sender_username, m.content, m.turn_number, m.timestamp
+                FROM debate_messages m JOIN debate_sessions s ON s.debate_id = m.debate_id
+                ORDER BY m.debate_id, m.id
+            ''')
+            message_rows = cursor.fetchall()
+        
+        messages = {}
+        for row in message_rows:
+            if self.use_postgres:
+                debate_id = row['debate_id']
+            else:
+                debate_id, row = row[0], row[1:]
+            messages.setdefault(debate_id, []).append(self.message_from_row(row))
+        
+        if self.use_postgres:
+            sessions = [(row['debate_id'], row['state']) for row in sessions]
+        return [(debate_id, json.loads(state), messages.get(debate_id, [])) for debate_id, state in sessions]
+    
+    def save_debate(self, user1_id, user2_id, topic, log, winner=None):
+        def work(cursor):
+            if self.use_postgres:
+                cursor.execute('''
+                    INSERT INTO debates (user1_id, user2_id, topic, log, winner, timestamp, ended_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ''', (user1_id, user2_id, topic, log, winner, datetime.now(), datetime.now().isoformat()))
+            else:
+                cursor.execute('''
+                    INSERT INTO debates (user1_id, user2_id, topic, log, winner, timestamp, ended_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (user1_id, user2_id, topic, log, winner, datetime.now().isoformat(), datetime.now().isoformat()))
+        
+        self.execute_write(work)
+    
+    def get_user_debates(self, user_id, limit=10):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            if self.use_postgres:
+                cursor.execute('''
+                    SELECT d.topic, d.winner, d.timestamp, u1.username as user1, u2.username as user2
+                    FROM debates d
+                    JOIN users u1 ON d.user1_id = u1.id
+                    JOIN users u2 ON d.user2_id = u2.id
+                    WHERE d.user1_id = %s OR d.user2_id = %s
+                    ORDER BY d.timestamp DESC
+                    LIMIT %s
+                ''', (user_id, user_id, limit))
+            else:
+                cursor.execute('''
+                    SELECT d.topic, d.winner, d.timestamp, u1.username as user1, u2.username as user2
+                    FROM debates d
+                    JOIN users u1 ON d.user1_id = u1.id
+                    JOIN users u2 ON d.user2_id = u2.id
+                    WHERE d.user1_id = ? OR d.user2_id = ?
+                    ORDER BY d.timestamp DESC
+                    LIMIT ?
+                ''', (user_id, user_id, limit))
+            
+            results = cursor.fetchall()
         
         debates = []
         for row in results:
@@ -355,16 +748,21 @@ class Database:
     def get_debate_by_id(self, debate_id):
         """Get debate information by ID"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            if self.use_postgres:
-                cursor.execute("SELECT id, user1_id, user2_id, topic, winner, timestamp FROM debates WHERE id = %s", (debate_id,))
-            else:
-                cursor.execute("SELECT id, user1_id, user2_id, topic, winner, timestamp FROM debates WHERE id = ?", (debate_id,))
-            
-            result = cursor.fetchone()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                
+                if self.use_postgres:
+                    cursor.execute('''
+                        SELECT id, user1_id, user2_id, topic, winner, timestamp, ended_at
+                        FROM debates WHERE id = %s
+                    ''', (debate_id,))
+                else:
+                    cursor.execute('''
+                        SELECT id, user1_id, user2_id, topic, winner, timestamp, ended_at
+                        FROM debates WHERE id = ?
+                    ''', (debate_id,))
+                
+                result = cursor.fetchone()
             
             if result:
                 return {
@@ -373,29 +771,121 @@ class Database:
                     'user2_id': result[2],
                     'topic': result[3],
                     'winner': result[4],
-                    'timestamp': result[5]
+                    'timestamp': result[5],
+                    'finished': result[6] is not None
                 }
             return None
         except Exception as e:
-            try:
-                conn.close()
-            except:
-                pass
             print(f"Error getting debate by ID: {e}")
             return None
     
+    # Admin listings, one keyset page at a time
+    USER_COLUMNS = {
+        'id': 'id',
+        'username': 'username',
+        'mmr': 'mmr',
+        'user_class': 'user_class'
+    }
+    
+    DEBATE_COLUMNS = {
+        'id': 'd.id',
+        'user1_id': 'd.user1_id',
+        'user2_id': 'd.user2_id',
+        'user1_name': 'u1.username',
+        'user2_name': 'u2.username',
+        'topic': 'd.topic',
+        'log': 'd.log',
+        'winner': 'd.winner',
+        'winner_name': 'uw.username',
+        'timestamp': 'd.timestamp'
+    }
+    
+    TOPIC_COLUMNS = {
+        'id': 'id',
+        'topic_text': 'topic_text'
+    }
+    
+    def fetch_page(self, columns, from_clause, key_fields, descending, cursor_key, limit, fields):
+        """Run one keyset-paginated query; returns (rows, next_cursor)"""
+        if fields:
+            fields = [field for field in fields if field in columns]
+        if not fields:
+            fields = list(columns)
+        selected = list(dict.fromkeys(fields + list(key_fields)))
+        
+        ph = '%s' if self.use_postgres else '?'
+        select_list = ', '.join(f"{columns[field]} AS {field}" for field in selected)
+        key_columns = [columns[field] for field in key_fields]
+        direction = 'DESC' if descending else 'ASC'
+        
+        query = f"SELECT {select_list} FROM {from_clause}"
+        params = []
+        if cursor_key:
+            comparison = '<' if descending else '>'
+            if len(key_columns) == 1:
+                query += f" WHERE {key_columns[0]} {comparison} {ph}"
+            else:
+                query += f" WHERE ({', '.join(key_columns)}) {comparison} ({', '.join([ph] * len(key_columns))})"
+            params.extend(cursor_key)
+        query += f" ORDER BY {', '.join(f'{column} {direction}' for column in key_columns)} LIMIT {ph}"
+        # One extra row tells us whether another page follows
+        params.append(limit + 1)
+        
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            names = [description[0] for description in cursor.description]
+            results = cursor.fetchall()
+            
+            rows = [dict(row) if self.use_postgres else dict(zip(names, row)) for row in results[:limit]]
+            
+            if 'log' in fields:
+                logs = self.assemble_debate_logs(cursor, [row['id'] for row in rows])
+                for row in rows:
+                    row['log'] = logs.get(row['id'], row['log'])
+        
+        next_cursor = None
+        if len(results) > limit and rows:
+            last = rows[-1]
+            next_cursor = [value if isinstance(value, (int, str)) else str(value)
+                           for value in (last[field] for field in key_fields)]
+        
+        for row in rows:
+            for field in selected:
+                if field not in fields:
+                    del row[field]
+        
+        return rows, next_cursor
+    
+    def get_users_page(self, cursor=None, limit=100, fields=None):
+        """Get one page of users ordered by id"""
+        return self.fetch_page(self.USER_COLUMNS, 'users', ['id'], False, cursor, limit, fields)
+    
+    def get_debates_page(self, cursor=None, limit=100, fields=None):
+        """Get one page of debates, newest first; the log is only loaded if asked for"""
+        if not fields:
+            fields = [field for field in self.DEBATE_COLUMNS if field != 'log']
+        from_clause = '''debates d
+                    LEFT JOIN users u1 ON d.user1_id = u1.id
+                    LEFT JOIN users u2 ON d.user2_id = u2.id
+                    LEFT JOIN users uw ON d.winner = uw.id'''
+        return self.fetch_page(self.DEBATE_COLUMNS, from_clause, ['timestamp', 'id'], True, cursor, limit, fields)
+    
+    def get_topics_page(self, cursor=None, limit=100, fields=None):
+        """Get one page of topics ordered by id"""
+        return self.fetch_page(self.TOPIC_COLUMNS, 'topics', ['id'], False, cursor, limit, fields)
+    
     # Admin methods
     def get_all_users(self):
         """Get all users for admin panel"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT id, username, mmr, user_class FROM users ORDER BY id')
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT id, username, mmr, user_class FROM users ORDER BY id')
+                results = cursor.fetchall()
             
+            users = []
             if self.use_postgres:
-                results = cursor.fetchall()
-                users = []
                 for result in results:
                     users.append({
                         'id': result['id'],
@@ -403,10 +893,7 @@ class Database:
                         'mmr': result['mmr'],
                         'user_class': result['user_class']
                     })
-                return users
             else:
-                results = cursor.fetchall()
-                users = []
                 for result in results:
                     users.append({
                         'id': result[0],
@@ -414,27 +901,16 @@ class Database:
                         'mmr': result[2],
                         'user_class': result[3]
                     })
-                return users
+            return users
         except Exception as e:
-            try:
-                conn.close()
-            except:
-                pass
             print(f"Error getting all users: {e}")
             return []
-        finally:
-            try:
-                conn.close()
-            except:
-                pass
     
     def get_all_debates(self):
         """Get all debates with user names for admin panel"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            if self.use_postgres:
+            with self.connection() as conn:
+                cursor = conn.cursor()
                 cursor.execute('''
                     SELECT d.id, d.user1_id, d.user2_id, d.topic, d.log, d.winner, d.timestamp,
                            u1.username as user1_name, u2.username as user2_name, uw.username as winner_name
@@ -444,9 +920,11 @@ class Database:
                     LEFT JOIN users uw ON d.winner = uw.id
                     ORDER BY d.timestamp DESC
                 ''')
-                
                 results = cursor.fetchall()
-                debates = []
+                logs = self.assemble_debate_logs(cursor)
+            
+            debates = []
+            if self.use_postgres:
                 for result in results:
                     debates.append({
                         'id': result['id'],
@@ -455,25 +933,12 @@ class Database:
                         'user1_name': result['user1_name'],
                         'user2_name': result['user2_name'],
                         'topic': result['topic'],
-                        'log': result['log'],
+                        'log': logs.get(result['id'], result['log']),
                         'winner': result['winner'],
                         'winner_name': result['winner_name'],
                         'timestamp': result['timestamp']
                     })
-                return debates
             else:
-                cursor.execute('''
-                    SELECT d.id, d.user1_id, d.user2_id, d.topic, d.log, d.winner, d.timestamp,
-                           u1.username as user1_name, u2.username as user2_name, uw.username as winner_name
-                    FROM debates d
-                    LEFT JOIN users u1 ON d.user1_id = u1.id
-                    LEFT JOIN users u2 ON d.user2_id = u2.id
-                    LEFT JOIN users uw ON d.winner = uw.id
-                    ORDER BY d.timestamp DESC
-                ''')
-                
-                results = cursor.fetchall()
-                debates = []
                 for result in results:
                     debates.append({
                         'id': result[0],
@@ -482,106 +947,72 @@ class Database:
                         'user1_name': result[7],
                         'user2_name': result[8],
                         'topic': result[3],
-                        'log': result[4],
+                        'log': logs.get(result[0], result[4]),
                         'winner': result[5],
                         'winner_name': result[9],
                         'timestamp': result[6]
                     })
-                return debates
+            return debates
         except Exception as e:
-            try:
-                conn.close()
-            except:
-                pass
             print(f"Error getting all debates: {e}")
             return []
-        finally:
-            try:
-                conn.close()
-            except:
-                pass
     
     def get_all_topics(self):
         """Get all topics for admin panel"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT id, topic_text FROM topics ORDER BY id')
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT id, topic_text FROM topics ORDER BY id')
+                results = cursor.fetchall()
             
+            topics = []
             if self.use_postgres:
-                results = cursor.fetchall()
-                topics = []
                 for result in results:
                     topics.append({
                         'id': result['id'],
                         'topic_text': result['topic_text']
                     })
-                return topics
             else:
-                results = cursor.fetchall()
-                topics = []
                 for result in results:
                     topics.append({
                         'id': result[0],
                         'topic_text': result[1]
                     })
-                return topics
+            return topics
         except Exception as e:
-            try:
-                conn.close()
-            except:
-                pass
             print(f"Error getting all topics: {e}")
             return []
-        finally:
-            try:
-                conn.close()
-            except:
-                pass
     
     def get_topic_by_id(self, topic_id):
         """Get topic by ID for admin panel"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            if self.use_postgres:
-                cursor.execute('SELECT id, topic_text FROM topics WHERE id = %s', (topic_id,))
-                result = cursor.fetchone()
-                if result:
-                    return {
-                        'id': result['id'],
-                        'topic_text': result['topic_text']
-                    }
-            else:
-                cursor.execute('SELECT id, topic_text FROM topics WHERE id = ?', (topic_id,))
-                result = cursor.fetchone()
-                if result:
-                    return {
-                        'id': result[0],
-                        'topic_text': result[1]
-                    }
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                
+                if self.use_postgres:
+                    cursor.execute('SELECT id, topic_text FROM topics WHERE id = %s', (topic_id,))
+                    result = cursor.fetchone()
+                    if result:
+                        return {
+                            'id': result['id'],
+                            'topic_text': result['topic_text']
+                        }
+                else:
+                    cursor.execute('SELECT id, topic_text FROM topics WHERE id = ?', (topic_id,))
+                    result = cursor.fetchone()
+                    if result:
+                        return {
+                            'id': result[0],
+                            'topic_text': result[1]
+                        }
             return None
         except Exception as e:
-            try:
-                conn.close()
-            except:
-                pass
             print(f"Error getting topic by ID: {e}")
             return None
-        finally:
-            try:
-                conn.close()
-            except:
-                pass
     
     def update_user_admin(self, user_id, username=None, mmr=None, user_class=None):
         """Update user for admin panel"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
             updates = []
             params = []
             
@@ -601,122 +1032,88 @@ class Database:
             params.append(user_id)
             query = f"UPDATE users SET {', '.join(updates)} WHERE id = %s" if self.use_postgres else f"UPDATE users SET {', '.join(updates)} WHERE id = ?"
             
-            cursor.execute(query, params)
-            conn.commit()
-            return cursor.rowcount > 0
+            def work(cursor):
+                cursor.execute(query, params)
+                return cursor.rowcount > 0
+            
+            updated = self.execute_write(work)
+            
+            self.user_cache.invalidate(user_id)
+            return updated
         except Exception as e:
-            try:
-                conn.close()
-            except:
-                pass
             print(f"Error updating user: {e}")
             return False
-        finally:
-            try:
-                conn.close()
-            except:
-                pass
     
     def update_topic(self, topic_id, topic_text):
         """Update topic for admin panel"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            def work(cursor):
+                if self.use_postgres:
+                    cursor.execute('UPDATE topics SET topic_text = %s WHERE id = %s', (topic_text, topic_id))
+                else:
+                    cursor.execute('UPDATE topics SET topic_text = ? WHERE id = ?', (topic_text, topic_id))
+                return cursor.rowcount > 0
             
-            if self.use_postgres:
-                cursor.execute('UPDATE topics SET topic_text = %s WHERE id = %s', (topic_text, topic_id))
-            else:
-                cursor.execute('UPDATE topics SET topic_text = ? WHERE id = ?', (topic_text, topic_id))
+            updated = self.execute_write(work)
             
-            conn.commit()
-            return cursor.rowcount > 0
+            self.topic_pool.invalidate()
+            return updated
         except Exception as e:
-            try:
-                conn.close()
-            except:
-                pass
             print(f"Error updating topic: {e}")
             return False
-        finally:
-            try:
-                conn.close()
-            except:
-                pass
     
     def delete_user(self, user_id):
         """Delete user for admin panel"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            def work(cursor):
+                if self.use_postgres:
+                    cursor.execute('DELETE FROM users WHERE id = %s', (user_id,))
+                else:
+                    cursor.execute('DELETE FROM users WHERE id = ?', (user_id,))
+                return cursor.rowcount > 0
             
-            if self.use_postgres:
-                cursor.execute('DELETE FROM users WHERE id = %s', (user_id,))
-            else:
-                cursor.execute('DELETE FROM users WHERE id = ?', (user_id,))
+            deleted = self.execute_write(work)
             
-            conn.commit()
-            return cursor.rowcount > 0
+            self.user_cache.invalidate(user_id)
+            self.topic_pool.forget_user(user_id)
+            return deleted
         except Exception as e:
-            try:
-                conn.close()
-            except:
-                pass
             print(f"Error deleting user: {e}")
             return False
-        finally:
-            try:
-                conn.close()
-            except:
-                pass
     
     def delete_debate(self, debate_id):
         """Delete debate for admin panel"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            def work(cursor):
+                if self.use_postgres:
+                    cursor.execute('DELETE FROM debate_messages WHERE debate_id = %s', (debate_id,))
+                    cursor.execute('DELETE FROM debate_sessions WHERE debate_id = %s', (debate_id,))
+                    cursor.execute('DELETE FROM debates WHERE id = %s', (debate_id,))
+                else:
+                    cursor.execute('DELETE FROM debate_messages WHERE debate_id = ?', (debate_id,))
+                    cursor.execute('DELETE FROM debate_sessions WHERE debate_id = ?', (debate_id,))
+                    cursor.execute('DELETE FROM debates WHERE id = ?', (debate_id,))
+                return cursor.rowcount > 0
             
-            if self.use_postgres:
-                cursor.execute('DELETE FROM debates WHERE id = %s', (debate_id,))
-            else:
-                cursor.execute('DELETE FROM debates WHERE id = ?', (debate_id,))
-            
-            conn.commit()
-            return cursor.rowcount > 0
+            return self.execute_write(work)
         except Exception as e:
-            try:
-                conn.close()
-            except:
-                pass
             print(f"Error deleting debate: {e}")
             return False
-        finally:
-            try:
-                conn.close()
-            except:
-                pass
     
     def delete_topic(self, topic_id):
         """Delete topic for admin panel"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            def work(cursor):
+                if self.use_postgres:
+                    cursor.execute('DELETE FROM topics WHERE id = %s', (topic_id,))
+                else:
+                    cursor.execute('DELETE FROM topics WHERE id = ?', (topic_id,))
+                return cursor.rowcount > 0
             
-            if self.use_postgres:
-                cursor.execute('DELETE FROM topics WHERE id = %s', (topic_id,))
-            else:
-                cursor.execute('DELETE FROM topics WHERE id = ?', (topic_id,))
+            deleted = self.execute_write(work)
             
-            conn.commit()
-            return cursor.rowcount > 0
+            self.topic_pool.invalidate()
+            return deleted
         except Exception as e:
-            try:
-                conn.close()
-            except:
-                pass
             print(f"Error deleting topic: {e}")
             return False
-        finally:
-            try:
-                conn.close()
-            except:
-                pass
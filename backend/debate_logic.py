@@ -1,10 +1,52 @@
 import asyncio
 import json
+import math
+import os
+import time
+import sys
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 
+from spectators import Audience
+from timer_wheel import TimerWheel
+
+class DebateMessage:
+    """One submitted turn, kept in a session without a per-message dict"""
+    
+    __slots__ = ('sender_id', 'sender_username', 'content', 'timestamp', 'turn_number')
+    
+    def __init__(self, sender_id, sender_username, content, timestamp, turn_number):
+        self.sender_id = sender_id
+        self.sender_username = sender_username
+        self.content = content
+        self.timestamp = timestamp
+        self.turn_number = turn_number
+    
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data['sender_id'], data.get('sender_username'), data['content'],
+                   data['timestamp'], data.get('turn_number'))
+    
+    def to_dict(self) -> dict:
+        return {
+            'type': 'message',
+            'sender_id': self.sender_id,
+            'sender_username': self.sender_username,
+            'content': self.content,
+            'timestamp': self.timestamp,
+            'turn_number': self.turn_number
+        }
+
 class DebateSession:
-    def __init__(self, debate_id, user1_id, user2_id, topic, websocket_manager, database):
+    __slots__ = (
+        'debate_id', 'user1_id', 'user2_id', 'topic', 'websocket_manager', 'database',
+        'user1_side', 'user2_side', 'phase', 'current_turn', 'turn_count', 'max_turns',
+        'prep_time_minutes', 'turn_time_minutes', 'prep_start_time', 'turn_start_time',
+        'messages', 'winner_id', 'rating_changes', 'timers', 'phase_deadline', 'phase_duration',
+        'timer_handle', 'timer_mode', 'timer_resync_seconds', 'audience', 'on_ended'
+    )
+    
+    def __init__(self, debate_id, user1_id, user2_id, topic, websocket_manager, database, timers=None):
         self.debate_id = debate_id
         self.user1_id = user1_id
         self.user2_id = user2_id
@@ -29,11 +71,27 @@ class DebateSession:
         self.turn_start_time = None
         
         # Debate log
-        self.messages = []
-        
-        # Timers
-        self.prep_timer_task = None
-        self.turn_timer_task = None
+        self.messages: List[DebateMessage] = []
+        
+        # Result
+        self.winner_id = None
+        self.rating_changes = None
+        
+        # Timers: one pending countdown tick at a time on the shared wheel
+        self.timers = timers if timers is not None else TimerWheel()
+        self.phase_deadline = None  # timers clock value when the current phase or turn expires
+        self.phase_duration = None
+        self.timer_handle = None
+        # 'deadline' sends one frame per phase with its absolute end time and clients count down
+        # locally; 'ticks' sends a frame every second
+        self.timer_mode = os.getenv('DEBATE_TIMER_MODE', 'deadline')
+        self.timer_resync_seconds = int(os.getenv('DEBATE_TIMER_RESYNC_SECONDS', '0'))  # 0: no periodic resync
+        
+        # Spectators receive every event sent to both debaters
+        self.audience = Audience()
+        
+        # Called with the session once it has ended and everything is persisted
+        self.on_ended = None
     
     async def start_debate(self):
         """Start the debate session"""
@@ -73,32 +131,137 @@ class DebateSession:
         })
         
         # Start countdown
-        self.prep_timer_task = asyncio.create_task(
-            self.preparation_countdown()
-        )
-    
-    async def preparation_countdown(self):
-        """Handle preparation phase countdown"""
         prep_duration = int(self.prep_time_minutes * 60)  # Convert to seconds and ensure integer
+        self.phase_duration = prep_duration
+        self.phase_deadline = self.timers.clock() + prep_duration
+        await self.checkpoint()
+        await self.preparation_tick(prep_duration)
+    
+    def schedule_tick(self, callback, remaining: int, *args):
+        """Arm the tick after the one for `remaining`: the next second, or in deadline mode the next resync or the expiry"""
+        if self.timer_mode == 'ticks':
+            remaining -= 1
+        elif self.timer_resync_seconds > 0:
+            remaining = max(remaining - self.timer_resync_seconds, 0)
+        else:
+            remaining = 0
+        self.timer_handle = self.timers.call_at(self.phase_deadline - remaining, callback, remaining, *args)
+    
+    def timer_fields(self, remaining: int) -> dict:
+        """Countdown fields shared by prep_timer and turn_timer frames"""
+        now = time.time()
+        minutes = remaining // 60
+        seconds = remaining % 60
+        return {
+            'remaining_seconds': remaining,
+            'display': f"{minutes:02d}:{seconds:02d}",
+            'duration_seconds': self.phase_duration,
+            # Wall-clock milliseconds; clients derive their offset from server_time
+            'deadline': round((now + self.phase_deadline - self.timers.clock()) * 1000),
+            'server_time': round(now * 1000),
+            'mode': self.timer_mode
+        }
+    
+    def should_send_tick(self, remaining: int) -> bool:
+        # In deadline mode clients reach zero on their own and the next phase frame follows
+        return self.timer_mode == 'ticks' or remaining > 0
+    
+    def get_timer_frame(self) -> Optional[dict]:
+        """Current countdown frame, for clients that ask to resync"""
+        if self.phase_deadline is None or self.phase == 'ended':
+            return None
+        remaining = max(math.ceil(self.phase_deadline - self.timers.clock()), 0)
+        if self.phase == 'preparation':
+            return {'type': 'prep_timer', **self.timer_fields(remaining)}
+        return self.turn_timer_frame(remaining)
+    
+    def turn_timer_frame(self, remaining: int) -> dict:
+        current_user_side = self.user1_side if self.current_turn == self.user1_id else self.user2_side
+        return {
+            'type': 'turn_timer',
+            **self.timer_fields(remaining),
+            'current_turn_user': self.current_turn,
+            'current_turn_side': current_user_side
+        }
+    
+    def turn_frame(self, user_id: int) -> dict:
+        """your_turn or opponent_turn frame for one debater"""
+        current_user_side = self.user1_side if self.current_turn == self.user1_id else self.user2_side
+        if user_id == self.current_turn:
+            return {
+                'type': 'your_turn',
+                'turn_number': (self.turn_count // 2) + 1,
+                'time_limit_minutes': self.turn_time_minutes,
+                'your_side': current_user_side
+            }
+        return {
+            'type': 'opponent_turn',
+            'turn_number': (self.turn_count // 2) + 1,
+            'time_limit_minutes': self.turn_time_minutes,
+            'opponent_side': current_user_side,
+            'your_side': self.user2_side if user_id == self.user2_id else self.user1_side
+        }
+    
+    def get_rejoin_frames(self, user_id: int, include_log=False) -> List[dict]:
+        """Frames that bring a debater's page up to date: the current turn and countdown, optionally the log"""
+        frames = []
+        if include_log:
+            your_side, opponent_side = ((self.user1_side, self.user2_side) if user_id == self.user1_id
+                                        else (self.user2_side, self.user1_side))
+            frames.append({
+                'type': 'debate_started',
+                'debate_id': self.debate_id,
+                'topic': self.topic,
+                'prep_time_minutes': self.prep_time_minutes,
+                'your_side': your_side,
+                'opponent_side': opponent_side
+            })
+            if self.phase == 'debate':
+                frames.append({
+                    'type': 'debate_phase_start',
+                    'message': 'Preparation time is over. The debate begins!'
+                })
+            frames.extend(self.get_message_dicts())
+        
+        if self.phase == 'debate' and self.current_turn is not None:
+            frames.append(self.turn_frame(user_id))
+        timer = self.get_timer_frame()
+        if timer:
+            if timer['type'] == 'prep_timer':
+                # prep_timer_start also sets the phase labels
+                timer = {**timer, 'type': 'prep_timer_start'}
+            frames.append(timer)
+        return frames
+    
+    async def send_rejoin_state(self, user_id: int, include_log=False):
+        for frame in self.get_rejoin_frames(user_id, include_log):
+            await self.websocket_manager.send_to_user(user_id, frame)
+    
+    def cancel_timer(self):
+        if self.timer_handle:
+            self.timer_handle.cancel()
+            self.timer_handle = None
+    
+    async def preparation_tick(self, remaining: int):
+        """Send one preparation countdown frame and arm the next"""
+        if self.phase != 'preparation':
+            return
         
-        for remaining in range(prep_duration, -1, -1):
-            if self.phase != 'preparation':
-                return
-            
-            minutes = remaining // 60
-            seconds = remaining % 60
-            
+        if self.should_send_tick(remaining):
             await self.send_to_both_users({
                 'type': 'prep_timer',
-                'remaining_seconds': remaining,
-                'display': f"{minutes:02d}:{seconds:02d}"
+                **self.timer_fields(remaining)
             })
-            
-            if remaining == 0:
-                await self.start_debate_phase()
-                return
-            
-            await asyncio.sleep(1)
+        if self.phase != 'preparation':
+            # Ended while the frame was being sent
+            return
+        
+        if remaining == 0:
+            self.timer_handle = None
+            await self.start_debate_phase()
+            return
+        
+        self.schedule_tick(self.preparation_tick, remaining)
     
     async def start_debate_phase(self):
         """Start the main debate phase"""
@@ -116,6 +279,7 @@ class DebateSession:
     async def start_turn(self):
         """Start a new turn"""
         if self.turn_count >= self.max_turns:
+            # Debates are not judged automatically; an admin records the winner later
             await self.end_debate()
             return
         
@@ -129,58 +293,35 @@ class DebateSession:
             self.current_turn = self.user2_id
             other_user = self.user1_id
         
-        # Get current user's side
-        current_user_side = self.user1_side if self.current_turn == self.user1_id else self.user2_side
-        other_user_side = self.user2_side if self.current_turn == self.user1_id else self.user1_side
-        
         # Notify users about the turn
-        await self.websocket_manager.send_to_user(self.current_turn, {
-            'type': 'your_turn',
-            'turn_number': (self.turn_count // 2) + 1,
-            'time_limit_minutes': self.turn_time_minutes,
-            'your_side': current_user_side
-        })
-        
-        await self.websocket_manager.send_to_user(other_user, {
-            'type': 'opponent_turn',
-            'turn_number': (self.turn_count // 2) + 1,
-            'time_limit_minutes': self.turn_time_minutes,
-            'opponent_side': current_user_side,
-            'your_side': other_user_side
-        })
+        await self.websocket_manager.send_to_user(self.current_turn, self.turn_frame(self.current_turn))
+        await self.websocket_manager.send_to_user(other_user, self.turn_frame(other_user))
         
         # Start turn timer
-        self.turn_timer_task = asyncio.create_task(
-            self.turn_countdown()
-        )
-    
-    async def turn_countdown(self):
-        """Handle turn countdown timer"""
         turn_duration = int(self.turn_time_minutes * 60)  # Convert to seconds and ensure integer
+        self.phase_duration = turn_duration
+        self.phase_deadline = self.timers.clock() + turn_duration
+        await self.checkpoint()
+        await self.turn_tick(turn_duration, self.turn_count)
+    
+    async def turn_tick(self, remaining: int, turn_count: int):
+        """Send one turn countdown frame and arm the next, or expire the turn"""
+        if self.phase != 'debate' or turn_count != self.turn_count:
+            return
         
-        for remaining in range(turn_duration, -1, -1):
-            if self.phase != 'debate':
-                return
-            
-            minutes = remaining // 60
-            seconds = remaining % 60
-            
-            current_user_side = self.user1_side if self.current_turn == self.user1_id else self.user2_side
-            
-            await self.send_to_both_users({
-                'type': 'turn_timer',
-                'remaining_seconds': remaining,
-                'display': f"{minutes:02d}:{seconds:02d}",
-                'current_turn_user': self.current_turn,
-                'current_turn_side': current_user_side
-            })
-            
-            if remaining == 0:
-                # Time's up, skip turn
-                await self.handle_message(self.current_turn, "[Time expired - no argument submitted]")
-                return
-            
-            await asyncio.sleep(1)
+        if self.should_send_tick(remaining):
+            await self.send_to_both_users(self.turn_timer_frame(remaining))
+        if self.phase != 'debate' or turn_count != self.turn_count:
+            # The turn moved on while the frame was being sent
+            return
+        
+        if remaining == 0:
+            # Time's up, skip turn
+            self.timer_handle = None
+            await self.handle_message(self.current_turn, "[Time expired - no argument submitted]")
+            return
+        
+        self.schedule_tick(self.turn_tick, remaining, turn_count)
     
     async def handle_message(self, user_id: int, content: str):
         """Handle a message from a user during their turn"""
@@ -199,11 +340,10 @@ class DebateSession:
             return
         
         # Cancel turn timer
-        if self.turn_timer_task:
-            self.turn_timer_task.cancel()
+        self.cancel_timer()
         
         # Add message to log
-        user_info = self.database.get_user_by_id(user_id)
+        user_info = await self.database.get_user_by_id(user_id)
         message_data = {
             'type': 'message',
             'sender_id': user_id,
@@ -213,50 +353,166 @@ class DebateSession:
             'turn_number': (self.turn_count // 2) + 1
         }
         
-        self.messages.append(message_data)
+        self.messages.append(DebateMessage.from_dict(message_data))
         
         # Send message to both users
         await self.send_to_both_users(message_data)
         
-        # Update database log
-        await self.update_debate_log()
+        # Append the turn to the stored debate log
+        await self.save_message(message_data)
         
         # Move to next turn
         self.turn_count += 1
         await self.start_turn()
     
-    async def end_debate(self):
-        """End the debate session"""
+    async def end_debate(self, winner_id: Optional[int] = None):
+        """End the debate session, rating both players if a winner is given.
+        
+        Debates that reach the turn limit end undecided; MMR only changes once
+        an admin sets the winner (DebateManager.record_debate_result), which
+        the database applies at most once per debate.
+        """
         self.phase = 'ended'
         
         # Cancel any running timers
-        if self.prep_timer_task:
-            self.prep_timer_task.cancel()
-        if self.turn_timer_task:
-            self.turn_timer_task.cancel()
+        self.cancel_timer()
+        
+        # Persist the end before anything else; until it is stored the session stays
+        # in memory so the debate cannot be started again
+        try:
+            await self.database.mark_debate_ended(self.debate_id)
+            persisted = True
+        except Exception as e:
+            print(f"Error recording end of debate {self.debate_id}: {e}")
+            persisted = False
+        
+        if winner_id is not None:
+            await self.record_result(winner_id)
         
         # Send end message to both users
         await self.send_to_both_users({
             'type': 'debate_ended',
             'message': 'Debate has ended',
-            'final_log': self.messages,
-            'topic': self.topic
+            'final_log': self.get_message_dicts(),
+            'topic': self.topic,
+            'winner_id': self.winner_id,
+            'rating_changes': self.rating_changes
         })
+        self.audience.finish()
+        
+        # Every turn is persisted by now; fold them into one compressed log
+        try:
+            await self.database.archive_debate_log(self.debate_id)
+        except Exception as e:
+            print(f"Error archiving debate log: {e}")
         
         print(f"Debate {self.debate_id} ended")
+        
+        if persisted and self.on_ended:
+            self.on_ended(self)
+    
+    async def record_result(self, winner_id: int) -> Optional[dict]:
+        """Store the winner and apply the MMR update for both players"""
+        try:
+            new_ratings = await self.database.record_debate_result(self.debate_id, winner_id)
+        except Exception as e:
+            print(f"Error recording debate result: {e}")
+            return None
+        
+        if new_ratings:
+            self.winner_id = winner_id
+            self.rating_changes = {str(user_id): mmr for user_id, mmr in new_ratings.items()}
+            print(f"Debate {self.debate_id} won by user {winner_id}, new ratings: {new_ratings}")
+        return new_ratings
     
     async def send_to_both_users(self, message: dict):
-        """Send a message to both users in the debate"""
-        await self.websocket_manager.send_to_user(self.user1_id, message)
-        await self.websocket_manager.send_to_user(self.user2_id, message)
+        """Send a message to both users in the debate and to its spectators, encoding it once"""
+        frame = json.dumps(message)
+        self.audience.publish(frame)
+        await asyncio.gather(
+            self.websocket_manager.send_encoded_to_user(self.user1_id, frame),
+            self.websocket_manager.send_encoded_to_user(self.user2_id, frame)
+        )
+    
+    def get_spectator_state(self) -> dict:
+        """Everything a new spectator needs to catch up"""
+        return {
+            'type': 'spectate_response',
+            'success': True,
+            'debate_id': self.debate_id,
+            'topic': self.topic,
+            'phase': self.phase,
+            'sides': {str(self.user1_id): self.user1_side, str(self.user2_id): self.user2_side},
+            'current_turn': self.current_turn,
+            'turn_count': self.turn_count,
+            'messages': self.get_message_dicts(),
+            'timer': self.get_timer_frame(),
+            'spectators': len(self.audience)
+        }
+    
+    async def save_message(self, message_data: dict):
+        """Append a single message to the debate log in the database"""
+        try:
+            await self.database.append_debate_message(self.debate_id, message_data)
+        except Exception as e:
+            print(f"Error saving debate message: {e}")
+    
+    def get_snapshot(self) -> dict:
+        """Compact state needed to resume this session; messages are stored separately"""
+        deadline = None
+        if self.phase_deadline is not None:
+            # Wall clock, since the timer clock does not survive a restart
+            deadline = round(time.time() + self.phase_deadline - self.timers.clock(), 3)
+        return {
+            'v': 1,
+            'user1_id': self.user1_id,
+            'user2_id': self.user2_id,
+            'topic': self.topic,
+            'phase': self.phase,
+            'current_turn': self.current_turn,
+            'turn_count': self.turn_count,
+            'phase_duration': self.phase_duration,
+            'deadline': deadline
+        }
     
-    async def update_debate_log(self):
-        """Update the debate log in the database"""
+    async def checkpoint(self):
+        """Persist the current snapshot so a restarted server can resume this debate"""
         try:
-            log_json = json.dumps(self.messages)
-            self.database.update_debate_log(self.debate_id, log_json)
+            await self.database.save_session_state(self.debate_id, self.get_snapshot())
         except Exception as e:
-            print(f"Error updating debate log: {e}")
+            print(f"Error checkpointing debate {self.debate_id}: {e}")
+    
+    @classmethod
+    def from_snapshot(cls, debate_id, snapshot: dict, messages: List[dict], websocket_manager, database, timers):
+        session = cls(debate_id, snapshot['user1_id'], snapshot['user2_id'], snapshot['topic'],
+                      websocket_manager, database, timers)
+        session.phase = snapshot['phase']
+        session.current_turn = snapshot['current_turn']
+        session.turn_count = snapshot['turn_count']
+        session.phase_duration = snapshot['phase_duration']
+        if snapshot['deadline'] is not None:
+            session.phase_deadline = timers.clock() + (snapshot['deadline'] - time.time())
+        session.messages = [DebateMessage.from_dict(message) for message in messages]
+        return session
+    
+    async def resume(self):
+        """Re-arm the timer for a restored session without resending the phase frames"""
+        if self.phase == 'debate' and len(self.messages) > self.turn_count:
+            # The last turn was stored but the crash came before the next turn was checkpointed
+            self.turn_count = len(self.messages)
+            await self.start_turn()
+            return
+        
+        if self.phase == 'preparation':
+            callback, args = self.preparation_tick, ()
+        else:
+            callback, args = self.turn_tick, (self.turn_count,)
+        
+        remaining = max(math.ceil(self.phase_deadline - self.timers.clock()), 0)
+        if remaining == 0:
+            await callback(0, *args)
+        else:
+            self.schedule_tick(callback, remaining, *args)
     
     def get_debate_info(self):
         """Get current debate information"""
@@ -268,8 +524,11 @@ class DebateSession:
             'phase': self.phase,
             'current_turn': self.current_turn,
             'turn_count': self.turn_count,
-            'messages': self.messages
+            'messages': self.get_message_dicts()
         }
+    
+    def get_message_dicts(self) -> List[dict]:
+        return [message.to_dict() for message in self.messages]
 
 class DebateManager:
     def __init__(self, websocket_manager, database):
@@ -277,6 +536,8 @@ class DebateManager:
         self.database = database
         self.active_debates: Dict[int, DebateSession] = {}  # debate_id -> DebateSession
         self.user_debates: Dict[int, int] = {}  # user_id -> debate_id
+        self.timers = TimerWheel()  # every session's phase and turn deadlines
+        self.spectating: Dict[object, int] = {}  # spectator websocket -> debate_id
     
     async def create_debate_session(self, debate_id: int, user1_id: int, user2_id: int, topic: str):
         """Create and start a new debate session"""
@@ -286,8 +547,9 @@ class DebateManager:
         
         session = DebateSession(
             debate_id, user1_id, user2_id, topic, 
-            self.websocket_manager, self.database
+            self.websocket_manager, self.database, self.timers
         )
+        session.on_ended = self.evict_session
         
         self.active_debates[debate_id] = session
         self.user_debates[user1_id] = debate_id
@@ -295,6 +557,38 @@ class DebateManager:
         
         await session.start_debate()
     
+    async def restore_sessions(self) -> int:
+        """Rehydrate every checkpointed, unfinished debate and re-arm its timers"""
+        start = time.perf_counter()
+        try:
+            records = await self.database.load_session_states()
+        except Exception as e:
+            print(f"Error loading debate session checkpoints: {e}")
+            return 0
+        loaded = time.perf_counter()
+        
+        restored = 0
+        for debate_id, snapshot, messages in records:
+            if debate_id in self.active_debates:
+                continue
+            try:
+                session = DebateSession.from_snapshot(
+                    debate_id, snapshot, messages,
+                    self.websocket_manager, self.database, self.timers
+                )
+                session.on_ended = self.evict_session
+                self.active_debates[debate_id] = session
+                self.user_debates[session.user1_id] = debate_id
+                self.user_debates[session.user2_id] = debate_id
+                await session.resume()
+                restored += 1
+            except Exception as e:
+                print(f"Error restoring debate {debate_id}: {e}")
+        
+        elapsed = time.perf_counter() - start
+        print(f"Restored {restored} debate sessions in {elapsed:.2f}s (load {loaded - start:.2f}s)")
+        return restored
+    
     async def handle_user_message(self, user_id: int, content: str):
         """Handle a message from a user"""
         if user_id not in self.user_debates:
@@ -315,6 +609,31 @@ class DebateManager:
         session = self.active_debates[debate_id]
         await session.handle_message(user_id, content)
     
+    def add_spectator(self, debate_id: int, websocket) -> bool:
+        """Subscribe a connection to a live debate and queue its catch-up state"""
+        session = self.active_debates.get(debate_id)
+        if not session or session.phase == 'ended':
+            return False
+        
+        self.remove_spectator(websocket)
+        if not session.audience.add(websocket):
+            return False
+        self.spectating[websocket] = debate_id
+        session.audience.send(websocket, json.dumps(session.get_spectator_state()))
+        return True
+    
+    def remove_spectator(self, websocket):
+        debate_id = self.spectating.pop(websocket, None)
+        session = self.active_debates.get(debate_id) if debate_id is not None else None
+        if session:
+            session.audience.remove(websocket)
+    
+    async def resync_timer(self, user_id: int):
+        """Resend the current turn and countdown to a client that paused, drifted or reconnected"""
+        session = self.get_user_debate_session(user_id)
+        if session:
+            await session.send_rejoin_state(user_id)
+    
     def get_user_debate_session(self, user_id: int) -> Optional[DebateSession]:
         """Get the debate session for a user"""
         if user_id not in self.user_debates:
@@ -324,19 +643,62 @@ class DebateManager:
         return self.active_debates.get(debate_id)
     
     def remove_debate_session(self, debate_id: int):
-        """Remove a completed debate session"""
-        if debate_id in self.active_debates:
-            session = self.active_debates[debate_id]
-            
-            # Remove user mappings
-            if session.user1_id in self.user_debates:
-                del self.user_debates[session.user1_id]
-            if session.user2_id in self.user_debates:
-                del self.user_debates[session.user2_id]
-            
-            # Remove session
-            del self.active_debates[debate_id]
-            print(f"Removed debate session {debate_id}")
+        """Remove a debate session and release its timer and spectators"""
+        session = self.active_debates.pop(debate_id, None)
+        if not session:
+            return
+        
+        # Remove user mappings, unless a user has already moved on to another debate
+        for user_id in (session.user1_id, session.user2_id):
+            if self.user_debates.get(user_id) == debate_id:
+                del self.user_debates[user_id]
+        
+        for websocket in list(session.audience.channels):
+            self.spectating.pop(websocket, None)
+        session.audience.finish()
+        session.cancel_timer()
+        print(f"Removed debate session {debate_id}")
+    
+    def evict_session(self, session: DebateSession):
+        """Drop a session once its end has been persisted"""
+        self.remove_debate_session(session.debate_id)
+    
+    async def record_debate_result(self, debate_id: int, winner_id: int) -> Optional[dict]:
+        """Record the winner of a debate, live or already finished, and update MMR"""
+        session = self.active_debates.get(debate_id)
+        if session:
+            return await session.record_result(winner_id)
+        return await self.database.record_debate_result(debate_id, winner_id)
+    
+    def get_memory_report(self) -> dict:
+        """Approximate memory held by live sessions (shallow sizes of the session, its messages and their text)"""
+        session_bytes = 0
+        message_count = 0
+        message_bytes = 0
+        for session in self.active_debates.values():
+            session_bytes += sys.getsizeof(session) + sys.getsizeof(session.messages)
+            for message in session.messages:
+                message_count += 1
+                message_bytes += (sys.getsizeof(message) + sys.getsizeof(message.content)
+                                  + sys.getsizeof(message.timestamp))
+        total = session_bytes + message_bytes
+        sessions = len(self.active_debates)
+        return {
+            'active_sessions': sessions,
+            'mapped_users': len(self.user_debates),
+            'messages': message_count,
+            'session_bytes': session_bytes,
+            'message_bytes': message_bytes,
+            'bytes_per_session': total / sessions if sessions else 0.0,
+            'pending_timers': len(self.timers)
+        }
+    
+    def get_timer_stats(self) -> dict:
+        return self.timers.get_stats()
+    
+    async def stop(self):
+        """Stop the shared timer wheel"""
+        await self.timers.stop()
     
     def get_active_debates_count(self) -> int:
         """Get the number of active debates"""
@@ -0,0 +1,106 @@
+import json
+import zlib
+from typing import List, Union
+
+# First byte of every archived log; bump when the encoding changes and keep decoding old versions
+FORMAT_ZLIB_JSON = 1
+CURRENT_FORMAT = FORMAT_ZLIB_JSON
+
+COMPRESSION_LEVEL = 9
+
+
+def encode_log(log: Union[str, List[dict]]) -> bytes:
+    """Encode a finished debate log (message list or its JSON text) for archival"""
+    if isinstance(log, str):
+        log = json.loads(log) if log else []
+    payload = json.dumps(log, separators=(',', ':')).encode('utf-8')
+    return bytes([CURRENT_FORMAT]) + zlib.compress(payload, COMPRESSION_LEVEL)
+
+
+def decode_log(data) -> str:
+    """Decode an archived log back to the JSON text the rest of the app reads"""
+    data = bytes(data)  # psycopg2 returns BYTEA as memoryview
+    if not data:
+        return ''
+    version = data[0]
+    if version == FORMAT_ZLIB_JSON:
+        return zlib.decompress(data[1:]).decode('utf-8')
+    raise ValueError(f"Unknown debate log format version: {version}")
+
+
+def generate_corpus(database, debate_count=2000, turns=6, seed=0):
+    """Fill a database with finished debates whose messages look like real turns"""
+    import random
+
+    rng = random.Random(seed)
+    words = ('the', 'policy', 'evidence', 'because', 'however', 'citizens', 'economic', 'would',
+             'argument', 'therefore', 'research', 'shows', 'that', 'government', 'should', 'not',
+             'benefit', 'cost', 'society', 'freedom', 'we', 'must', 'consider', 'long-term')
+    # Benchmark users never log in, so any placeholder hash will do
+    user1_id = database.create_user('corpus_a', 'unused')
+    user2_id = database.create_user('corpus_b', 'unused')
+
+    for _ in range(debate_count):
+        debate_id = database.create_debate(user1_id, user2_id, 'Generated benchmark topic')
+        for turn in range(1, turns + 1):
+            sender_id = user1_id if turn % 2 else user2_id
+            database.append_debate_message(debate_id, {
+                'sender_id': sender_id,
+                'sender_username': 'corpus_a' if sender_id == user1_id else 'corpus_b',
+                'content': ' '.join(rng.choice(words) for _ in range(rng.randint(40, 120))),
+                'turn_number': turn,
+                'timestamp': f"2026-01-01T00:{turn:02d}:00"
+            })
+        database.mark_debate_ended(debate_id)
+
+
+def measure(database, repeat=3) -> dict:
+    """Stored log bytes and get_all_debates read throughput for the current contents"""
+    import time
+
+    storage = database.get_log_storage_stats()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        debates = database.get_all_debates()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    storage['read_seconds'] = best
+    storage['debates_per_second'] = len(debates) / best if best else 0.0
+    return storage
+
+
+def benchmark(debate_count=2000):
+    """Compare storage and read throughput of a generated corpus before and after archiving"""
+    import contextlib
+    import os
+    import tempfile
+    from database import Database
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Database setup and writes print progress; keep them out of the report
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            database = Database(os.path.join(directory, 'benchmark.db'))
+            generate_corpus(database, debate_count)
+            before = measure(database)
+            archived = database.recompress_debate_logs()
+            database.vacuum()
+            after = measure(database)
+            database.close()
+    return {'debates': debate_count, 'archived': archived, 'before': before, 'after': after}
+
+
+if __name__ == "__main__":
+    # python log_archive.py recompress        archive every finished debate log in the configured database
+    # python log_archive.py benchmark [count] measure storage and reads on a generated corpus
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'recompress'
+    if command == 'benchmark':
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+        print(json.dumps(benchmark(count), indent=2))
+    else:
+        from database import Database
+
+        archived = Database().recompress_debate_logs()
+        print(f"Archived {archived} debate logs")
@@ -1,28 +1,100 @@
 import asyncio
+import bisect
 import json
+import os
+import time
 from typing import Dict, List, Optional, Tuple
 
+import matchmaking_numpy
+from matchmaking_metrics import MatchmakingMetrics
+
+class WaitTimeEstimator:
+    """Rolling time-to-match estimate per MMR band"""
+    
+    def __init__(self, band_width=200, smoothing=0.2):
+        self.band_width = band_width
+        self.smoothing = smoothing  # weight of the newest match in the moving average
+        self.band_estimates: Dict[int, float] = {}
+        self.overall_estimate: Optional[float] = None
+    
+    def get_band(self, mmr: int) -> int:
+        return int(mmr // self.band_width)
+    
+    def get_band_range(self, band: int) -> Tuple[int, int]:
+        """Inclusive MMR bounds of a band"""
+        low = band * self.band_width
+        return low, low + self.band_width - 1
+    
+    def record(self, mmr: int, wait_time: float) -> int:
+        """Fold a matched player's wait into their band's estimate; returns the band"""
+        band = self.get_band(mmr)
+        previous = self.band_estimates.get(band)
+        self.band_estimates[band] = wait_time if previous is None else \
+            previous + self.smoothing * (wait_time - previous)
+        if self.overall_estimate is None:
+            self.overall_estimate = wait_time
+        else:
+            self.overall_estimate += self.smoothing * (wait_time - self.overall_estimate)
+        return band
+    
+    def estimate(self, mmr: int) -> Optional[float]:
+        """Expected total time to match at this MMR, or None before any match was seen"""
+        return self.band_estimates.get(self.get_band(mmr), self.overall_estimate)
+
 class MatchmakingQueue:
     def __init__(self):
-        self.queue: List[Tuple[int, int]] = []
-        self.waiting_users: Dict[int, dict] = {}
+        self.by_mmr: List[Tuple[int, int]] = []  # (mmr, user_id), kept sorted
+        self.by_time: List[Tuple[float, int]] = []  # (queue_time, user_id), kept sorted
+        self.user_mmr: Dict[int, int] = {}  # user_id -> mmr
+        self.waiting_users: Dict[int, dict] = {}  # in enqueue order, oldest first
         self.match_expansion_time = 30
         self.initial_mmr_range = 100
         self.max_mmr_range = 500
+        # How many MMR-order neighbours back the batch matcher considers as partners
+        self.batch_lookback = 8
+        # 'numpy' plans large sweeps with array maths when NumPy is installed
+        self.matcher_backend = os.getenv('MATCHMAKING_BACKEND', 'python')
+        self.numpy_min_queue = int(os.getenv('MATCHMAKING_NUMPY_MIN_QUEUE', '1000'))
+        self.arrays = None  # matchmaking_numpy.QueueArrays, created by the first NumPy sweep
+        # Same clock as the event loop's default, and shared across processes
+        self.clock = time.monotonic
+        self.wait_estimator = WaitTimeEstimator()
+        self.changed_bands = set()  # bands whose estimate moved since the last take_changed_bands()
+        self.metrics = None  # MatchmakingMetrics, set by the Matchmaker
+    
+    def __len__(self):
+        return len(self.by_mmr)
         
-    def add_to_queue(self, user_id: int, mmr: int, user_info: dict):
-        if user_id not in [u[0] for u in self.queue]:
-            self.queue.append((user_id, mmr))
+    def add_to_queue(self, user_id: int, mmr: int, user_info: dict, queue_time: Optional[float] = None):
+        if user_id not in self.user_mmr:
+            index = bisect.bisect_left(self.by_mmr, (mmr, user_id))
+            self.by_mmr.insert(index, (mmr, user_id))
+            self.user_mmr[user_id] = mmr
+            
+            newest = next(reversed(self.waiting_users.values()), None)
             self.waiting_users[user_id] = {
                 **user_info,
-                'queue_time': asyncio.get_event_loop().time()
+                'queue_time': queue_time if queue_time is not None else self.clock()
             }
+            if self.arrays is not None:
+                self.arrays.insert(index, user_id, mmr, self.waiting_users[user_id]['queue_time'])
+            bisect.insort(self.by_time, (self.waiting_users[user_id]['queue_time'], user_id))
+            if queue_time is not None and newest and queue_time < newest['queue_time']:
+                # Re-queued with its original time; keep waiting_users oldest first
+                self.waiting_users = dict(sorted(self.waiting_users.items(), key=lambda item: item[1]['queue_time']))
             print(f"User {user_id} added to queue with MMR {mmr}")
     
     def remove_from_queue(self, user_id: int):
-        self.queue = [(uid, mmr) for uid, mmr in self.queue if uid != user_id]
+        mmr = self.user_mmr.pop(user_id, None)
+        if mmr is not None:
+            index = bisect.bisect_left(self.by_mmr, (mmr, user_id))
+            del self.by_mmr[index]
+            if self.arrays is not None:
+                self.arrays.delete(index)
         if user_id in self.waiting_users:
-            del self.waiting_users[user_id]
+            queue_time = self.waiting_users.pop(user_id)['queue_time']
+            index = bisect.bisect_left(self.by_time, (queue_time, user_id))
+            del self.by_time[index]
             print(f"User {user_id} removed from queue")
     
     def get_allowed_mmr_range(self, wait_time: float) -> int:
@@ -30,35 +102,78 @@ class MatchmakingQueue:
         expanded_range = self.initial_mmr_range + (expansions * 50)
         return min(expanded_range, self.max_mmr_range)
     
+    def get_wait_time(self, user_id: int, current_time: float) -> float:
+        return current_time - self.waiting_users[user_id]['queue_time']
+    
+    def get_longest_wait_time(self, current_time: float) -> float:
+        if not self.waiting_users:
+            return 0.0
+        oldest_user = next(iter(self.waiting_users))
+        return self.get_wait_time(oldest_user, current_time)
+    
+    def get_next_expansion_delay(self, current_time: float) -> Optional[float]:
+        """Seconds until some waiting user's allowed MMR range next widens, or None if none will"""
+        if len(self.by_mmr) < 2:
+            return None
+        
+        soonest = None
+        for info in self.waiting_users.values():
+            wait_time = current_time - info['queue_time']
+            if self.get_allowed_mmr_range(wait_time) >= self.max_mmr_range:
+                continue
+            delay = self.match_expansion_time - (wait_time % self.match_expansion_time)
+            if soonest is None or delay < soonest:
+                soonest = delay
+        return soonest
+    
+    def find_best_opponent(self, user_id: int, current_time: Optional[float] = None) -> Optional[Tuple[int, int]]:
+        """Find the closest valid opponent for a user; returns (opponent_id, mmr_diff)"""
+        if user_id not in self.user_mmr:
+            return None
+        if current_time is None:
+            current_time = self.clock()
+        
+        mmr = self.user_mmr[user_id]
+        wait_time = self.get_wait_time(user_id, current_time)
+        # A pair's range follows the longer wait, so no valid opponent is further away than this
+        window = self.get_allowed_mmr_range(max(wait_time, self.get_longest_wait_time(current_time)))
+        index = bisect.bisect_left(self.by_mmr, (mmr, user_id))
+        
+        best = None
+        for step in (1, -1):
+            j = index + step
+            while 0 <= j < len(self.by_mmr):
+                other_mmr, other_id = self.by_mmr[j]
+                diff = abs(other_mmr - mmr)
+                if diff > window or (best and diff >= best[1]):
+                    break
+                other_wait = self.get_wait_time(other_id, current_time)
+                if diff <= self.get_allowed_mmr_range(max(wait_time, other_wait)):
+                    best = (other_id, diff)
+                    break
+                j += step
+        
+        return best
+    
     def find_match(self) -> Optional[Tuple[int, int]]:
-        if len(self.queue) < 2:
+        if len(self.by_mmr) < 2:
             return None
         
-        current_time = asyncio.get_event_loop().time()
+        current_time = self.clock()
         best_match = None
         smallest_diff = float('inf')
         
-        for i in range(len(self.queue)):
-            for j in range(i + 1, len(self.queue)):
-                user1_id, mmr1 = self.queue[i]
-                user2_id, mmr2 = self.queue[j]
-                
-                # Get wait times for both users
-                wait_time1 = current_time - self.waiting_users[user1_id]['queue_time']
-                wait_time2 = current_time - self.waiting_users[user2_id]['queue_time']
-                
-                # Use the longer wait time to determine MMR range
-                max_wait_time = max(wait_time1, wait_time2)
-                allowed_range = self.get_allowed_mmr_range(max_wait_time)
-                
-                mmr_diff = abs(mmr1 - mmr2)
-                
-                # Check if this is a valid match within the allowed range
-                if mmr_diff <= allowed_range and mmr_diff < smallest_diff:
-                    smallest_diff = mmr_diff
-                    best_match = (user1_id, user2_id)
+        # The closest valid pair overall is some player's closest valid opponent
+        for _, user_id in self.by_mmr:
+            found = self.find_best_opponent(user_id, current_time)
+            if found and found[1] < smallest_diff:
+                smallest_diff = found[1]
+                best_match = (user_id, found[0])
+                if smallest_diff == 0:
+                    break
         
         if best_match:
+            self.record_match(best_match, current_time)
             # Remove both users from queue
             self.remove_from_queue(best_match[0])
             self.remove_from_queue(best_match[1])
@@ -66,44 +181,218 @@ class MatchmakingQueue:
         
         return best_match
     
+    def get_pair_cost(self, mmr_diff: int, max_wait_time: float) -> float:
+        """Pairing cost: the MMR gap, discounted the longer either player has waited"""
+        return mmr_diff / (1 + max_wait_time / self.match_expansion_time)
+    
+    def plan_batch_matches(self, current_time: float) -> List[Tuple[int, int]]:
+        """Choose the pairs for one sweep without changing the queue.
+        
+        Works over the MMR-sorted queue, pairing each player only with a
+        neighbour among the matched players (at most `batch_lookback`
+        positions away). Maximises the number of valid pairs first, then
+        minimises the total wait-weighted MMR difference.
+        """
+        n = len(self.by_mmr)
+        if n < 2:
+            return []
+        
+        window = self.get_allowed_mmr_range(self.get_longest_wait_time(current_time))
+        wait_times = [self.get_wait_time(user_id, current_time) for _, user_id in self.by_mmr]
+        
+        # best[i] = (pairs, -cost) over the first i players; choice[i] = partner index of player i-1
+        best = [(0, 0.0)] * (n + 1)
+        choice = [None] * (n + 1)
+        for i in range(1, n + 1):
+            best[i] = best[i - 1]
+            mmr_i = self.by_mmr[i - 1][0]
+            for j in range(i - 2, max(i - 2 - self.batch_lookback, -1), -1):
+                mmr_diff = mmr_i - self.by_mmr[j][0]
+                if mmr_diff > window:
+                    break
+                max_wait = max(wait_times[i - 1], wait_times[j])
+                if mmr_diff > self.get_allowed_mmr_range(max_wait):
+                    continue
+                pairs, neg_cost = best[j]
+                candidate = (pairs + 1, neg_cost - self.get_pair_cost(mmr_diff, max_wait))
+                if candidate > best[i]:
+                    best[i] = candidate
+                    choice[i] = j
+        
+        matches = []
+        i = n
+        while i > 0:
+            j = choice[i]
+            if j is None:
+                i -= 1
+                continue
+            matches.append((self.by_mmr[j][1], self.by_mmr[i - 1][1]))
+            i = j
+        matches.reverse()
+        return matches
+    
+    def find_matches(self) -> List[Tuple[int, int]]:
+        """Pair as many waiting users as possible in one sweep and remove them from the queue"""
+        if len(self.by_mmr) < 2:
+            return []
+        
+        current_time = self.clock()
+        use_numpy = (self.matcher_backend == 'numpy' and matchmaking_numpy.HAS_NUMPY
+                     and len(self.by_mmr) >= self.numpy_min_queue)
+        if use_numpy:
+            matches = matchmaking_numpy.plan_batch_matches(self, current_time)
+        else:
+            matches = self.plan_batch_matches(current_time)
+        
+        for user1_id, user2_id in matches:
+            mmr_diff = abs(self.user_mmr[user1_id] - self.user_mmr[user2_id])
+            self.record_match((user1_id, user2_id), current_time)
+            self.remove_from_queue(user1_id)
+            self.remove_from_queue(user2_id)
+            print(f"Match found: User {user1_id} vs User {user2_id} (MMR diff: {mmr_diff})")
+        
+        return matches
+    
+    def start(self, on_change=None):
+        """Hook for queues that match in the background; the in-process queue has nothing to start"""
+        pass
+    
+    async def stop(self):
+        pass
+    
+    def record_match(self, pair: Tuple[int, int], current_time: float):
+        """Feed both players' waits into the time-to-match estimate and metrics"""
+        waits = []
+        for user_id in pair:
+            wait_time = self.get_wait_time(user_id, current_time)
+            self.changed_bands.add(self.wait_estimator.record(self.user_mmr[user_id], wait_time))
+            waits.append((self.user_mmr[user_id], wait_time))
+        if self.metrics:
+            self.metrics.record_match(*waits[0], *waits[1])
+    
+    def take_changed_bands(self) -> List[int]:
+        changed = list(self.changed_bands)
+        self.changed_bands.clear()
+        return changed
+    
+    def get_users_in_mmr_range(self, low: int, high: int) -> List[int]:
+        start = bisect.bisect_left(self.by_mmr, (low, float('-inf')))
+        end = bisect.bisect_right(self.by_mmr, (high, float('inf')))
+        return [user_id for _, user_id in self.by_mmr[start:end]]
+    
     def get_queue_status(self) -> dict:
         return {
-            'queue_size': len(self.queue),
-            'waiting_users': list(self.waiting_users.keys())
+            'queue_size': len(self.by_mmr),
+            'longest_wait': round(self.get_longest_wait_time(self.clock()), 1)
+        }
+    
+    def get_player_status(self, user_id: int) -> Optional[dict]:
+        """Queue size plus this player's place in line and expected wait"""
+        if user_id not in self.waiting_users:
+            return None
+        queue_time = self.waiting_users[user_id]['queue_time']
+        estimate = self.wait_estimator.estimate(self.user_mmr[user_id])
+        return {
+            'queue_size': len(self.by_mmr),
+            'position': bisect.bisect_left(self.by_time, (queue_time, user_id)) + 1,
+            'wait_time': round(self.clock() - queue_time, 1),
+            'estimated_wait': round(estimate, 1) if estimate is not None else None
         }
 
 class Matchmaker:
-    def __init__(self, websocket_manager, database):
-        self.queue = MatchmakingQueue()
+    def __init__(self, websocket_manager, database, queue=None):
+        self.queue = queue if queue is not None else MatchmakingQueue()
+        self.metrics = MatchmakingMetrics()
+        self.queue.metrics = self.metrics
         self.websocket_manager = websocket_manager
         self.database = database
         self.running = False
-        self.match_check_interval = 2
+        self.wakeup = asyncio.Event()
+        self.error_retry_delay = 2
+        # Small margin so a wake-up lands just past the range boundary, not just before it
+        self.expansion_margin = 0.01
+        # ETA pushes go out only when a band's estimate moves by this much
+        self.eta_push_fraction = 0.2
+        self.eta_push_min_change = 5.0
+        self.pushed_estimates: Dict[int, float] = {}  # band -> estimate last pushed
         
     async def start_matchmaking_service(self):
+        """Match whenever the queue changes or a waiting user's MMR range widens"""
         self.running = True
+        loop = asyncio.get_running_loop()
+        # Sharded queues report worker results from another thread
+        self.queue.start(lambda: loop.call_soon_threadsafe(self.notify_queue_changed))
         print("Matchmaking service started")
         
         while self.running:
             try:
-                match = self.queue.find_match()
-                if match:
-                    print(f"Match found: {match[0]} vs {match[1]}")
-                    await self.create_match(match[0], match[1])
+                self.wakeup.clear()
+                
+                sweep_start = time.perf_counter()
+                matches = self.queue.find_matches()
+                self.metrics.record_sweep(time.perf_counter() - sweep_start, len(matches), len(self.queue))
+                if matches:
+                    print(f"Matched {len(matches)} pairs in one sweep")
+                    await asyncio.gather(*(
+                        self.create_match(user1_id, user2_id) for user1_id, user2_id in matches
+                    ))
+                    await self.push_eta_updates()
+                    # Users may have joined while the matches were being created
+                    continue
                 
-                await asyncio.sleep(self.match_check_interval)
+                delay = self.queue.get_next_expansion_delay(self.queue.clock())
+                if delay is not None:
+                    delay += self.expansion_margin
+                
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
             except Exception as e:
                 print(f"Error in matchmaking service: {e}")
-                await asyncio.sleep(self.match_check_interval)
+                await asyncio.sleep(self.error_retry_delay)
+    
+    def eta_changed(self, previous: Optional[float], estimate: float) -> bool:
+        if previous is None:
+            return True
+        change = abs(estimate - previous)
+        return change >= self.eta_push_min_change and change >= self.eta_push_fraction * previous
+    
+    async def push_eta_updates(self):
+        """Send fresh status to players in bands whose time-to-match estimate moved meaningfully"""
+        estimator = getattr(self.queue, 'wait_estimator', None)
+        if estimator is None:
+            return
+        
+        sends = []
+        for band in self.queue.take_changed_bands():
+            estimate = estimator.band_estimates[band]
+            if not self.eta_changed(self.pushed_estimates.get(band), estimate):
+                continue
+            self.pushed_estimates[band] = estimate
+            low, high = estimator.get_band_range(band)
+            for user_id in self.queue.get_users_in_mmr_range(low, high):
+                sends.append(self.websocket_manager.send_to_user(user_id, {
+                    'type': 'queue_update',
+                    'queue_status': self.queue.get_player_status(user_id)
+                }))
+        if sends:
+            await asyncio.gather(*sends)
     
-    def stop_matchmaking_service(self):
+    def notify_queue_changed(self):
+        """Wake the matchmaking service to look for new pairs"""
+        self.wakeup.set()
+    
+    async def stop_matchmaking_service(self):
         """Stop the matchmaking service"""
         self.running = False
+        self.wakeup.set()
+        await self.queue.stop()
         print("Matchmaking service stopped")
     
     async def add_user_to_queue(self, user_id: int, websocket):
         """Add a user to the matchmaking queue"""
-        user_info = self.database.get_user_by_id(user_id)
+        user_info = await self.database.get_user_by_id(user_id)
         if not user_info:
             await self.websocket_manager.send_to_user(user_id, {
                 'type': 'error',
@@ -111,24 +400,31 @@ class Matchmaker:
             })
             return
         
-        # Add user to queue
+        # Add user to queue and match right away if an opponent is already waiting
         self.queue.add_to_queue(user_id, user_info['mmr'], user_info)
+        self.notify_queue_changed()
         
         # Store the websocket connection
         self.websocket_manager.add_connection(user_id, websocket)
         
-        print(f"Added user {user_info['username']} (ID: {user_id}) to matchmaking queue")
-        print(f"Queue status: {self.queue.get_queue_status()}")
+        print(f"Added user {user_info['username']} (ID: {user_id}) to matchmaking queue ({len(self.queue)} waiting)")
         
         # Send confirmation to user
+        queue_status = self.queue.get_player_status(user_id)
+        if queue_status is None:
+            return
         await self.websocket_manager.send_to_user(user_id, {
             'type': 'queue_joined',
             'message': 'Searching for opponent...',
-            'queue_status': self.queue.get_queue_status()
+            'queue_status': queue_status
         })
     
     async def remove_user_from_queue(self, user_id: int):
         """Remove a user from the matchmaking queue"""
+        mmr = self.queue.user_mmr.get(user_id)
+        if mmr is not None:
+            # Left before being matched
+            self.metrics.record_abandonment(mmr)
         self.queue.remove_from_queue(user_id)
         
         # Send confirmation to user
@@ -140,61 +436,47 @@ class Matchmaker:
     async def create_match(self, user1_id: int, user2_id: int):
         """Create a debate match between two users"""
         try:
-            # Get user information
-            user1_info = self.database.get_user_by_id(user1_id)
-            user2_info = self.database.get_user_by_id(user2_id)
+            # Profiles, topic and debate row come back from a single transaction
+            match = await self.database.create_match(user1_id, user2_id)
             
-            if not user1_info or not user2_info:
-                print(f"Error: Could not find user info for match {user1_id} vs {user2_id}")
+            if match is None:
+                print(f"Failed to create debate for match {user1_id} vs {user2_id}")
+                await self.send_match_error(user1_id, user2_id, 'Failed to create debate. Please try again.')
                 return
             
-            # Get random topic
-            topic = self.database.get_random_topic()
+            user1_info = match['users'][user1_id]
+            user2_info = match['users'][user2_id]
             
-            # Create debate in database
-            debate_id = self.database.create_debate(user1_id, user2_id, topic)
-            
-            if debate_id is None:
-                print(f"Failed to create debate in database")
-                error_msg = {
-                    'type': 'error',
-                    'message': 'Failed to create debate. Please try again.'
+            def match_data(opponent):
+                return {
+                    'type': 'match_found',
+                    'debate_id': match['debate_id'],
+                    'topic': match['topic'],
+                    'opponent': {
+                        'id': opponent['id'],
+                        'username': opponent['username'],
+                        'mmr': opponent['mmr']
+                    }
                 }
-                await self.websocket_manager.send_to_user(user1_id, error_msg)
-                await self.websocket_manager.send_to_user(user2_id, error_msg)
-                return
             
-            # Notify both users of the match
-            match_data = {
-                'type': 'match_found',
-                'debate_id': debate_id,
-                'topic': topic,
-                'opponent': {
-                    'id': user2_id,
-                    'username': user2_info['username'],
-                    'mmr': user2_info['mmr']
-                }
-            }
+            # Notify both users of the match at the same time
+            await asyncio.gather(
+                self.websocket_manager.send_to_user(user1_id, match_data(user2_info)),
+                self.websocket_manager.send_to_user(user2_id, match_data(user1_info))
+            )
             
-            # Send to user1 with user2's info
-            await self.websocket_manager.send_to_user(user1_id, match_data)
-            
-            # Send to user2 with user1's info (swap opponent info)
-            match_data['opponent'] = {
-                'id': user1_id,
-                'username': user1_info['username'],
-                'mmr': user1_info['mmr']
-            }
-            await self.websocket_manager.send_to_user(user2_id, match_data)
-            
-            print(f"Match created: Debate {debate_id} between {user1_info['username']} and {user2_info['username']}")
+            print(f"Match created: Debate {match['debate_id']} between {user1_info['username']} and {user2_info['username']}")
             
         except Exception as e:
             print(f"Error creating match: {e}")
-            # Notify users of error
-            error_msg = {
-                'type': 'error',
-                'message': 'Failed to create match. Please try again.'
-            }
-            await self.websocket_manager.send_to_user(user1_id, error_msg)
-            await self.websocket_manager.send_to_user(user2_id, error_msg)
+            await self.send_match_error(user1_id, user2_id, 'Failed to create match. Please try again.')
+    
+    async def send_match_error(self, user1_id: int, user2_id: int, message: str):
+        error_msg = {
+            'type': 'error',
+            'message': message
+        }
+        await asyncio.gather(
+            self.websocket_manager.send_to_user(user1_id, error_msg),
+            self.websocket_manager.send_to_user(user2_id, error_msg)
+        )
@@ -0,0 +1,139 @@
+import bisect
+from typing import Dict, List, Optional
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus-style cumulative buckets"""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given quantile"""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + [float('inf')], self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'p50': self.quantile(0.50),
+            'p90': self.quantile(0.90),
+            'p99': self.quantile(0.99),
+            'buckets': {str(bound): count for bound, count in zip(self.buckets + ['+Inf'], self.counts)}
+        }
+
+    def prometheus_lines(self, name: str, labels: str = '') -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ['+Inf'], self.counts):
+            cumulative += count
+            label_text = f'{labels},le="{bound}"' if labels else f'le="{bound}"'
+            lines.append(f'{name}_bucket{{{label_text}}} {cumulative}')
+        suffix = f'{{{labels}}}' if labels else ''
+        lines.append(f'{name}_sum{suffix} {self.sum}')
+        lines.append(f'{name}_count{suffix} {self.count}')
+        return lines
+
+
+class MatchmakingMetrics:
+    """Wait-time, match-quality, abandonment and sweep-cost metrics for the Matchmaker"""
+
+    WAIT_BUCKETS = [1, 2, 5, 10, 15, 30, 45, 60, 90, 120, 180, 300, 600]
+    MMR_DIFF_BUCKETS = [10, 25, 50, 75, 100, 150, 200, 300, 400, 500]
+    SWEEP_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1]
+
+    def __init__(self, band_width=200):
+        self.band_width = band_width
+        self.wait_times: Dict[int, Histogram] = {}  # band -> enqueue-to-match seconds
+        self.mmr_diff = Histogram(self.MMR_DIFF_BUCKETS)
+        self.sweep_seconds = Histogram(self.SWEEP_BUCKETS)
+        self.abandonments: Dict[int, int] = {}  # band -> players who left before a match
+        self.matches = 0
+        self.sweeps_with_matches = 0
+        self.queue_size = 0
+
+    def get_band(self, mmr: int) -> int:
+        return int(mmr // self.band_width)
+
+    def get_band_label(self, band: int) -> str:
+        low = band * self.band_width
+        return f"{low}-{low + self.band_width - 1}"
+
+    def record_match(self, mmr1: int, wait1: float, mmr2: int, wait2: float):
+        self.matches += 1
+        self.mmr_diff.observe(abs(mmr1 - mmr2))
+        for mmr, wait_time in ((mmr1, wait1), (mmr2, wait2)):
+            band = self.get_band(mmr)
+            if band not in self.wait_times:
+                self.wait_times[band] = Histogram(self.WAIT_BUCKETS)
+            self.wait_times[band].observe(wait_time)
+
+    def record_abandonment(self, mmr: int):
+        band = self.get_band(mmr)
+        self.abandonments[band] = self.abandonments.get(band, 0) + 1
+
+    def record_sweep(self, seconds: float, pairs: int, queue_size: int):
+        self.sweep_seconds.observe(seconds)
+        if pairs:
+            self.sweeps_with_matches += 1
+        self.queue_size = queue_size
+
+    def to_dict(self) -> dict:
+        return {
+            'matches': self.matches,
+            'queue_size': self.queue_size,
+            'abandonments': {self.get_band_label(band): count
+                             for band, count in sorted(self.abandonments.items())},
+            'wait_time_seconds': {self.get_band_label(band): histogram.to_dict()
+                                  for band, histogram in sorted(self.wait_times.items())},
+            'mmr_diff': self.mmr_diff.to_dict(),
+            'sweep_seconds': self.sweep_seconds.to_dict(),
+            'sweeps_with_matches': self.sweeps_with_matches
+        }
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP matchmaking_matches_total Pairs created by the matchmaker',
+            '# TYPE matchmaking_matches_total counter',
+            f'matchmaking_matches_total {self.matches}',
+            '# HELP matchmaking_queue_size Players waiting after the last sweep',
+            '# TYPE matchmaking_queue_size gauge',
+            f'matchmaking_queue_size {self.queue_size}',
+            '# HELP matchmaking_abandonments_total Players who left the queue before being matched',
+            '# TYPE matchmaking_abandonments_total counter'
+        ]
+        for band, count in sorted(self.abandonments.items()):
+            lines.append(f'matchmaking_abandonments_total{{mmr_band="{self.get_band_label(band)}"}} {count}')
+
+        lines.append('# HELP matchmaking_wait_seconds Time from joining the queue to being matched')
+        lines.append('# TYPE matchmaking_wait_seconds histogram')
+        for band, histogram in sorted(self.wait_times.items()):
+            lines.extend(histogram.prometheus_lines('matchmaking_wait_seconds',
+                                                    f'mmr_band="{self.get_band_label(band)}"'))
+
+        lines.append('# HELP matchmaking_mmr_difference MMR gap between matched players')
+        lines.append('# TYPE matchmaking_mmr_difference histogram')
+        lines.extend(self.mmr_diff.prometheus_lines('matchmaking_mmr_difference'))
+
+        lines.append('# HELP matchmaking_sweep_seconds Wall time of one matching sweep')
+        lines.append('# TYPE matchmaking_sweep_seconds histogram')
+        lines.extend(self.sweep_seconds.prometheus_lines('matchmaking_sweep_seconds'))
+        return '\n'.join(lines) + '\n'
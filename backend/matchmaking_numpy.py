@@ -0,0 +1,134 @@
+from typing import List, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+class QueueArrays:
+    """User ids, MMRs and queue times in the queue's MMR order, kept as NumPy arrays.
+
+    The queue mirrors every insert into and delete from its sorted list here,
+    at the same index, so a sweep reads the arrays as they are instead of
+    rebuilding them. Each update shifts the tail in place; capacity doubles
+    when full.
+    """
+
+    def __init__(self, entries=(), capacity=1024):
+        entries = list(entries)  # (user_id, mmr, queue_time) in MMR order
+        self.size = len(entries)
+        capacity = max(capacity, 2 * self.size)
+        self._user_ids = np.zeros(capacity, dtype=np.int64)
+        self._mmrs = np.zeros(capacity, dtype=np.int64)
+        self._queue_times = np.zeros(capacity, dtype=np.float64)
+        for index, (user_id, mmr, queue_time) in enumerate(entries):
+            self._user_ids[index] = user_id
+            self._mmrs[index] = mmr
+            self._queue_times[index] = queue_time
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def user_ids(self):
+        return self._user_ids[:self.size]
+
+    @property
+    def mmrs(self):
+        return self._mmrs[:self.size]
+
+    @property
+    def queue_times(self):
+        return self._queue_times[:self.size]
+
+    def _grow(self):
+        capacity = 2 * len(self._user_ids)
+        for name in ('_user_ids', '_mmrs', '_queue_times'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def insert(self, index: int, user_id: int, mmr: int, queue_time: float):
+        if self.size == len(self._user_ids):
+            self._grow()
+        for array, value in ((self._user_ids, user_id), (self._mmrs, mmr), (self._queue_times, queue_time)):
+            array[index + 1:self.size + 1] = array[index:self.size]
+            array[index] = value
+        self.size += 1
+
+    def delete(self, index: int):
+        for array in (self._user_ids, self._mmrs, self._queue_times):
+            array[index:self.size - 1] = array[index + 1:self.size]
+        self.size -= 1
+
+
+def plan_batch_matches(queue, current_time: float) -> List[Tuple[int, int]]:
+    """NumPy version of MatchmakingQueue.plan_batch_matches; returns the same pairs.
+
+    Wait times, allowed ranges, MMR gaps and pair costs for every player and
+    each of their `batch_lookback` lower neighbours are computed as whole
+    arrays. Only the pair-count/cost recurrence stays a Python loop, and it
+    visits valid candidates only.
+    """
+    n = len(queue.by_mmr)
+    lookback = queue.batch_lookback
+    if n < 2 or lookback < 1:
+        return []
+
+    if queue.arrays is None:
+        # Built once; from here on the queue keeps them in step with by_mmr
+        queue.arrays = QueueArrays((user_id, mmr, queue.waiting_users[user_id]['queue_time'])
+                                   for mmr, user_id in queue.by_mmr)
+    user_ids = queue.arrays.user_ids
+    mmrs = queue.arrays.mmrs
+    wait_times = current_time - queue.arrays.queue_times
+
+    # Row a, column k pairs player a with player a - 1 - k
+    partners = np.arange(n)[:, None] - 1 - np.arange(lookback)[None, :]
+    in_queue = partners >= 0
+    partners = np.where(in_queue, partners, 0)
+
+    mmr_diff = mmrs[:, None] - mmrs[partners]
+    max_wait = np.maximum(wait_times[:, None], wait_times[partners])
+    expansions = (max_wait // queue.match_expansion_time).astype(np.int64)
+    allowed = np.minimum(queue.initial_mmr_range + expansions * 50, queue.max_mmr_range)
+    valid = in_queue & (mmr_diff <= allowed)
+
+    # Row-major order visits each player's partners nearest first, like the reference loop
+    rows, columns = np.nonzero(valid)
+    candidate_rows = rows.tolist()
+    candidate_partners = partners[rows, columns].tolist()
+    candidate_costs = (mmr_diff[rows, columns] / (1 + max_wait[rows, columns] / queue.match_expansion_time)).tolist()
+
+    best_pairs = [0] * (n + 1)
+    best_cost = [0.0] * (n + 1)
+    choice = [None] * (n + 1)
+    position = 0
+    count = len(candidate_rows)
+    for a in range(n):
+        pairs, neg_cost, partner = best_pairs[a], best_cost[a], None
+        while position < count and candidate_rows[position] == a:
+            j = candidate_partners[position]
+            candidate_pairs = best_pairs[j] + 1
+            candidate_cost = best_cost[j] - candidate_costs[position]
+            if candidate_pairs > pairs or (candidate_pairs == pairs and candidate_cost > neg_cost):
+                pairs, neg_cost, partner = candidate_pairs, candidate_cost, j
+            position += 1
+        best_pairs[a + 1] = pairs
+        best_cost[a + 1] = neg_cost
+        choice[a + 1] = partner
+
+    matches = []
+    i = n
+    while i > 0:
+        j = choice[i]
+        if j is None:
+            i -= 1
+            continue
+        matches.append((int(user_ids[j]), int(user_ids[i - 1])))
+        i = j
+    matches.reverse()
+    return matches
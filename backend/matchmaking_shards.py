@@ -0,0 +1,285 @@
+import asyncio
+import bisect
+import multiprocessing
+import queue
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from matchmaking import MatchmakingQueue, WaitTimeEstimator
+
+
+def run_band_worker(band_index: int, inbox, outbox, settings: dict):
+    """Worker process: owns the MatchmakingQueue for one MMR band"""
+    band_queue = MatchmakingQueue()
+    for name, value in settings.items():
+        setattr(band_queue, name, value)
+
+    while True:
+        delay = band_queue.get_next_expansion_delay(band_queue.clock())
+        try:
+            commands = [inbox.get(timeout=None if delay is None else delay + 0.01)]
+        except queue.Empty:
+            commands = []
+        # Apply everything that arrived together before running one sweep
+        while True:
+            try:
+                commands.append(inbox.get_nowait())
+            except queue.Empty:
+                break
+
+        for command in commands:
+            if command[0] == 'add':
+                _, user_id, mmr, queue_time = command
+                band_queue.add_to_queue(user_id, mmr, {}, queue_time)
+            elif command[0] == 'remove':
+                band_queue.remove_from_queue(command[1])
+            elif command[0] == 'stop':
+                return
+
+        matches = band_queue.find_matches()
+        if matches:
+            outbox.put(('matches', band_index, matches))
+
+
+class ShardedMatchmakingQueue:
+    """MatchmakingQueue interface backed by one worker process per MMR band.
+
+    A player is queued in their home band and in any neighbouring band that
+    lies within `border_width` of their MMR, so close pairs across a band edge
+    can still be found. As a player's allowed range widens with waiting, they
+    are also queued in every further band the range reaches. Workers report matches back over a multiprocessing queue; this
+    coordinator accepts a pair only if both players are still waiting and
+    re-queues the partner of a player that was already matched elsewhere.
+    """
+
+    def __init__(self, band_edges: List[int]):
+        self.band_edges = sorted(band_edges)
+        self.bands: List[Tuple[float, float]] = []
+        low = float('-inf')
+        for edge in self.band_edges + [float('inf')]:
+            self.bands.append((low, edge))
+            low = edge
+
+        # Defaults mirror MatchmakingQueue; change them before start()
+        reference = MatchmakingQueue()
+        self.match_expansion_time = reference.match_expansion_time
+        self.initial_mmr_range = reference.initial_mmr_range
+        self.max_mmr_range = reference.max_mmr_range
+        self.clock = reference.clock
+        # Players this close to a band edge are also queued in the next band
+        self.border_width = reference.initial_mmr_range
+
+        self.by_mmr: List[Tuple[int, int]] = []  # (mmr, user_id), kept sorted
+        self.by_time: List[Tuple[float, int]] = []  # (queue_time, user_id), kept sorted
+        self.user_mmr: Dict[int, int] = {}
+        self.wait_estimator = WaitTimeEstimator()
+        self.changed_bands = set()
+        self.metrics = None
+        self.user_bands: Dict[int, List[int]] = {}
+        self.waiting_users: Dict[int, dict] = {}
+
+        self.context = multiprocessing.get_context('spawn')
+        self.inboxes = []
+        self.outbox = None
+        self.processes = []
+        self.listener = None
+        self.results = deque()
+        self.stop_timeout = 5.0  # seconds a worker gets to exit before it is terminated
+        self.accepted = deque()  # accepted pairs not yet handed out by find_match
+        self.on_change = None
+
+        # Statistics
+        self.reported_matches = 0
+        self.rejected_matches = 0
+
+    def __len__(self):
+        return len(self.user_mmr)
+
+    def start(self, on_change=None):
+        """Start the band workers; on_change is called from a thread when results arrive"""
+        if self.processes:
+            return
+        self.on_change = on_change
+        settings = {
+            'match_expansion_time': self.match_expansion_time,
+            'initial_mmr_range': self.initial_mmr_range,
+            'max_mmr_range': self.max_mmr_range
+        }
+        self.outbox = self.context.Queue()
+        for band_index in range(len(self.bands)):
+            inbox = self.context.Queue()
+            process = self.context.Process(
+                target=run_band_worker,
+                args=(band_index, inbox, self.outbox, settings),
+                name=f"matchmaking-band-{band_index}",
+                daemon=True
+            )
+            process.start()
+            self.inboxes.append(inbox)
+            self.processes.append(process)
+
+        self.listener = threading.Thread(target=self._listen, name='matchmaking-results', daemon=True)
+        self.listener.start()
+        print(f"Sharded matchmaking started with {len(self.bands)} band workers: {self.band_edges}")
+
+    async def stop(self):
+        """Ask the workers to exit and wait for them off the event loop, terminating any that hang"""
+        for inbox in self.inboxes:
+            inbox.put(('stop',))
+        await asyncio.gather(*(asyncio.to_thread(process.join, self.stop_timeout) for process in self.processes))
+        for process in self.processes:
+            if process.is_alive():
+                print(f"Terminating {process.name}, which did not stop within {self.stop_timeout}s")
+                process.terminate()
+                await asyncio.to_thread(process.join, self.stop_timeout)
+        if self.outbox is not None:
+            self.outbox.put(None)
+        if self.listener is not None:
+            await asyncio.to_thread(self.listener.join, self.stop_timeout)
+        self.inboxes = []
+        self.processes = []
+        self.listener = None
+
+    def _listen(self):
+        while True:
+            message = self.outbox.get()
+            if message is None:
+                return
+            self.results.append(message)
+            if self.on_change:
+                self.on_change()
+
+    def get_bands_for(self, mmr: int, width: Optional[int] = None) -> List[int]:
+        """Home band plus any band within width (default border_width) of the player's MMR"""
+        width = max(width or 0, self.border_width)
+        low, high = mmr - width, mmr + width
+        return [index for index, (band_low, band_high) in enumerate(self.bands)
+                if band_low <= high and low < band_high]
+
+    def get_allowed_mmr_range(self, wait_time: float) -> int:
+        expansions = int(wait_time // self.match_expansion_time)
+        return min(self.initial_mmr_range + expansions * 50, self.max_mmr_range)
+
+    def widen_ranges(self, current_time: float):
+        """Queue waiting players in any further band their widened MMR range now reaches"""
+        for user_id, info in self.waiting_users.items():
+            mmr = self.user_mmr[user_id]
+            bands = self.user_bands[user_id]
+            allowed = self.get_allowed_mmr_range(current_time - info['queue_time'])
+            for band_index in self.get_bands_for(mmr, allowed):
+                if band_index not in bands:
+                    bands.append(band_index)
+                    self.inboxes[band_index].put(('add', user_id, mmr, info['queue_time']))
+
+    def add_to_queue(self, user_id: int, mmr: int, user_info: dict, queue_time: Optional[float] = None):
+        if user_id in self.user_mmr:
+            return
+        queue_time = queue_time if queue_time is not None else self.clock()
+        self.user_mmr[user_id] = mmr
+        self.user_bands[user_id] = self.get_bands_for(mmr)
+        self.waiting_users[user_id] = {**user_info, 'queue_time': queue_time}
+        bisect.insort(self.by_mmr, (mmr, user_id))
+        bisect.insort(self.by_time, (queue_time, user_id))
+        for band_index in self.user_bands[user_id]:
+            self.inboxes[band_index].put(('add', user_id, mmr, queue_time))
+        print(f"User {user_id} added to queue with MMR {mmr} (bands {self.user_bands[user_id]})")
+
+    def remove_from_queue(self, user_id: int):
+        mmr = self.user_mmr.pop(user_id, None)
+        if mmr is not None:
+            del self.by_mmr[bisect.bisect_left(self.by_mmr, (mmr, user_id))]
+        for band_index in self.user_bands.pop(user_id, []):
+            self.inboxes[band_index].put(('remove', user_id))
+        if user_id in self.waiting_users:
+            queue_time = self.waiting_users.pop(user_id)['queue_time']
+            del self.by_time[bisect.bisect_left(self.by_time, (queue_time, user_id))]
+            print(f"User {user_id} removed from queue")
+
+    def find_matches(self) -> List[Tuple[int, int]]:
+        """Collect the matches reported by band workers since the last call"""
+        self.widen_ranges(self.clock())
+        accepted = list(self.accepted)
+        self.accepted.clear()
+        while self.results:
+            _, band_index, matches = self.results.popleft()
+            for user1_id, user2_id in matches:
+                self.reported_matches += 1
+                if user1_id in self.waiting_users and user2_id in self.waiting_users:
+                    current_time = self.clock()
+                    waits = []
+                    for user_id in (user1_id, user2_id):
+                        wait_time = current_time - self.waiting_users[user_id]['queue_time']
+                        self.changed_bands.add(self.wait_estimator.record(self.user_mmr[user_id], wait_time))
+                        waits.append((self.user_mmr[user_id], wait_time))
+                    if self.metrics:
+                        self.metrics.record_match(*waits[0], *waits[1])
+                    self.remove_from_queue(user1_id)
+                    self.remove_from_queue(user2_id)
+                    accepted.append((user1_id, user2_id))
+                    continue
+
+                # One of them was already matched by another band; put the other back
+                self.rejected_matches += 1
+                for user_id in (user1_id, user2_id):
+                    if user_id in self.waiting_users:
+                        queue_time = self.waiting_users[user_id]['queue_time']
+                        self.inboxes[band_index].put(('add', user_id, self.user_mmr[user_id], queue_time))
+        return accepted
+
+    def find_match(self) -> Optional[Tuple[int, int]]:
+        matches = self.find_matches()
+        if not matches:
+            return None
+        # Hand the rest out on later calls
+        self.accepted.extend(matches[1:])
+        return matches[0]
+
+    def get_next_expansion_delay(self, current_time: float) -> Optional[float]:
+        """Seconds until a waiting player's range may reach another band; workers handle widening within a band"""
+        if len(self.user_mmr) < 2:
+            return None
+
+        soonest = None
+        for user_id, info in self.waiting_users.items():
+            wait_time = current_time - info['queue_time']
+            if self.get_allowed_mmr_range(wait_time) >= self.max_mmr_range:
+                continue
+            if len(self.user_bands[user_id]) == len(self.get_bands_for(self.user_mmr[user_id], self.max_mmr_range)):
+                continue
+            delay = self.match_expansion_time - (wait_time % self.match_expansion_time)
+            if soonest is None or delay < soonest:
+                soonest = delay
+        return soonest
+
+    def take_changed_bands(self) -> List[int]:
+        changed = list(self.changed_bands)
+        self.changed_bands.clear()
+        return changed
+
+    def get_users_in_mmr_range(self, low: int, high: int) -> List[int]:
+        start = bisect.bisect_left(self.by_mmr, (low, float('-inf')))
+        end = bisect.bisect_right(self.by_mmr, (high, float('inf')))
+        return [user_id for _, user_id in self.by_mmr[start:end]]
+
+    def get_player_status(self, user_id: int) -> Optional[dict]:
+        if user_id not in self.waiting_users:
+            return None
+        queue_time = self.waiting_users[user_id]['queue_time']
+        estimate = self.wait_estimator.estimate(self.user_mmr[user_id])
+        return {
+            'queue_size': len(self.user_mmr),
+            'position': bisect.bisect_left(self.by_time, (queue_time, user_id)) + 1,
+            'wait_time': round(self.clock() - queue_time, 1),
+            'estimated_wait': round(estimate, 1) if estimate is not None else None
+        }
+
+    def get_queue_status(self) -> dict:
+        oldest = self.by_time[0][0] if self.by_time else None
+        return {
+            'queue_size': len(self.user_mmr),
+            'longest_wait': round(self.clock() - oldest, 1) if oldest is not None else 0.0,
+            'bands': len(self.bands),
+            'reported_matches': self.reported_matches,
+            'rejected_matches': self.rejected_matches
+        }
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import heapq
+import json
+import os
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from matchmaking import MatchmakingQueue
+
+
+class VirtualClock:
+    """Stand-in for time.monotonic that only moves when the simulator advances it"""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(fraction * len(ordered)), len(ordered) - 1)
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> dict:
+    if not values:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0}
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values),
+        'p50': percentile(values, 0.50),
+        'p90': percentile(values, 0.90),
+        'p99': percentile(values, 0.99),
+        'max': max(values)
+    }
+
+
+class MatchmakingSimulator:
+    """Replays synthetic queue traffic against a MatchmakingQueue on a virtual clock.
+
+    Sweeps follow the Matchmaker service: one after every arrival and one
+    just past each moment a waiting player's MMR range widens. Everything
+    except the measured CPU time is deterministic for a given seed.
+    """
+
+    def __init__(self, arrival_rate=2.0, duration=600.0, mmr_mean=1000, mmr_stddev=200,
+                 abandon_mean: Optional[float] = 180.0, matcher='batch', seed=0,
+                 queue_settings: Optional[dict] = None, queue_factory=MatchmakingQueue,
+                 sample_interval=1.0, expansion_margin=0.01):
+        if matcher not in ('batch', 'single'):
+            raise ValueError(f"Unknown matcher: {matcher}")
+        self.arrival_rate = arrival_rate  # players per second
+        self.duration = duration
+        self.mmr_mean = mmr_mean
+        self.mmr_stddev = mmr_stddev
+        self.abandon_mean = abandon_mean  # mean patience in seconds, None for never
+        self.matcher = matcher
+        self.seed = seed
+        self.queue_settings = queue_settings or {}
+        self.queue_factory = queue_factory
+        self.sample_interval = sample_interval
+        self.expansion_margin = expansion_margin
+
+    def generate_trace(self) -> List[Tuple[float, int, int, Optional[float]]]:
+        """Poisson arrivals as (arrival_time, user_id, mmr, patience) tuples"""
+        rng = random.Random(self.seed)
+        trace = []
+        now = 0.0
+        user_id = 0
+        while True:
+            now += rng.expovariate(self.arrival_rate)
+            if now >= self.duration:
+                return trace
+            user_id += 1
+            mmr = max(0, round(rng.gauss(self.mmr_mean, self.mmr_stddev)))
+            patience = rng.expovariate(1 / self.abandon_mean) if self.abandon_mean else None
+            trace.append((now, user_id, mmr, patience))
+
+    def run(self, trace=None) -> dict:
+        """Run the simulation and return a report; pass a trace to replay it exactly"""
+        if trace is None:
+            trace = self.generate_trace()
+
+        clock = VirtualClock()
+        queue = self.queue_factory()
+        for name, value in self.queue_settings.items():
+            setattr(queue, name, value)
+        queue.clock = clock
+
+        # Events: (time, order, kind, user_id, mmr); order keeps ties in trace order
+        events = []
+        for order, (arrival_time, user_id, mmr, patience) in enumerate(trace):
+            events.append((arrival_time, order, 'arrive', user_id, mmr))
+            if patience is not None:
+                events.append((arrival_time + patience, order, 'abandon', user_id, mmr))
+        heapq.heapify(events)
+
+        self.matches: List[Tuple[float, int, int]] = []
+        self.wait_times: List[float] = []
+        self.mmr_gaps: List[int] = []
+        self.sweep_times: List[float] = []
+        self.depth_samples: List[Tuple[float, int]] = []
+        self.abandoned = 0
+        next_sample = 0.0
+
+        # Queue prints every join and match; keep them out of the measurements
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            while True:
+                event_time = events[0][0] if events else float('inf')
+                delay = queue.get_next_expansion_delay(clock.now)
+                wake_time = clock.now + delay + self.expansion_margin if delay is not None else float('inf')
+                next_time = min(event_time, wake_time)
+                if next_time >= self.duration:
+                    break
+
+                while next_sample <= next_time:
+                    self.depth_samples.append((next_sample, len(queue)))
+                    next_sample += self.sample_interval
+                clock.now = next_time
+
+                if wake_time < event_time:
+                    self.sweep(queue, clock)
+                    continue
+
+                _, _, kind, user_id, mmr = heapq.heappop(events)
+                if kind == 'arrive':
+                    queue.add_to_queue(user_id, mmr, {'id': user_id, 'mmr': mmr})
+                    self.sweep(queue, clock)
+                elif user_id in queue.waiting_users:
+                    queue.remove_from_queue(user_id)
+                    self.abandoned += 1
+
+        while next_sample < self.duration:
+            self.depth_samples.append((next_sample, len(queue)))
+            next_sample += self.sample_interval
+
+        return self.report(trace, len(queue))
+
+    def sweep(self, queue, clock):
+        queue_times = {user_id: info['queue_time'] for user_id, info in queue.waiting_users.items()}
+
+        start = time.process_time()
+        if self.matcher == 'batch':
+            pairs = queue.find_matches()
+        else:
+            pairs = []
+            while True:
+                pair = queue.find_match()
+                if not pair:
+                    break
+                pairs.append(pair)
+        self.sweep_times.append(time.process_time() - start)
+
+        for user1_id, user2_id in pairs:
+            self.matches.append((clock.now, user1_id, user2_id))
+            self.wait_times.append(clock.now - queue_times[user1_id])
+            self.wait_times.append(clock.now - queue_times[user2_id])
+
+    def report(self, trace, unmatched) -> dict:
+        mmr_by_user: Dict[int, int] = {user_id: mmr for _, user_id, mmr, _ in trace}
+        self.mmr_gaps = [abs(mmr_by_user[user1_id] - mmr_by_user[user2_id])
+                         for _, user1_id, user2_id in self.matches]
+
+        gap_histogram: Dict[str, int] = {}
+        for gap in self.mmr_gaps:
+            low = gap // 50 * 50
+            bucket = f"{low}-{low + 49}"
+            gap_histogram[bucket] = gap_histogram.get(bucket, 0) + 1
+
+        depths = [depth for _, depth in self.depth_samples]
+        return {
+            'settings': {
+                'arrival_rate': self.arrival_rate,
+                'duration': self.duration,
+                'mmr_mean': self.mmr_mean,
+                'mmr_stddev': self.mmr_stddev,
+                'abandon_mean': self.abandon_mean,
+                'matcher': self.matcher,
+                'seed': self.seed,
+                'queue': self.queue_settings
+            },
+            'arrivals': len(trace),
+            'matched_players': 2 * len(self.matches),
+            'abandoned': self.abandoned,
+            'unmatched': unmatched,
+            'time_to_match': summarize(self.wait_times),
+            'mmr_gap': summarize(self.mmr_gaps),
+            'mmr_gap_histogram': dict(sorted(gap_histogram.items(), key=lambda item: int(item[0].split('-')[0]))),
+            'sweeps': len(self.sweep_times),
+            'sweep_cpu_ms': {key: value * 1000 if key != 'count' else value
+                             for key, value in summarize(self.sweep_times).items()},
+            'total_sweep_cpu_ms': sum(self.sweep_times) * 1000,
+            'queue_depth': {
+                'mean': sum(depths) / len(depths) if depths else 0.0,
+                'max': max(depths) if depths else 0,
+                'samples': self.depth_samples
+            }
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate matchmaking traffic on a virtual clock')
+    parser.add_argument('--rate', type=float, default=2.0, help='arrivals per second')
+    parser.add_argument('--duration', type=float, default=600.0, help='simulated seconds')
+    parser.add_argument('--mmr-mean', type=float, default=1000)
+    parser.add_argument('--mmr-stddev', type=float, default=200)
+    parser.add_argument('--abandon-mean', type=float, default=180.0,
+                        help='mean patience in seconds; 0 disables abandonment')
+    parser.add_argument('--matcher', choices=['batch', 'single'], default='batch')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--initial-range', type=int, help='override initial_mmr_range')
+    parser.add_argument('--max-range', type=int, help='override max_mmr_range')
+    parser.add_argument('--expansion-time', type=float, help='override match_expansion_time')
+    parser.add_argument('--backend', choices=['python', 'numpy'], help='override matcher_backend')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='run the same trace several times and keep the fastest sweep timings')
+    parser.add_argument('--samples', action='store_true', help='include queue depth samples in the output')
+    args = parser.parse_args()
+
+    queue_settings = {}
+    if args.initial_range is not None:
+        queue_settings['initial_mmr_range'] = args.initial_range
+    if args.max_range is not None:
+        queue_settings['max_mmr_range'] = args.max_range
+    if args.expansion_time is not None:
+        queue_settings['match_expansion_time'] = args.expansion_time
+    if args.backend is not None:
+        queue_settings['matcher_backend'] = args.backend
+        queue_settings['numpy_min_queue'] = 2
+
+    simulator = MatchmakingSimulator(
+        arrival_rate=args.rate, duration=args.duration, mmr_mean=args.mmr_mean,
+        mmr_stddev=args.mmr_stddev, abandon_mean=args.abandon_mean or None,
+        matcher=args.matcher, seed=args.seed, queue_settings=queue_settings
+    )
+    trace = simulator.generate_trace()
+    report = None
+    for _ in range(max(args.repeat, 1)):
+        result = simulator.run(trace)
+        if report is None or result['total_sweep_cpu_ms'] < report['total_sweep_cpu_ms']:
+            report = result
+
+    if not args.samples:
+        del report['queue_depth']['samples']
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+from datetime import datetime
+
+
+class Migration:
+    """A numbered schema change with separate statements for each backend"""
+
+    def __init__(self, version, description, sqlite, postgres=None):
+        self.version = version
+        self.description = description
+        self.sqlite = sqlite
+        self.postgres = postgres if postgres is not None else sqlite
+
+    def statements(self, use_postgres):
+        return self.postgres if use_postgres else self.sqlite
+
+
+# Append new migrations to the end of this list; never edit one that has shipped.
+MIGRATIONS = [
+    Migration(1, 'Create users, debates and topics tables',
+        sqlite=[
+            '''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                mmr INTEGER DEFAULT 1000,
+                user_class INTEGER DEFAULT 0
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS debates (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user1_id INTEGER NOT NULL,
+                user2_id INTEGER NOT NULL,
+                topic TEXT NOT NULL,
+                log TEXT NOT NULL,
+                winner INTEGER,
+                timestamp DATETIME NOT NULL,
+                FOREIGN KEY (user1_id) REFERENCES users (id),
+                FOREIGN KEY (user2_id) REFERENCES users (id),
+                FOREIGN KEY (winner) REFERENCES users (id)
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS topics (
+                id INTEGER PRIMARY KEY,
+                topic_text TEXT NOT NULL
+            )
+            '''
+        ],
+        postgres=[
+            '''
+            CREATE TABLE IF NOT EXISTS users (
+                id SERIAL PRIMARY KEY,
+                username VARCHAR(255) UNIQUE NOT NULL,
+                password_hash VARCHAR(255) NOT NULL,
+                mmr INTEGER DEFAULT 1000,
+                user_class INTEGER DEFAULT 0
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS debates (
+                id SERIAL PRIMARY KEY,
+                user1_id INTEGER NOT NULL,
+                user2_id INTEGER NOT NULL,
+                topic TEXT NOT NULL,
+                log TEXT NOT NULL,
+                winner INTEGER,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user1_id) REFERENCES users (id),
+                FOREIGN KEY (user2_id) REFERENCES users (id),
+                FOREIGN KEY (winner) REFERENCES users (id)
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS topics (
+                id SERIAL PRIMARY KEY,
+                topic_text TEXT NOT NULL
+            )
+            '''
+        ]),
+
+    Migration(2, 'Create debate_messages table for appended turns',
+        sqlite=[
+            '''
+            CREATE TABLE IF NOT EXISTS debate_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                debate_id INTEGER NOT NULL,
+                sender_id INTEGER NOT NULL,
+                sender_username TEXT,
+                content TEXT NOT NULL,
+                turn_number INTEGER,
+                timestamp TEXT NOT NULL,
+                FOREIGN KEY (debate_id) REFERENCES debates (id) ON DELETE CASCADE
+            )
+            ''',
+            'CREATE INDEX IF NOT EXISTS idx_debate_messages_debate ON debate_messages (debate_id, id)'
+        ],
+        postgres=[
+            '''
+            CREATE TABLE IF NOT EXISTS debate_messages (
+                id SERIAL PRIMARY KEY,
+                debate_id INTEGER NOT NULL,
+                sender_id INTEGER NOT NULL,
+                sender_username VARCHAR(255),
+                content TEXT NOT NULL,
+                turn_number INTEGER,
+                timestamp TEXT NOT NULL,
+                FOREIGN KEY (debate_id) REFERENCES debates (id) ON DELETE CASCADE
+            )
+            ''',
+            'CREATE INDEX IF NOT EXISTS idx_debate_messages_debate ON debate_messages (debate_id, id)'
+        ]),
+
+    Migration(3, 'Index debates by participant and by time',
+        sqlite=[
+            'CREATE INDEX IF NOT EXISTS idx_debates_user1_timestamp ON debates (user1_id, timestamp)',
+            'CREATE INDEX IF NOT EXISTS idx_debates_user2_timestamp ON debates (user2_id, timestamp)',
+            'CREATE INDEX IF NOT EXISTS idx_debates_timestamp ON debates (timestamp, id)'
+        ]),
+
+    Migration(4, 'Create debate_sessions table for live session checkpoints',
+        sqlite=[
+            '''
+            CREATE TABLE IF NOT EXISTS debate_sessions (
+                debate_id INTEGER PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                FOREIGN KEY (debate_id) REFERENCES debates (id) ON DELETE CASCADE
+            )
+            '''
+        ]),
+
+    Migration(5, 'Add compressed archive column for finished debate logs',
+        sqlite=['ALTER TABLE debates ADD COLUMN log_archive BLOB'],
+        postgres=['ALTER TABLE debates ADD COLUMN IF NOT EXISTS log_archive BYTEA']),
+
+    Migration(6, 'Record when each debate ended',
+        sqlite=[
+            'ALTER TABLE debates ADD COLUMN ended_at TEXT',
+            # Debates finished before this column existed have a log or a winner
+            """UPDATE debates SET ended_at = timestamp
+               WHERE log_archive IS NOT NULL OR log != '' OR winner IS NOT NULL"""
+        ],
+        postgres=[
+            'ALTER TABLE debates ADD COLUMN IF NOT EXISTS ended_at TEXT',
+            """UPDATE debates SET ended_at = CAST(timestamp AS TEXT)
+               WHERE log_archive IS NOT NULL OR log != '' OR winner IS NOT NULL"""
+        ]),
+]
+
+
+def get_schema_version(cursor, use_postgres):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('SELECT MAX(version) AS version FROM schema_version')
+    result = cursor.fetchone()
+    version = result['version'] if use_postgres else result[0]
+    return version or 0
+
+
+def apply_migrations(conn, use_postgres, migrations=MIGRATIONS):
+    """Apply every migration newer than the recorded schema version, each in its own transaction.
+
+    Python's sqlite3 module does not open a transaction before DDL, so on
+    SQLite each migration is wrapped in an explicit BEGIN/COMMIT; a failure
+    rolls back its statements together with its version row.
+    """
+    cursor = conn.cursor()
+    current = get_schema_version(cursor, use_postgres)
+    conn.commit()
+
+    if not use_postgres:
+        isolation_level = conn.isolation_level
+        conn.isolation_level = None  # transactions are managed explicitly below
+
+    applied = []
+    try:
+        for migration in sorted(migrations, key=lambda m: m.version):
+            if migration.version <= current:
+                continue
+
+            try:
+                if not use_postgres:
+                    cursor.execute('BEGIN')
+                for statement in migration.statements(use_postgres):
+                    cursor.execute(statement)
+                if use_postgres:
+                    cursor.execute('INSERT INTO schema_version (version, description, applied_at) VALUES (%s, %s, %s)',
+                                   (migration.version, migration.description, datetime.now().isoformat()))
+                    conn.commit()
+                else:
+                    cursor.execute('INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+                                   (migration.version, migration.description, datetime.now().isoformat()))
+                    cursor.execute('COMMIT')
+            except Exception as e:
+                if use_postgres:
+                    conn.rollback()
+                elif conn.in_transaction:
+                    cursor.execute('ROLLBACK')
+                print(f"Migration {migration.version} failed: {e}")
+                raise
+
+            print(f"Applied migration {migration.version}: {migration.description}")
+            applied.append(migration.version)
+    finally:
+        if not use_postgres:
+            conn.isolation_level = isolation_level
+
+    return applied
@@ -0,0 +1,35 @@
+class EloRating:
+    """Elo rating updates for one-on-one debates"""
+
+    def __init__(self, k_factor=32, scale=400, min_rating=0):
+        self.k_factor = k_factor
+        self.scale = scale
+        self.min_rating = min_rating
+
+    def expected_score(self, rating: float, opponent_rating: float) -> float:
+        """Probability that a player rated `rating` beats one rated `opponent_rating`"""
+        return 1 / (1 + 10 ** ((opponent_rating - rating) / self.scale))
+
+    def rate(self, winner_mmr: int, loser_mmr: int):
+        """Return the new (winner, loser) ratings after a decided debate"""
+        delta = self.k_factor * (1 - self.expected_score(winner_mmr, loser_mmr))
+        new_winner = round(winner_mmr + delta)
+        new_loser = max(round(loser_mmr - delta), self.min_rating)
+        return new_winner, new_loser
+
+    def replay(self, results, initial_mmr=1000):
+        """Recompute ratings from scratch over (winner_id, loser_id) pairs in play order"""
+        ratings = {}
+        for winner_id, loser_id in results:
+            winner_mmr = ratings.get(winner_id, initial_mmr)
+            loser_mmr = ratings.get(loser_id, initial_mmr)
+            ratings[winner_id], ratings[loser_id] = self.rate(winner_mmr, loser_mmr)
+        return ratings
+
+
+if __name__ == "__main__":
+    # Batch mode: python rating.py replays every decided debate and rewrites MMR
+    from database import Database
+
+    ratings = Database().recompute_ratings()
+    print(f"Recomputed MMR for {len(ratings)} users")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from async_database import AsyncDatabase
+from database import Database
+from debate_logic import DebateManager
+
+
+class NullSockets:
+    """Websocket manager stand-in that accepts and discards every frame"""
+
+    async def send_to_user(self, user_id, message):
+        return True
+
+    async def send_encoded_to_user(self, user_id, frame):
+        return True
+
+
+class NullDatabase:
+    """Database stand-in for the memory measurement; every call succeeds and returns None"""
+
+    async def get_user_by_id(self, user_id):
+        return {'id': user_id, 'username': f"user{user_id}"}
+
+    def __getattr__(self, name):
+        async def ignore(*args, **kwargs):
+            return None
+        return ignore
+
+
+async def measure_session_memory(session_count=10000, turns=6):
+    """Play session_count debates to their end and report traced memory before and after eviction"""
+    manager = DebateManager(NullSockets(), NullDatabase())
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    for debate_id in range(session_count):
+        await manager.create_debate_session(debate_id, 2 * debate_id + 1, 2 * debate_id + 2, 'Benchmark topic')
+        session = manager.active_debates[debate_id]
+        session.cancel_timer()
+        session.phase = 'debate'
+        for turn in range(turns - 1):
+            await session.handle_message(session.current_turn, 'An argument of typical length. ' * 10)
+    live = tracemalloc.get_traced_memory()[0]
+    report = manager.get_memory_report()
+
+    for session in list(manager.active_debates.values()):
+        await session.handle_message(session.current_turn, 'Closing argument.')
+    ended = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    await manager.stop()
+
+    return {
+        'sessions': session_count,
+        'live_bytes_per_session': (live - baseline) / session_count,
+        'live_report': report,
+        'retained_after_end_bytes': ended - baseline,
+        'active_after_end': len(manager.active_debates)
+    }
+
+
+async def measure_restore_time(session_count=10000):
+    """Checkpoint session_count live debates into a fresh SQLite database, then time restore_sessions"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'restore.db')
+        database = AsyncDatabase(Database(path))
+        manager = DebateManager(NullSockets(), database)
+
+        def insert_debates(cursor):
+            for index in range(session_count):
+                cursor.execute('''
+                    INSERT INTO debates (user1_id, user2_id, topic, log, timestamp)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (2 * index + 1, 2 * index + 2, 'Benchmark topic', '', datetime.now().isoformat()))
+            return cursor.lastrowid
+
+        last_id = database.database.execute_write(insert_debates)
+        debate_ids = range(last_id - session_count + 1, last_id + 1)
+        await asyncio.gather(*(manager.create_debate_session(debate_id, 2 * index + 1, 2 * index + 2, 'Benchmark topic')
+                               for index, debate_id in enumerate(debate_ids)))
+        # A third of the sessions are mid-debate with a stored message
+        for session in list(manager.active_debates.values())[:session_count // 3]:
+            session.cancel_timer()
+            await session.start_debate_phase()
+            await session.handle_message(session.current_turn, 'An argument of typical length. ' * 10)
+        await manager.stop()
+        database.shutdown()
+
+        # As after a restart: new database handle, manager and timer wheel
+        database = AsyncDatabase(Database(path))
+        manager = DebateManager(NullSockets(), database)
+        start = time.perf_counter()
+        restored = await manager.restore_sessions()
+        elapsed = time.perf_counter() - start
+        await manager.stop()
+        database.shutdown()
+
+    return {
+        'sessions': session_count,
+        'restored': restored,
+        'restore_seconds': elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure debate session memory and restore time')
+    parser.add_argument('measurement', choices=['memory', 'restore'],
+                        help='memory: bytes per live session and what remains after they end; '
+                             'restore: time to restore checkpointed sessions at startup')
+    parser.add_argument('--sessions', type=int, default=10000)
+    args = parser.parse_args()
+
+    measure = measure_restore_time if args.measurement == 'restore' else measure_session_memory
+    # Sessions print every start and end; keep them out of the output
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        result = asyncio.run(measure(args.sessions))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
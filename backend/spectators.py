@@ -0,0 +1,150 @@
+import asyncio
+import os
+from typing import Dict
+
+
+# Writer tasks and close handshakes still running; the loop only keeps weak references to tasks
+background_tasks = set()
+
+
+def keep_task(task):
+    background_tasks.add(task)
+    task.add_done_callback(task_done)
+    return task
+
+
+def task_done(task):
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Error in spectator task: {task.exception()}")
+
+
+class SpectatorChannel:
+    """Bounded outbound buffer and writer task for one spectator connection"""
+
+    def __init__(self, websocket, max_pending=64):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.closed = False
+        self.send_error = None  # set when a write to the websocket raised
+        self.sent = 0
+        # Audience.finish() forgets the channel while its queue drains
+        self.task = keep_task(asyncio.get_running_loop().create_task(self.run()))
+
+    def offer(self, frame: str) -> bool:
+        """Queue an encoded frame without waiting; False if the spectator is closed or too far behind"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def run(self):
+        try:
+            while True:
+                frame = await self.queue.get()
+                if frame is None:
+                    return
+                await self.websocket.send(frame)
+                self.sent += 1
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            # Connection went away; the audience drops this channel on its next publish
+            self.send_error = e
+        finally:
+            self.closed = True
+
+    def finish(self):
+        """Stop after the frames already queued have been written"""
+        if not self.offer(None):
+            self.close()
+
+    def close(self, drop=False):
+        self.closed = True
+        self.task.cancel()
+        if drop:
+            # 1013: try again later
+            keep_task(asyncio.ensure_future(self.close_websocket(1013, 'Spectator too slow')))
+
+    async def close_websocket(self, code, reason):
+        try:
+            await self.websocket.close(code, reason)
+        except Exception:
+            pass
+
+
+class Audience:
+    """Spectators of one debate; each event is encoded once by the caller and queued to everyone.
+
+    Every spectator has its own bounded queue and writer task, so publishing
+    never waits on a socket. A spectator whose queue is full is dropped
+    rather than slowing down the debate; one whose connection failed is
+    removed and counted separately.
+    """
+
+    def __init__(self, max_spectators=None, max_pending=None):
+        self.max_spectators = max_spectators if max_spectators is not None else int(os.getenv('SPECTATOR_LIMIT', '500'))
+        self.max_pending = max_pending if max_pending is not None else int(os.getenv('SPECTATOR_MAX_PENDING', '64'))
+        self.channels: Dict[object, SpectatorChannel] = {}  # websocket -> channel
+
+        # Statistics
+        self.published = 0
+        self.dropped = 0  # fell too far behind
+        self.failed = 0  # a send to the connection raised
+
+    def __len__(self):
+        return len(self.channels)
+
+    def add(self, websocket) -> bool:
+        if websocket in self.channels:
+            return True
+        if len(self.channels) >= self.max_spectators:
+            return False
+        self.channels[websocket] = SpectatorChannel(websocket, self.max_pending)
+        return True
+
+    def remove(self, websocket) -> bool:
+        channel = self.channels.pop(websocket, None)
+        if channel:
+            channel.close()
+            return True
+        return False
+
+    def send(self, websocket, frame: str) -> bool:
+        """Queue a frame to one spectator, e.g. the catch-up state after subscribing"""
+        channel = self.channels.get(websocket)
+        return channel.offer(frame) if channel else False
+
+    def publish(self, frame: str):
+        """Queue an already-encoded frame to every spectator, dropping any that cannot keep up"""
+        if not self.channels:
+            return
+        self.published += 1
+        rejected = [websocket for websocket, channel in self.channels.items() if not channel.offer(frame)]
+        for websocket in rejected:
+            channel = self.channels.pop(websocket)
+            if channel.send_error is not None:
+                channel.close()
+                self.failed += 1
+                print(f"Removed spectator whose connection failed: {channel.send_error}")
+            else:
+                channel.close(drop=True)
+                self.dropped += 1
+                print(f"Dropped spectator that fell {self.max_pending} frames behind")
+
+    def finish(self):
+        """Let every spectator drain its queue, then release them all"""
+        for channel in self.channels.values():
+            channel.finish()
+        self.channels = {}
+
+    def get_stats(self) -> dict:
+        return {
+            'spectators': len(self.channels),
+            'published': self.published,
+            'dropped': self.dropped,
+            'failed': self.failed
+        }
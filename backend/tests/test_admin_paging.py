@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+
+from database import Database
+
+
+def read_all(get_page, limit, **kwargs):
+    rows, cursor, pages = [], None, 0
+    while True:
+        page, cursor = get_page(cursor=cursor, limit=limit, **kwargs)
+        rows.extend(page)
+        pages += 1
+        if cursor is None:
+            return rows, pages
+
+
+def test_user_pages_cover_every_user_once():
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, 'test.db'))
+        for index in range(25):
+            database.create_user(f"user{index}", 'unused')
+
+        rows, pages = read_all(database.get_users_page, 7)
+        ids = [row['id'] for row in rows]
+        assert ids == sorted(ids) and len(ids) == len(set(ids)) == 25
+        assert pages == 4
+
+        # A page that ends exactly on the last row has no next cursor
+        rows, cursor = database.get_users_page(limit=25)
+        assert len(rows) == 25 and cursor is None
+        database.close()
+
+
+def test_debate_pages_break_timestamp_ties_by_id():
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, 'test.db'))
+        user1_id = database.create_user('first', 'unused')
+        user2_id = database.create_user('second', 'unused')
+
+        def insert(cursor):
+            # Three debates per timestamp, so page boundaries fall inside ties
+            for index in range(12):
+                cursor.execute('''
+                    INSERT INTO debates (user1_id, user2_id, topic, log, timestamp)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (user1_id, user2_id, f"Topic {index}", '', f"2026-01-01T00:00:0{index // 3}"))
+
+        database.execute_write(insert)
+
+        rows, _ = read_all(database.get_debates_page, 5, fields=['id', 'user1_name'])
+        keys = [(row['timestamp'], row['id']) for row in database.get_debates_page(limit=100)[0]]
+        assert keys == sorted(keys, reverse=True)
+        assert [row['id'] for row in rows] == [debate_id for _, debate_id in keys]
+        # Only the requested fields come back, even though the key columns were read
+        assert all(set(row) == {'id', 'user1_name'} for row in rows)
+        assert rows[0]['user1_name'] == 'first'
+        database.close()
+
+
+def test_debate_page_assembles_logs_only_when_asked():
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, 'test.db'))
+        user1_id = database.create_user('first', 'unused')
+        user2_id = database.create_user('second', 'unused')
+        debate_id = database.create_debate(user1_id, user2_id, 'Topic')
+        database.append_debate_message(debate_id, {
+            'sender_id': user1_id,
+            'sender_username': 'first',
+            'content': 'Opening argument',
+            'turn_number': 1,
+            'timestamp': '2026-01-01T00:00:00'
+        })
+
+        rows, _ = database.get_debates_page()
+        assert 'log' not in rows[0]
+
+        rows, _ = database.get_debates_page(fields=['id', 'log'])
+        assert [message['content'] for message in json.loads(rows[0]['log'])] == ['Opening argument']
+        database.close()
@@ -0,0 +1,51 @@
+import asyncio
+import os
+import tempfile
+import time
+
+from async_database import AsyncDatabase
+from database import Database
+
+
+def test_close_waits_for_running_and_queued_queries():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'test.db')
+
+        async def run():
+            database = AsyncDatabase(Database(path), max_workers=2)
+
+            def slow_create(index):
+                time.sleep(0.05)
+                return database.database.create_topic(f"Topic {index}")
+
+            pending = [asyncio.ensure_future(database.run(slow_create, index)) for index in range(6)]
+            await asyncio.sleep(0.01)  # some are running, the rest queued
+            await database.close()
+            return await asyncio.gather(*pending)
+
+        topic_ids = asyncio.run(run())
+        assert all(topic_ids)
+
+        database = Database(path)
+        topics = {topic['topic_text'] for topic in database.get_all_topics()}
+        assert {f"Topic {index}" for index in range(6)} <= topics
+        database.close()
+
+
+def test_close_does_not_block_the_loop():
+    with tempfile.TemporaryDirectory() as directory:
+        async def run():
+            database = AsyncDatabase(Database(os.path.join(directory, 'test.db')), max_workers=1)
+            busy = asyncio.ensure_future(database.run(time.sleep, 0.2))
+            ticks = 0
+
+            async def count():
+                nonlocal ticks
+                while not busy.done():
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            await asyncio.gather(database.close(), count())
+            return ticks
+
+        assert asyncio.run(run()) > 5
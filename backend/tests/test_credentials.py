@@ -0,0 +1,69 @@
+import asyncio
+import hashlib
+
+from credentials import CredentialService, PasswordHasher
+
+
+def fast_hasher(**settings):
+    # Small work factors keep the suite quick; the format and checks are the same
+    return PasswordHasher(scrypt_n=2 ** 8, pbkdf2_iterations=1000, **settings)
+
+
+def test_hash_round_trip():
+    for scheme in ('scrypt', 'pbkdf2_sha256'):
+        hasher = fast_hasher(scheme=scheme)
+        stored = hasher.hash('correct horse')
+        assert stored.startswith(scheme + '$')
+        assert hasher.verify('correct horse', stored) == (True, False)
+        assert hasher.verify('wrong', stored) == (False, False)
+
+
+def test_salts_differ():
+    hasher = fast_hasher()
+    assert hasher.hash('same') != hasher.hash('same')
+
+
+def test_legacy_sha256_verifies_and_needs_rehash():
+    hasher = fast_hasher()
+    legacy = hashlib.sha256(b'passpass').hexdigest()
+    assert hasher.verify('passpass', legacy) == (True, True)
+    assert hasher.verify('other', legacy) == (False, True)
+
+
+def test_changed_parameters_or_scheme_need_rehash():
+    old = fast_hasher()
+    stored = old.hash('secret')
+    assert PasswordHasher(scrypt_n=2 ** 9).verify('secret', stored) == (True, True)
+    assert fast_hasher(scheme='pbkdf2_sha256').verify('secret', stored) == (True, True)
+
+
+def test_malformed_hashes_do_not_match():
+    hasher = fast_hasher()
+    for stored in ('', 'scrypt$x$y', 'scrypt$a,b,c$00$00', 'md5$1$00$00'):
+        assert hasher.verify('secret', stored) == (False, False)
+
+
+def test_service_upgrades_legacy_hash():
+    async def run():
+        service = CredentialService(fast_hasher(), max_workers=1)
+        matches, new_hash = await service.verify_password('passpass', hashlib.sha256(b'passpass').hexdigest())
+        service.shutdown()
+        return matches, new_hash
+
+    matches, new_hash = asyncio.run(run())
+    assert matches
+    assert fast_hasher().verify('passpass', new_hash) == (True, False)
+
+
+def test_unknown_user_still_runs_the_kdf():
+    async def run():
+        service = CredentialService(fast_hasher(), max_workers=1)
+        before = service.completed
+        result = await service.verify_password('anything', None)
+        ran = service.completed - before
+        service.shutdown()
+        return result, ran
+
+    result, ran = asyncio.run(run())
+    assert result == (False, None)
+    assert ran == 1
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import tempfile
+
+from async_database import AsyncDatabase
+from database import Database
+from debate_logic import DebateManager
+
+
+class Sockets:
+    async def send_to_user(self, user_id, message):
+        return True
+
+    async def send_encoded_to_user(self, user_id, frame):
+        return True
+
+
+class FailingEnd:
+    """AsyncDatabase wrapper whose mark_debate_ended always fails"""
+
+    def __init__(self, async_database):
+        self.async_database = async_database
+        self.database = async_database.database
+
+    async def mark_debate_ended(self, debate_id):
+        raise RuntimeError('database unavailable')
+
+    def __getattr__(self, name):
+        return getattr(self.async_database, name)
+
+
+def play_to_end(database):
+    async def run():
+        manager = DebateManager(Sockets(), database)
+        user1 = database.database.create_user('alice', password_hash='x')
+        user2 = database.database.create_user('bob', password_hash='x')
+        debate_id = database.database.create_debate(user1, user2, 'Topic')
+        await manager.create_debate_session(debate_id, user1, user2, 'Topic')
+        session = manager.active_debates[debate_id]
+        session.cancel_timer()
+        session.phase = 'debate'
+        await session.start_turn()
+        while session.phase != 'ended':
+            await session.handle_message(session.current_turn, 'argument')
+        await manager.stop()
+        return manager, debate_id
+
+    return asyncio.run(run())
+
+
+def make_database(directory):
+    return AsyncDatabase(Database(os.path.join(directory, 'test.db')), max_workers=2)
+
+
+def test_ended_debate_is_persisted_and_evicted():
+    with tempfile.TemporaryDirectory() as directory:
+        database = make_database(directory)
+        manager, debate_id = play_to_end(database)
+
+        assert debate_id not in manager.active_debates
+        assert database.database.get_debate_by_id(debate_id)['finished']
+        assert database.database.load_session_states() == []
+        database.shutdown()
+
+
+def test_session_is_kept_when_end_cannot_be_persisted():
+    with tempfile.TemporaryDirectory() as directory:
+        database = make_database(directory)
+        manager, debate_id = play_to_end(FailingEnd(database))
+
+        # Still guarded in memory, and not marked finished in the database
+        assert manager.active_debates[debate_id].phase == 'ended'
+        assert not database.database.get_debate_by_id(debate_id)['finished']
+        database.shutdown()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+from database import Database
+
+
+def make_debate(directory):
+    database = Database(os.path.join(directory, 'test.db'))
+    winner = database.create_user('winner', 'unused')
+    loser = database.create_user('loser', 'unused')
+    debate_id = database.create_debate(winner, loser, 'Topic')
+    return database, debate_id, winner, loser
+
+
+def mmr(database, user_id):
+    return database.fetch_user_by_id(user_id)['mmr']
+
+
+def test_result_is_applied_once():
+    with tempfile.TemporaryDirectory() as directory:
+        database, debate_id, winner, loser = make_debate(directory)
+
+        ratings = database.record_debate_result(debate_id, winner)
+        assert ratings[winner] > 1000 > ratings[loser]
+        assert ratings[winner] + ratings[loser] == 2000
+
+        # Setting the winner again, either way round, changes nothing
+        assert database.record_debate_result(debate_id, winner) is None
+        assert database.record_debate_result(debate_id, loser) is None
+        assert mmr(database, winner) == ratings[winner]
+        assert mmr(database, loser) == ratings[loser]
+        database.close()
+
+
+def test_non_participant_or_unknown_debate_is_rejected():
+    with tempfile.TemporaryDirectory() as directory:
+        database, debate_id, winner, loser = make_debate(directory)
+        outsider = database.create_user('outsider', 'unused')
+
+        assert database.record_debate_result(debate_id, outsider) is None
+        assert database.record_debate_result(debate_id + 100, winner) is None
+        assert mmr(database, winner) == 1000
+        database.close()
+
+
+def test_recompute_matches_incremental_ratings():
+    with tempfile.TemporaryDirectory() as directory:
+        database, debate_id, winner, loser = make_debate(directory)
+        rematch = database.create_debate(loser, winner, 'Topic')
+        database.record_debate_result(debate_id, winner)
+        database.record_debate_result(rematch, loser)
+        incremental = {winner: mmr(database, winner), loser: mmr(database, loser)}
+
+        recomputed = database.recompute_ratings()
+        assert {user_id: recomputed[user_id] for user_id in incremental} == incremental
+        database.close()
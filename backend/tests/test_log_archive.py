@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+import zlib
+
+import pytest
+
+from database import Database
+from log_archive import CURRENT_FORMAT, decode_log, encode_log, generate_corpus
+
+
+MESSAGES = [
+    {'type': 'message', 'sender_id': 1, 'sender_username': 'alice', 'content': 'First argument ' * 20,
+     'timestamp': '2026-01-01T00:00:00', 'turn_number': 1},
+    {'type': 'message', 'sender_id': 2, 'sender_username': 'bob', 'content': 'Rebuttal — café',
+     'timestamp': '2026-01-01T00:01:00', 'turn_number': 1}
+]
+
+
+def test_round_trip_from_messages_and_from_json_text():
+    for log in (MESSAGES, json.dumps(MESSAGES)):
+        encoded = encode_log(log)
+        assert encoded[0] == CURRENT_FORMAT
+        assert json.loads(decode_log(encoded)) == MESSAGES
+
+
+def test_compresses_repetitive_text():
+    assert len(encode_log(MESSAGES)) < len(json.dumps(MESSAGES)) / 2
+
+
+def test_accepts_memoryview_and_empty_input():
+    assert json.loads(decode_log(memoryview(encode_log(MESSAGES)))) == MESSAGES
+    assert decode_log(b'') == ''
+    assert json.loads(decode_log(encode_log(''))) == []
+
+
+def test_unknown_version_is_rejected():
+    with pytest.raises(ValueError):
+        decode_log(bytes([CURRENT_FORMAT + 1]) + zlib.compress(b'[]'))
+
+
+def test_recompress_archives_only_ended_debates_and_reads_stay_the_same():
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, 'test.db'))
+        generate_corpus(database, debate_count=5, turns=2)
+        live_id = database.create_debate(1, 2, 'Live')
+        database.append_debate_message(live_id, MESSAGES[0])
+
+        before = {debate['id']: json.loads(debate['log']) for debate in database.get_all_debates()}
+        assert database.recompress_debate_logs(batch_size=2) == 5
+        after = {debate['id']: json.loads(debate['log']) for debate in database.get_all_debates()}
+
+        assert after == before
+        stats = database.get_log_storage_stats()
+        assert stats['archived'] == 5
+        assert stats['messages'] == 1  # the live debate keeps appending
+        assert json.loads(database.get_debate_log(live_id)) == [MESSAGES[0]]
+        database.close()
@@ -0,0 +1,159 @@
+import asyncio
+import random
+import threading
+from queue import Queue
+
+import pytest
+
+import matchmaking_numpy
+from matchmaking import MatchmakingQueue
+from matchmaking_shards import ShardedMatchmakingQueue
+
+
+def make_queue(players, now=1000.0):
+    """Queue holding (user_id, mmr, waited_seconds) players, read at a fixed clock"""
+    queue = MatchmakingQueue()
+    queue.clock = lambda: now
+    for user_id, mmr, waited in sorted(players, key=lambda player: -player[2]):
+        queue.add_to_queue(user_id, mmr, {}, queue_time=now - waited)
+    return queue
+
+
+def random_players(seed, count=200):
+    rng = random.Random(seed)
+    return [(user_id, rng.randint(600, 2400), rng.uniform(0, 240)) for user_id in range(1, count + 1)]
+
+
+def is_valid(queue, pair, now):
+    user1_id, user2_id = pair
+    wait_time = max(queue.get_wait_time(user1_id, now), queue.get_wait_time(user2_id, now))
+    return abs(queue.user_mmr[user1_id] - queue.user_mmr[user2_id]) <= queue.get_allowed_mmr_range(wait_time)
+
+
+def test_find_best_opponent_is_closest_valid_neighbour():
+    queue = make_queue([(1, 1000, 0), (2, 1080, 0), (3, 1150, 0), (4, 1400, 0)])
+
+    assert queue.find_best_opponent(1) == (2, 80)
+    assert queue.find_best_opponent(3) == (2, 70)
+    # 250 apart is outside the initial range of 100
+    assert queue.find_best_opponent(4) is None
+    assert queue.find_best_opponent(99) is None
+
+
+def test_find_match_takes_the_closest_valid_pair():
+    queue = make_queue([(1, 1000, 0), (2, 1080, 0), (3, 1150, 0), (4, 1400, 0)])
+
+    assert set(queue.find_match()) == {2, 3}
+    assert set(queue.user_mmr) == {1, 4}
+    # 1 and 4 are too far apart until one of them has waited long enough
+    assert queue.find_match() is None
+
+
+def test_batch_plan_pairs_at_least_as_many_as_greedy():
+    for seed in range(5):
+        players = random_players(seed)
+        now = 1000.0
+
+        batch = make_queue(players, now)
+        planned = batch.plan_batch_matches(now)
+        assert all(is_valid(batch, pair, now) for pair in planned)
+        paired = [user_id for pair in planned for user_id in pair]
+        assert len(paired) == len(set(paired))
+
+        greedy = make_queue(players, now)
+        greedy_pairs = []
+        while True:
+            pair = greedy.find_match()
+            if pair is None:
+                break
+            greedy_pairs.append(pair)
+
+        assert len(planned) >= len(greedy_pairs)
+
+
+def test_find_matches_removes_matched_players():
+    queue = make_queue(random_players(7))
+    matches = queue.find_matches()
+
+    assert matches
+    for user1_id, user2_id in matches:
+        assert user1_id not in queue.user_mmr and user2_id not in queue.user_mmr
+    assert len(queue.by_mmr) == len(queue.by_time) == len(queue.waiting_users)
+
+
+@pytest.mark.skipif(not matchmaking_numpy.HAS_NUMPY, reason='NumPy is not installed')
+def test_numpy_plan_matches_python_plan():
+    for seed in range(5):
+        now = 1000.0
+        queue = make_queue(random_players(seed, count=500), now)
+        assert matchmaking_numpy.plan_batch_matches(queue, now) == queue.plan_batch_matches(now)
+
+
+class HungWorker:
+    """Process stand-in that ignores the stop message until it is terminated"""
+
+    name = 'matchmaking-band-0'
+
+    def __init__(self):
+        self.terminated = threading.Event()
+
+    def join(self, timeout=None):
+        self.terminated.wait(timeout)
+
+    def is_alive(self):
+        return not self.terminated.is_set()
+
+    def terminate(self):
+        self.terminated.set()
+
+
+def test_shard_stop_terminates_hung_workers_without_blocking_the_loop():
+    async def run():
+        shards = ShardedMatchmakingQueue([1000])
+        shards.stop_timeout = 0.2
+        worker = HungWorker()
+        shards.inboxes = [Queue()]
+        shards.processes = [worker]
+
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        await shards.stop()
+        ticker.cancel()
+        return worker, shards, ticks
+
+    worker, shards, ticks = asyncio.run(run())
+    assert worker.terminated.is_set()
+    assert shards.processes == [] and shards.inboxes == []
+    # The loop kept running while the join waited out its timeout
+    assert ticks >= 5
+
+
+@pytest.mark.skipif(not matchmaking_numpy.HAS_NUMPY, reason='NumPy is not installed')
+def test_numpy_arrays_follow_queue_changes():
+    now = 1000.0
+    rng = random.Random(11)
+    queue = make_queue(random_players(1, count=300), now)
+    queue.matcher_backend = 'numpy'
+    queue.numpy_min_queue = 2
+
+    for sweep in range(5):
+        queue.find_matches()
+        for user_id in rng.sample(sorted(queue.user_mmr), min(20, len(queue.user_mmr))):
+            queue.remove_from_queue(user_id)
+        for offset in range(40):
+            user_id = 1000 + sweep * 100 + offset
+            queue.add_to_queue(user_id, rng.randint(600, 2400), {}, queue_time=now - rng.uniform(0, 240))
+
+        arrays = queue.arrays
+        assert arrays.user_ids.tolist() == [user_id for _, user_id in queue.by_mmr]
+        assert arrays.mmrs.tolist() == [mmr for mmr, _ in queue.by_mmr]
+        assert arrays.queue_times.tolist() == [queue.waiting_users[user_id]['queue_time']
+                                               for _, user_id in queue.by_mmr]
+        assert matchmaking_numpy.plan_batch_matches(queue, now) == queue.plan_batch_matches(now)
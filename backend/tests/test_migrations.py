@@ -0,0 +1,49 @@
+import sqlite3
+
+import pytest
+
+from migrations import MIGRATIONS, Migration, apply_migrations
+
+
+def tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def schema_version(conn):
+    return conn.execute('SELECT MAX(version) FROM schema_version').fetchone()[0]
+
+
+def test_applies_every_migration_once():
+    conn = sqlite3.connect(':memory:')
+    applied = apply_migrations(conn, False)
+    assert applied == [migration.version for migration in MIGRATIONS]
+    assert {'users', 'debates', 'topics', 'debate_messages', 'debate_sessions'} <= tables(conn)
+    assert schema_version(conn) == MIGRATIONS[-1].version
+
+    assert apply_migrations(conn, False) == []
+
+
+def test_failed_migration_rolls_back_its_statements_and_version():
+    conn = sqlite3.connect(':memory:')
+    apply_migrations(conn, False)
+    broken = Migration(1000, 'Half-applied', sqlite=['CREATE TABLE partial (x)', 'CREATE TABLE partial (y)'])
+
+    with pytest.raises(sqlite3.OperationalError):
+        apply_migrations(conn, False, MIGRATIONS + [broken])
+
+    assert 'partial' not in tables(conn)
+    assert schema_version(conn) == MIGRATIONS[-1].version
+
+
+def test_failed_alter_can_be_retried():
+    conn = sqlite3.connect(':memory:')
+    apply_migrations(conn, False)
+    migration = Migration(1000, 'Add column then fail', sqlite=[
+        'ALTER TABLE debates ADD COLUMN extra TEXT',
+        'SELECT no_such_column FROM debates'
+    ])
+    with pytest.raises(sqlite3.OperationalError):
+        apply_migrations(conn, False, MIGRATIONS + [migration])
+
+    fixed = Migration(1000, 'Add column', sqlite=['ALTER TABLE debates ADD COLUMN extra TEXT'])
+    assert apply_migrations(conn, False, MIGRATIONS + [fixed]) == [1000]
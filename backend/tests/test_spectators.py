@@ -0,0 +1,54 @@
+import asyncio
+
+from spectators import Audience
+
+
+class Spectator:
+    def __init__(self, fail=False, block=False):
+        self.fail = fail
+        self.block = block
+        self.frames = []
+        self.close_code = None
+
+    async def send(self, frame):
+        if self.fail:
+            raise ConnectionError('connection reset')
+        if self.block:
+            await asyncio.Event().wait()
+        self.frames.append(frame)
+
+    async def close(self, code, reason):
+        self.close_code = code
+
+
+def test_slow_and_failed_spectators_are_told_apart():
+    async def run():
+        audience = Audience(max_spectators=10, max_pending=4)
+        healthy, slow, broken = Spectator(), Spectator(block=True), Spectator(fail=True)
+        for websocket in (healthy, slow, broken):
+            assert audience.add(websocket)
+
+        for index in range(8):
+            audience.publish(f"frame {index}")
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        return audience, healthy, slow, broken
+
+    audience, healthy, slow, broken = asyncio.run(run())
+    stats = audience.get_stats()
+    assert stats['dropped'] == 1 and stats['failed'] == 1
+    assert list(audience.channels) == [healthy]
+    assert healthy.frames == [f"frame {index}" for index in range(8)]
+    # Only the spectator that fell behind is asked to come back later
+    assert slow.close_code == 1013
+    assert broken.close_code is None
+
+
+def test_spectator_limit():
+    async def run():
+        audience = Audience(max_spectators=2, max_pending=4)
+        results = [audience.add(Spectator()) for _ in range(3)]
+        audience.finish()
+        return results
+
+    assert asyncio.run(run()) == [True, True, False]
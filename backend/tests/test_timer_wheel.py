@@ -0,0 +1,75 @@
+import asyncio
+import random
+
+from timer_wheel import TimerWheel
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def fired_order(wheel, until_tick):
+    order = []
+    for handle in wheel.advance(until_tick):
+        order.append((handle.tick, handle.args[0]))
+    return order
+
+
+def test_timers_fall_due_in_tick_order_across_levels():
+    clock = FakeClock(1000.0)
+    # Small wheel so delays cover level 0, the higher levels and the overflow set
+    wheel = TimerWheel(tick=1.0, slots=4, levels=2, clock=clock)
+    rng = random.Random(3)
+    delays = [rng.randint(1, 40) for _ in range(200)]
+    for index, delay in enumerate(delays):
+        wheel.call_later(delay, lambda index: None, index)
+
+    order = []
+    for tick in range(wheel.current_tick + 1, wheel.current_tick + 42):
+        due = fired_order(wheel, tick)
+        assert all(due_tick == tick for due_tick, _ in due)
+        order.extend(index for _, index in due)
+
+    assert len(wheel) == 0
+    assert sorted(order) == list(range(len(delays)))
+    assert [delays[index] for index in order] == sorted(delays)
+
+
+def test_cancelled_timers_never_fall_due():
+    clock = FakeClock(0.0)
+    wheel = TimerWheel(tick=1.0, slots=4, levels=2, clock=clock)
+    kept = wheel.call_later(3, lambda name: None, 'kept')
+    dropped = wheel.call_later(20, lambda name: None, 'dropped')
+    dropped.cancel()
+
+    assert len(wheel) == 1
+    assert [handle.args[0] for handle in wheel.advance(30)] == ['kept']
+    assert kept.bucket is None
+
+
+def test_start_keeps_a_single_driver_and_stop_waits_for_it():
+    async def run():
+        wheel = TimerWheel(tick=0.01)
+        fired = []
+
+        wheel.start()
+        driver = wheel._driver
+        wheel.start()
+        assert wheel._driver is driver
+
+        await wheel.stop()
+        assert driver.done() and wheel._driver is None
+
+        # Scheduling after a stop starts exactly one new driver
+        wheel.call_later(0.02, fired.append, 'first')
+        wheel.call_later(0.01, fired.append, 'second')
+        assert wheel._driver is not driver and not wheel._driver.done()
+        await asyncio.sleep(0.1)
+        await wheel.stop()
+        return fired
+
+    assert asyncio.run(run()) == ['second', 'first']
@@ -0,0 +1,34 @@
+import os
+import tempfile
+
+from database import Database
+
+
+def test_topic_changes_reload_the_pool():
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, 'test.db'))
+        database.get_random_topic()
+        size = database.get_topic_pool_stats()['size']
+
+        topic_id = database.create_topic('A brand new topic')
+        assert database.get_topic_pool_stats()['size'] == size
+        database.get_random_topic()
+        assert database.get_topic_pool_stats()['size'] == size + 1
+
+        database.delete_topic(topic_id)
+        database.get_random_topic()
+        assert database.get_topic_pool_stats()['size'] == size
+        database.close()
+
+
+def test_deleted_users_are_forgotten():
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, 'test.db'))
+        user1_id = database.create_user('first', 'unused')
+        user2_id = database.create_user('second', 'unused')
+        database.get_random_topic([user1_id, user2_id])
+        assert database.get_topic_pool_stats()['tracked_users'] == 2
+
+        database.delete_user(user1_id)
+        assert database.get_topic_pool_stats()['tracked_users'] == 1
+        database.close()
@@ -0,0 +1,196 @@
+import asyncio
+import math
+import time
+from typing import List, Optional
+
+
+class TimerHandle:
+    """A scheduled callback; cancel() is O(1)"""
+
+    __slots__ = ('tick', 'callback', 'args', 'cancelled', 'bucket')
+
+    def __init__(self, tick, callback, args):
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self.bucket = None  # the wheel slot currently holding this timer
+
+    def cancel(self):
+        self.cancelled = True
+        if self.bucket is not None:
+            self.bucket.discard(self)
+            self.bucket = None
+
+
+class TimerWheel:
+    """Hierarchical timing wheel shared by every debate session.
+
+    Level 0 has one slot per tick; each higher level covers `slots` times
+    the span of the one below, and its slots are cascaded down as time
+    reaches them. One task drives the wheel and sleeps until the next
+    occupied tick, so wake-ups follow the number of due timers rather than
+    the number of sessions. Callbacks may be plain functions or coroutine
+    functions; coroutines are started as tasks.
+    """
+
+    def __init__(self, tick=0.05, slots=64, levels=4, clock=time.monotonic):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.clock = clock
+        self.wheels: List[List[set]] = [[set() for _ in range(slots)] for _ in range(levels)]
+        self.overflow = set()  # beyond the top level's span; re-placed on each top-level cascade
+        self.current_tick = int(clock() / tick)
+        self.wakeup = asyncio.Event()
+        self.sleep_until = None  # tick the driver task is sleeping until, None if indefinitely
+        self._driver = None  # the single task running run(); see start() and stop()
+        self.callback_tasks = set()  # coroutine callbacks still running; the loop only keeps weak references
+
+        # Statistics
+        self.scheduled = 0
+        self.fired = 0
+        self.wakeups = 0
+
+    def __len__(self):
+        return sum(len(bucket) for wheel in self.wheels for bucket in wheel) + len(self.overflow)
+
+    def call_later(self, delay: float, callback, *args) -> TimerHandle:
+        return self.call_at(self.clock() + delay, callback, *args)
+
+    def call_at(self, when: float, callback, *args) -> TimerHandle:
+        """Run callback(*args) once the clock reaches `when` (rounded up to the next tick)"""
+        handle = TimerHandle(math.ceil(when / self.tick), callback, args)
+        self.scheduled += 1
+        self._place(handle)
+        self.start()
+        if self.sleep_until is None or handle.tick < self.sleep_until:
+            self.wakeup.set()
+        return handle
+
+    def _place(self, handle: TimerHandle, cascading=False):
+        delta = handle.tick - self.current_tick
+        # While cascading, the current level-0 slot has yet to be processed
+        if delta < 0 or (delta == 0 and not cascading):
+            # Already due: the next level-0 slot is processed before any later one
+            delta = 1
+            handle.tick = self.current_tick + 1
+        span = self.slots
+        for level in range(self.levels):
+            if delta < span:
+                index = (handle.tick // (span // self.slots)) % self.slots
+                bucket = self.wheels[level][index]
+                break
+            span *= self.slots
+        else:
+            bucket = self.overflow
+        bucket.add(handle)
+        handle.bucket = bucket
+
+    def _cascade(self, level: int):
+        span = self.slots ** level
+        bucket = self.wheels[level][(self.current_tick // span) % self.slots]
+        if not bucket:
+            return
+        handles = list(bucket)
+        bucket.clear()
+        for handle in handles:
+            self._place(handle, cascading=True)
+
+    def advance(self, now_tick: int) -> List[TimerHandle]:
+        """Move the wheel forward to now_tick and return the timers that fell due, in tick order"""
+        due = []
+        while self.current_tick < now_tick:
+            self.current_tick += 1
+            if self.current_tick % self.slots == 0:
+                if self.current_tick % (self.slots ** self.levels) == 0 and self.overflow:
+                    handles = list(self.overflow)
+                    self.overflow.clear()
+                    for handle in handles:
+                        self._place(handle, cascading=True)
+                for level in range(self.levels - 1, 0, -1):
+                    if self.current_tick % (self.slots ** level) == 0:
+                        self._cascade(level)
+            bucket = self.wheels[0][self.current_tick % self.slots]
+            if bucket:
+                for handle in bucket:
+                    handle.bucket = None
+                due.extend(bucket)
+                bucket.clear()
+        return due
+
+    def next_due_tick(self) -> Optional[int]:
+        """Next tick the driver must wake at: an occupied level-0 slot or the next cascade"""
+        for offset in range(1, self.slots + 1):
+            tick = self.current_tick + offset
+            if self.wheels[0][tick % self.slots]:
+                return tick
+            if tick % self.slots == 0:
+                break
+        if len(self) == 0:
+            return None
+        return (self.current_tick // self.slots + 1) * self.slots
+
+    def fire(self, handle: TimerHandle):
+        if handle.cancelled:
+            # Cancelled by an earlier callback in the same batch
+            return
+        self.fired += 1
+        try:
+            result = handle.callback(*handle.args)
+            if asyncio.iscoroutine(result):
+                task = asyncio.ensure_future(result)
+                self.callback_tasks.add(task)
+                task.add_done_callback(self.callback_done)
+        except Exception as e:
+            print(f"Error in timer callback: {e}")
+
+    def callback_done(self, task):
+        self.callback_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error in timer callback: {task.exception()}")
+
+    def start(self):
+        """Start the driver task; does nothing while one is alive"""
+        if self._driver is not None and not self._driver.done():
+            return
+        try:
+            self._driver = asyncio.get_running_loop().create_task(self.run())
+        except RuntimeError:
+            # No loop yet; the first call_at made from inside one starts the driver
+            self._driver = None
+
+    async def run(self):
+        while True:
+            self.wakeup.clear()
+            for handle in self.advance(int(self.clock() / self.tick)):
+                self.fire(handle)
+
+            self.sleep_until = self.next_due_tick()
+            timeout = None
+            if self.sleep_until is not None:
+                timeout = max(self.sleep_until * self.tick - self.clock(), 0)
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeups += 1
+
+    async def stop(self):
+        """Cancel the driver and wait for it to exit, so a later start() never runs two"""
+        driver, self._driver = self._driver, None
+        if driver is None or driver.done():
+            return
+        driver.cancel()
+        try:
+            await driver
+        except asyncio.CancelledError:
+            pass
+
+    def get_stats(self) -> dict:
+        return {
+            'pending': len(self),
+            'scheduled': self.scheduled,
+            'fired': self.fired,
+            'wakeups': self.wakeups
+        }
@@ -0,0 +1,77 @@
+import random
+import threading
+import time
+from collections import deque
+
+
+class TopicPool:
+    """In-memory copy of the topics table sampled in constant time"""
+
+    def __init__(self, loader, ttl=600.0, history_size=5, max_attempts=8, max_tracked_users=50000):
+        self.loader = loader  # callable returning a list of topic texts
+        self.ttl = ttl
+        self.history_size = history_size
+        self.max_attempts = max_attempts
+        self.max_tracked_users = max_tracked_users
+
+        self._topics = []
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._recent = {}  # user_id -> deque of recently assigned topics
+
+        # Statistics
+        self.loads = 0
+
+    def invalidate(self):
+        """Force a reload from the database on the next selection"""
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        self._topics = list(self.loader())
+        self._loaded_at = time.monotonic()
+        self.loads += 1
+
+    def choose(self, user_ids=()):
+        """Pick a random topic, preferring ones none of `user_ids` has seen recently"""
+        with self._lock:
+            self._ensure_loaded()
+            if not self._topics:
+                return None
+
+            recent = set()
+            for user_id in user_ids:
+                recent.update(self._recent.get(user_id, ()))
+
+            topic = random.choice(self._topics)
+            # Rejection sampling keeps selection O(1); give up if most topics are excluded
+            attempts = 1
+            while topic in recent and attempts < self.max_attempts:
+                topic = random.choice(self._topics)
+                attempts += 1
+
+            if self.history_size:
+                for user_id in user_ids:
+                    history = self._recent.get(user_id)
+                    if history is None:
+                        if len(self._recent) >= self.max_tracked_users:
+                            # Drop the user whose history was started longest ago
+                            del self._recent[next(iter(self._recent))]
+                        history = self._recent[user_id] = deque(maxlen=self.history_size)
+                    history.append(topic)
+
+            return topic
+
+    def forget_user(self, user_id):
+        with self._lock:
+            self._recent.pop(user_id, None)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'size': len(self._topics),
+                'loads': self.loads,
+                'tracked_users': len(self._recent)
+            }
@@ -5,6 +5,8 @@ from typing import Dict, Optional
 import websockets
 from websockets.exceptions import ConnectionClosed
 
+from credentials import CredentialService
+
 class WebSocketManager:
     def __init__(self):
         self.connections: Dict[int, websockets.WebSocketServerProtocol] = {}
@@ -35,6 +37,10 @@ class WebSocketManager:
     
     async def send_to_user(self, user_id: int, message: dict) -> bool:
         """Send a message to a specific user"""
+        return await self.send_encoded_to_user(user_id, json.dumps(message))
+    
+    async def send_encoded_to_user(self, user_id: int, message_json: str) -> bool:
+        """Send an already JSON-encoded message, so one encoding can serve many recipients"""
         if user_id not in self.connections:
             print(f"No WebSocket connection for user {user_id}")
             return False
@@ -47,7 +53,6 @@ class WebSocketManager:
                 self.remove_connection(user_id)
                 return False
             
-            message_json = json.dumps(message)
             await websocket.send(message_json)
             return True
             
@@ -87,11 +92,15 @@ class WebSocketManager:
         return len([ws for ws in self.connections.values() if not ws.closed])
 
 class WebSocketHandler:
-    def __init__(self, websocket_manager, matchmaker, debate_manager, database):
+    ADMIN_PAGE_SIZE = 200
+    ADMIN_MAX_PAGE_SIZE = 1000
+    
+    def __init__(self, websocket_manager, matchmaker, debate_manager, database, credentials=None):
         self.websocket_manager = websocket_manager
         self.matchmaker = matchmaker
         self.debate_manager = debate_manager
         self.database = database
+        self.credentials = credentials or CredentialService()
     
     async def handle_connection(self, websocket, path):
         """Handle a new WebSocket connection"""
@@ -132,6 +141,7 @@ class WebSocketHandler:
             print(f"WebSocket connection error: {e}")
         finally:
             # Cleanup on disconnect
+            self.debate_manager.remove_spectator(websocket)
             if user_id:
                 self.websocket_manager.remove_connection(user_id)
                 await self.matchmaker.remove_user_from_queue(user_id)
@@ -159,8 +169,19 @@ class WebSocketHandler:
         elif message_type == 'start_debate':
             return await self.handle_start_debate(data)
         
+        elif message_type == 'spectate_debate':
+            return await self.handle_spectate_debate(data, websocket)
+        
+        elif message_type == 'stop_spectating':
+            self.debate_manager.remove_spectator(websocket)
+            return {'type': 'spectate_stopped'}
+        
+        elif message_type == 'timer_sync':
+            await self.debate_manager.resync_timer(data.get('user_id'))
+            return None
+        
         elif message_type == 'admin_get_data':
-            return await self.handle_admin_get_data(data)
+            return await self.handle_admin_get_data(data, websocket)
         
         elif message_type == 'admin_get_item':
             return await self.handle_admin_get_item(data)
@@ -171,6 +192,9 @@ class WebSocketHandler:
         elif message_type == 'admin_delete_item':
             return await self.handle_admin_delete_item(data)
         
+        elif message_type == 'admin_get_metrics':
+            return await self.handle_admin_get_metrics(data)
+        
         elif message_type == 'ping':
             return {'type': 'pong', 'timestamp': data.get('timestamp')}
         
@@ -192,7 +216,15 @@ class WebSocketHandler:
                 'error': 'Username and password are required'
             }
         
-        result = self.database.authenticate_user(username, password)
+        # Hashing runs on the credential pool; only the lookups touch the database.
+        # Unknown users are verified against a dummy hash so they take as long as a wrong password.
+        result = await self.database.get_user_credentials(username)
+        stored = result.pop('password_hash') if result is not None else None
+        matches, new_hash = await self.credentials.verify_password(password, stored)
+        if not matches:
+            result = None
+        elif new_hash:
+            await self.database.update_password_hash(result['id'], new_hash)
         
         if result is not None:
             return {
@@ -236,7 +268,8 @@ class WebSocketHandler:
                 'error': 'Password must be at least 6 characters long'
             }
         
-        user_id = self.database.create_user(username, password)
+        password_hash = await self.credentials.hash_password(password)
+        user_id = await self.database.create_user(username, password_hash=password_hash)
         
         if user_id is not None:
             return {
@@ -298,6 +331,27 @@ class WebSocketHandler:
             'message': 'Removed from matchmaking queue'
         }
     
+    async def handle_spectate_debate(self, data: dict, websocket) -> Optional[dict]:
+        """Subscribe this connection to a live debate's public events"""
+        try:
+            debate_id = int(data.get('debate_id'))
+        except (TypeError, ValueError):
+            return {
+                'type': 'spectate_response',
+                'success': False,
+                'error': 'Debate ID is required'
+            }
+        
+        if self.debate_manager.add_spectator(debate_id, websocket):
+            # The catch-up state goes out through the spectator queue, ahead of any later events
+            return None
+        return {
+            'type': 'spectate_response',
+            'success': False,
+            'debate_id': debate_id,
+            'error': 'Debate not found or spectator limit reached'
+        }
+    
     async def handle_debate_message(self, data: dict) -> dict:
         """Handle debate message submission"""
         user_id = data.get('user_id')
@@ -345,7 +399,7 @@ class WebSocketHandler:
             }
         
         # Check if debate exists in database
-        debate_info = self.database.get_debate_by_id(debate_id)
+        debate_info = await self.database.get_debate_by_id(debate_id)
         if not debate_info:
             return {
                 'type': 'start_debate_response',
@@ -361,9 +415,24 @@ class WebSocketHandler:
                 'error': 'You are not a participant in this debate'
             }
         
+        if debate_info['finished']:
+            return {
+                'type': 'start_debate_response',
+                'success': False,
+                'error': 'Debate has already ended'
+            }
+        
         # Check if debate session already exists
         existing_session = self.debate_manager.active_debates.get(debate_id)
+        if existing_session and existing_session.phase == 'ended':
+            return {
+                'type': 'start_debate_response',
+                'success': False,
+                'error': 'Debate has already ended'
+            }
         if existing_session:
+            # Deadline mode sends one timer frame per phase; catch a (re)joining debater up now
+            await existing_session.send_rejoin_state(user_id, include_log=True)
             return {
                 'type': 'start_debate_response',
                 'success': True,
@@ -393,13 +462,16 @@ class WebSocketHandler:
                 'error': 'Failed to start debate session'
             }
     
-    async def handle_admin_get_data(self, data: dict) -> dict:
-        """Handle admin request to get data"""
+    async def handle_admin_get_data(self, data: dict, websocket) -> dict:
+        """Handle admin request to get data, one keyset page at a time or streamed in chunks"""
         user_id = data.get('user_id')
         data_type = data.get('data_type')
+        cursor = data.get('cursor')
+        fields = data.get('fields')
+        stream = data.get('stream', False)
         
         # Check admin privileges
-        user_info = self.database.get_user_by_id(user_id)
+        user_info = await self.database.get_user_by_id(user_id)
         if not user_info or user_info['user_class'] <= 0:
             return {
                 'type': 'admin_data_response',
@@ -407,37 +479,71 @@ class WebSocketHandler:
                 'error': 'Admin privileges required'
             }
         
+        page_getters = {
+            'users': self.database.get_users_page,
+            'debates': self.database.get_debates_page,
+            'topics': self.database.get_topics_page
+        }
+        if data_type not in page_getters:
+            return {
+                'type': 'admin_data_response',
+                'success': False,
+                'error': 'Invalid data type'
+            }
+        
+        if cursor is not None and not isinstance(cursor, list):
+            return {
+                'type': 'admin_data_response',
+                'success': False,
+                'error': 'Invalid cursor'
+            }
+        if fields is not None and not isinstance(fields, list):
+            fields = None
+        
         try:
-            if data_type == 'users':
-                users = self.database.get_all_users()
-                return {
-                    'type': 'admin_data_response',
-                    'success': True,
-                    'data_type': 'users',
-                    'data': users
-                }
-            elif data_type == 'debates':
-                debates = self.database.get_all_debates()
-                return {
-                    'type': 'admin_data_response',
-                    'success': True,
-                    'data_type': 'debates',
-                    'data': debates
-                }
-            elif data_type == 'topics':
-                topics = self.database.get_all_topics()
+            limit = max(1, min(int(data.get('limit', self.ADMIN_PAGE_SIZE)), self.ADMIN_MAX_PAGE_SIZE))
+        except (TypeError, ValueError):
+            limit = self.ADMIN_PAGE_SIZE
+        
+        get_page = page_getters[data_type]
+        
+        try:
+            if not stream:
+                rows, next_cursor = await get_page(cursor, limit, fields)
                 return {
                     'type': 'admin_data_response',
                     'success': True,
-                    'data_type': 'topics',
-                    'data': topics
-                }
-            else:
-                return {
-                    'type': 'admin_data_response',
-                    'success': False,
-                    'error': 'Invalid data type'
+                    'data_type': data_type,
+                    'data': rows,
+                    'next_cursor': next_cursor
                 }
+            
+            # Stream every page as its own frame so neither side holds the whole table
+            chunks = 0
+            count = 0
+            while True:
+                rows, cursor = await get_page(cursor, limit, fields)
+                await websocket.send(json.dumps({
+                    'type': 'admin_data_chunk',
+                    'data_type': data_type,
+                    'chunk': chunks,
+                    'data': rows
+                }))
+                chunks += 1
+                count += len(rows)
+                if cursor is None:
+                    break
+            
+            return {
+                'type': 'admin_data_response',
+                'success': True,
+                'data_type': data_type,
+                'streamed': True,
+                'chunks': chunks,
+                'count': count
+            }
+        except ConnectionClosed:
+            raise
         except Exception as e:
             print(f"Error getting admin data: {e}")
             return {
@@ -453,7 +559,7 @@ class WebSocketHandler:
         item_id = data.get('item_id')
         
         # Check admin privileges
-        user_info = self.database.get_user_by_id(user_id)
+        user_info = await self.database.get_user_by_id(user_id)
         if not user_info or user_info['user_class'] <= 0:
             return {
                 'type': 'admin_item_response',
@@ -463,11 +569,11 @@ class WebSocketHandler:
         
         try:
             if data_type == 'user':
-                item = self.database.get_user_by_id(item_id)
+                item = await self.database.get_user_by_id(item_id)
             elif data_type == 'debate':
-                item = self.database.get_debate_by_id(item_id)
+                item = await self.database.get_debate_by_id(item_id)
             elif data_type == 'topic':
-                item = self.database.get_topic_by_id(item_id)
+                item = await self.database.get_topic_by_id(item_id)
             else:
                 return {
                     'type': 'admin_item_response',
@@ -503,7 +609,7 @@ class WebSocketHandler:
         item_data = data.get('item_data')
         
         # Check admin privileges
-        user_info = self.database.get_user_by_id(user_id)
+        user_info = await self.database.get_user_by_id(user_id)
         if not user_info or user_info['user_class'] <= 0:
             return {
                 'type': 'admin_update_response',
@@ -513,17 +619,23 @@ class WebSocketHandler:
         
         try:
             if data_type == 'user':
-                success = self.database.update_user_admin(
+                success = await self.database.update_user_admin(
                     item_data['id'],
                     item_data.get('username'),
                     item_data.get('mmr'),
                     item_data.get('user_class')
                 )
             elif data_type == 'topic':
-                success = self.database.update_topic(
+                success = await self.database.update_topic(
                     item_data['id'],
                     item_data.get('topic_text')
                 )
+            elif data_type == 'debate' and item_data.get('winner') is not None:
+                new_ratings = await self.debate_manager.record_debate_result(
+                    int(item_data['id']),
+                    int(item_data['winner'])
+                )
+                success = new_ratings is not None
             else:
                 return {
                     'type': 'admin_update_response',
@@ -551,7 +663,7 @@ class WebSocketHandler:
         item_id = data.get('item_id')
         
         # Check admin privileges
-        user_info = self.database.get_user_by_id(user_id)
+        user_info = await self.database.get_user_by_id(user_id)
         if not user_info or user_info['user_class'] <= 0:
             return {
                 'type': 'admin_delete_response',
@@ -561,11 +673,11 @@ class WebSocketHandler:
         
         try:
             if data_type == 'user':
-                success = self.database.delete_user(item_id)
+                success = await self.database.delete_user(item_id)
             elif data_type == 'debate':
-                success = self.database.delete_debate(item_id)
+                success = await self.database.delete_debate(item_id)
             elif data_type == 'topic':
-                success = self.database.delete_topic(item_id)
+                success = await self.database.delete_topic(item_id)
             else:
                 return {
                     'type': 'admin_delete_response',
@@ -585,3 +697,40 @@ class WebSocketHandler:
                 'success': False,
                 'error': 'Failed to delete item'
             }
+    
+    async def handle_admin_get_metrics(self, data: dict) -> dict:
+        """Handle admin request for matchmaking metrics, as JSON or Prometheus text"""
+        user_id = data.get('user_id')
+        
+        # Check admin privileges
+        user_info = await self.database.get_user_by_id(user_id)
+        if not user_info or user_info['user_class'] <= 0:
+            return {
+                'type': 'admin_metrics_response',
+                'success': False,
+                'error': 'Admin privileges required'
+            }
+        
+        metrics = self.matchmaker.metrics
+        if data.get('format') == 'prometheus':
+            return {
+                'type': 'admin_metrics_response',
+                'success': True,
+                'format': 'prometheus',
+                'metrics': metrics.to_prometheus()
+            }
+        return {
+            'type': 'admin_metrics_response',
+            'success': True,
+            'format': 'json',
+            'metrics': metrics.to_dict(),
+            'system': await self.get_system_stats()
+        }
+    
+    async def get_system_stats(self) -> dict:
+        """Server-side resource statistics reported alongside the matchmaking metrics"""
+        return {
+            'database_pool': await self.database.get_pool_stats(),
+            'user_cache': await self.database.get_user_cache_stats(),
+            'topic_pool': await self.database.get_topic_pool_stats()
+        }
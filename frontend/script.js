@@ -5,7 +5,9 @@ let appState = {
     reconnectAttempts: 0,
     maxReconnectAttempts: 5,
     reconnectDelay: 2000,
-    isConnected: false
+    isConnected: false,
+    countdown: null,
+    countdownInterval: null
 };
 
 function connectWebSocket() {
@@ -36,9 +38,18 @@ function connectWebSocket() {
 
 function handleWebSocketOpen() {
     console.log('WebSocket connected');
+    const reconnected = appState.reconnectAttempts > 0;
     appState.isConnected = true;
     appState.reconnectAttempts = 0;
     updateConnectionStatus('Connected', true);
+    
+    // The server only sends a deadline when a phase starts; ask for the current one after reconnecting
+    if (reconnected && appState.currentDebate && appState.currentUser) {
+        sendWebSocketMessage({
+            type: 'timer_sync',
+            user_id: appState.currentUser.id
+        });
+    }
 }
 
 function handleWebSocketMessage(event) {
@@ -56,6 +67,9 @@ function handleWebSocketMessage(event) {
             case 'queue_joined':
                 handleQueueJoined(data);
                 break;
+            case 'queue_update':
+                renderQueueStatus(data.queue_status);
+                break;
             case 'match_found':
                 handleMatchFound(data);
                 break;
@@ -90,6 +104,9 @@ function handleWebSocketMessage(event) {
             case 'error':
                 showMessage(data.message, 'error');
                 break;
+            case 'admin_data_chunk':
+                handleAdminDataChunk(data);
+                break;
             case 'admin_data_response':
                 handleAdminDataResponse(data);
                 break;
@@ -418,9 +435,20 @@ function stopMatchmaking() {
 
 function handleQueueJoined(data) {
     setElementText('statusText', 'Searching for opponent...');
-    if (data.queue_status) {
-        setElementText('queueStatus', `Players in queue: ${data.queue_status.queue_size}`);
+    renderQueueStatus(data.queue_status);
+}
+
+function renderQueueStatus(status) {
+    if (!status) return;
+    let text = `Players in queue: ${status.queue_size}`;
+    if (status.position) {
+        text += ` · Position: ${status.position}`;
+    }
+    if (status.estimated_wait !== null && status.estimated_wait !== undefined) {
+        const remaining = Math.max(Math.round(status.estimated_wait - status.wait_time), 0);
+        text += remaining > 0 ? ` · Estimated wait: ~${remaining}s` : ' · Match expected shortly';
     }
+    setElementText('queueStatus', text);
 }
 
 function handleMatchFound(data) {
@@ -538,21 +566,67 @@ function handlePrepTimer(data) {
         setElementText('turnStatus', 'Preparation phase - get ready for the debate!');
     }
     
-    if (data.display) {
-        setElementText('timerDisplay', data.display);
-        
-        // Update progress bar
-        const totalTime = 3 * 60; // 3 minutes in seconds
-        const remaining = data.remaining_seconds || 0;
-        const progress = ((totalTime - remaining) / totalTime) * 100;
-        
-        const timerBar = document.getElementById('timerBar');
-        if (timerBar) {
-            timerBar.style.width = `${progress}%`;
+    updateCountdown(data, 3 * 60);
+}
+
+// Deadline frames arrive once per phase; the countdown is rendered locally from then on
+function updateCountdown(data, defaultTotal) {
+    if (data.deadline) {
+        appState.countdown = {
+            deadline: data.deadline,
+            offset: data.server_time - Date.now(),  // server clock minus local clock
+            total: data.duration_seconds || defaultTotal
+        };
+        renderCountdown();
+        if (!appState.countdownInterval) {
+            appState.countdownInterval = setInterval(renderCountdown, 250);
         }
+    } else if (data.display) {
+        renderTimer(data.display, data.remaining_seconds || 0, defaultTotal);
     }
 }
 
+function renderCountdown() {
+    const countdown = appState.countdown;
+    if (!countdown) return;
+    
+    const serverNow = Date.now() + countdown.offset;
+    const remaining = Math.max(Math.ceil((countdown.deadline - serverNow) / 1000), 0);
+    const minutes = String(Math.floor(remaining / 60)).padStart(2, '0');
+    const seconds = String(remaining % 60).padStart(2, '0');
+    renderTimer(`${minutes}:${seconds}`, remaining, countdown.total);
+}
+
+function renderTimer(display, remaining, totalTime) {
+    setElementText('timerDisplay', display);
+    
+    // Update progress bar
+    const progress = ((totalTime - remaining) / totalTime) * 100;
+    
+    const timerBar = document.getElementById('timerBar');
+    if (timerBar) {
+        timerBar.style.width = `${progress}%`;
+    }
+}
+
+function stopCountdown() {
+    if (appState.countdownInterval) {
+        clearInterval(appState.countdownInterval);
+        appState.countdownInterval = null;
+    }
+    appState.countdown = null;
+}
+
+// Timers in background tabs are throttled; ask for a fresh deadline when the page comes back
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'visible' && appState.currentDebate && appState.currentUser) {
+        sendWebSocketMessage({
+            type: 'timer_sync',
+            user_id: appState.currentUser.id
+        });
+    }
+});
+
 function handleDebatePhaseStart(data) {
     setElementText('debatePhase', 'Debate');
     addSystemMessage('Preparation time is over. The debate begins!');
@@ -582,19 +656,7 @@ function handleOpponentTurn(data) {
 }
 
 function handleTurnTimer(data) {
-    if (data.display) {
-        setElementText('timerDisplay', data.display);
-        
-        // Update progress bar
-        const totalTime = 2 * 60; // 2 minutes in seconds
-        const remaining = data.remaining_seconds || 0;
-        const progress = ((totalTime - remaining) / totalTime) * 100;
-        
-        const timerBar = document.getElementById('timerBar');
-        if (timerBar) {
-            timerBar.style.width = `${progress}%`;
-        }
-    }
+    updateCountdown(data, 2 * 60);
 }
 
 function handleDebateMessage(data) {
@@ -611,6 +673,7 @@ function handleDebateMessage(data) {
 }
 
 function handleDebateEnded(data) {
+    stopCountdown();
     setElementText('debatePhase', 'Finished');
     addSystemMessage('Debate has ended!');
     
@@ -931,10 +994,15 @@ function loadAdminData(type) {
         return;
     }
     
+    // Streamed pages are rendered as they arrive; count them to tell an empty table apart
+    appState.adminRowCounts = appState.adminRowCounts || {};
+    appState.adminRowCounts[type] = 0;
+    
     sendWebSocketMessage({
         type: 'admin_get_data',
         data_type: type,
-        user_id: appState.currentUser.id
+        user_id: appState.currentUser.id,
+        stream: true
     });
 }
 
@@ -961,7 +1029,11 @@ function displayUsersTable(users) {
         return;
     }
     
-    tbody.innerHTML = users.map(user => `
+    tbody.innerHTML = users.map(userRow).join('');
+}
+
+function userRow(user) {
+    return `
         <tr>
             <td>${user.id}</td>
             <td>${user.username}</td>
@@ -972,7 +1044,7 @@ function displayUsersTable(users) {
                 <button class="action-button delete" onclick="deleteUser(${user.id})">Delete</button>
             </td>
         </tr>
-    `).join('');
+    `;
 }
 
 function displayDebatesTable(debates) {
@@ -984,7 +1056,11 @@ function displayDebatesTable(debates) {
         return;
     }
     
-    tbody.innerHTML = debates.map(debate => `
+    tbody.innerHTML = debates.map(debateRow).join('');
+}
+
+function debateRow(debate) {
+    return `
         <tr>
             <td>${debate.id}</td>
             <td>${debate.user1_name || debate.user1_id}</td>
@@ -997,7 +1073,7 @@ function displayDebatesTable(debates) {
                 <button class="action-button delete" onclick="deleteDebate(${debate.id})">Delete</button>
             </td>
         </tr>
-    `).join('');
+    `;
 }
 
 function displayTopicsTable(topics) {
@@ -1009,7 +1085,11 @@ function displayTopicsTable(topics) {
         return;
     }
     
-    tbody.innerHTML = topics.map(topic => `
+    tbody.innerHTML = topics.map(topicRow).join('');
+}
+
+function topicRow(topic) {
+    return `
         <tr>
             <td>${topic.id}</td>
             <td>${topic.topic_text}</td>
@@ -1018,9 +1098,15 @@ function displayTopicsTable(topics) {
                 <button class="action-button delete" onclick="deleteTopic(${topic.id})">Delete</button>
             </td>
         </tr>
-    `).join('');
+    `;
 }
 
+const ADMIN_TABLES = {
+    users: { bodyId: 'usersTableBody', row: userRow },
+    debates: { bodyId: 'debatesTableBody', row: debateRow },
+    topics: { bodyId: 'topicsTableBody', row: topicRow }
+};
+
 function editUser(userId) {
     sendWebSocketMessage({
         type: 'admin_get_item',
@@ -1197,9 +1283,30 @@ function handleEditSubmit(e) {
 }
 
 // Admin WebSocket message handlers
+function handleAdminDataChunk(data) {
+    const table = ADMIN_TABLES[data.data_type];
+    const tbody = table && document.getElementById(table.bodyId);
+    if (!tbody) return;
+    
+    // Append each page as it arrives instead of holding the whole table in memory
+    appState.adminRowCounts = appState.adminRowCounts || {};
+    if (!appState.adminRowCounts[data.data_type]) {
+        tbody.innerHTML = '';
+    }
+    appState.adminRowCounts[data.data_type] = (appState.adminRowCounts[data.data_type] || 0) + data.data.length;
+    tbody.insertAdjacentHTML('beforeend', data.data.map(table.row).join(''));
+}
+
 function handleAdminDataResponse(data) {
     if (data.success) {
-        displayAdminData(data.data_type, data.data);
+        if (data.streamed) {
+            // Rows were rendered chunk by chunk; only an empty result still needs drawing
+            if (!(appState.adminRowCounts && appState.adminRowCounts[data.data_type])) {
+                displayAdminData(data.data_type, []);
+            }
+        } else {
+            displayAdminData(data.data_type, data.data);
+        }
     } else {
         showMessage(data.error || 'Failed to load data', 'error');
     }